@@ -7,21 +7,47 @@ https://github.com/masaccio/nad_remote
 import asyncio
 import logging
 from datetime import timedelta
+from functools import partial
 from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
 
 from homeassistant.components.media_player import MediaPlayerState
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PORT, Platform
-from homeassistant.core import Config, HomeAssistant
+from homeassistant.const import CONF_DEVICE, CONF_HOST, CONF_PORT, CONF_TYPE, Platform
+from homeassistant.core import Config, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .api import NADApiClient
-from .const import DOMAIN, SCAN_INTERVAL, MAIN_NAME, ZONE2_NAME
+from .const import (
+    APPLY_STATE_COOLDOWN,
+    CONF_MAX_CONCURRENT_POLLS,
+    DATA_POLLER,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DOMAIN,
+    MAIN_NAME,
+    PARTIAL_REFRESH_COOLDOWN,
+    SCAN_INTERVAL,
+    PACING_SAVE_CHANGE,
+    STORAGE_CAPABILITIES,
+    STORAGE_PACING,
+    STORAGE_LISTENING_MODES,
+    STORAGE_TUNER_PRESETS,
+    TYPE_SERIAL,
+    TYPE_TELNET,
+)
+from .poller import NADPollingEngine
+from .store import NADStore
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
-PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER]
+PLATFORMS: list[Platform] = [
+    Platform.MEDIA_PLAYER,
+    Platform.SENSOR,
+    Platform.SWITCH,
+    Platform.SELECT,
+]
 
 
 async def async_setup(hass: HomeAssistant, config: Config):
@@ -30,29 +56,81 @@ async def async_setup(hass: HomeAssistant, config: Config):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Set up this integration using UI."""
+    """Set up this integration using UI.
+
+    Setup is staged so the receiver is read once: connect and revalidate the
+    cached capabilities, poll every zone in one batch, then set up all
+    platforms together from that first poll.
+    """
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})
 
+    store = NADStore(hass, entry.entry_id)
+    await store.async_load()
+    capabilities = store.get(STORAGE_CAPABILITIES, None)
     try:
-        api = NADApiClient(entry.data[CONF_HOST], entry.data[CONF_PORT])
+        if entry.data.get(CONF_TYPE, TYPE_TELNET) == TYPE_SERIAL:
+            api = await hass.async_add_executor_job(
+                partial(
+                    NADApiClient,
+                    None,
+                    None,
+                    serial_port=entry.data[CONF_DEVICE],
+                    capabilities=capabilities,
+                )
+            )
+        else:
+            api = await hass.async_add_executor_job(
+                partial(
+                    NADApiClient,
+                    entry.data[CONF_HOST],
+                    entry.data[CONF_PORT],
+                    capabilities=capabilities,
+                )
+            )
     except Exception as e:
         raise ConfigEntryNotReady(f"NAD API initialisation failed: {e}") from e
 
-    coordinator = NADDataUpdateCoordinator(hass, client=api)
+    if not api.capabilities_cached and api.get_capabilities() is not None:
+        await store.async_set(STORAGE_CAPABILITIES, None, api.get_capabilities())
+    listening_modes = store.get(STORAGE_LISTENING_MODES, api.model)
+    if listening_modes is not None:
+        api.set_listening_modes(listening_modes)
+    tuner_presets = store.get(STORAGE_TUNER_PRESETS, api.model)
+    if tuner_presets is not None:
+        api.set_tuner_presets(tuner_presets)
+    pacing = store.get(STORAGE_PACING, api.model)
+    if pacing is not None:
+        api.set_pacing(*pacing)
+
+    # One engine polls every receiver; its limit is an option copied to all entries
+    max_concurrent = entry.options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS)
+    if DATA_POLLER not in hass.data:
+        hass.data[DATA_POLLER] = NADPollingEngine(hass, max_concurrent=max_concurrent)
+    engine = hass.data[DATA_POLLER]
+    engine.set_max_concurrent(max_concurrent)
+    engine.register(entry.entry_id)
+
+    coordinator = NADDataUpdateCoordinator(
+        hass, client=api, engine=engine, store=store, name=entry.entry_id
+    )
+    # The only full poll during setup, platforms use its data
     await coordinator.async_refresh()
 
     if not coordinator.last_update_success:
+        _release_engine(hass, entry)
+        await hass.async_add_executor_job(api.close)
         raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
-    for platform in PLATFORMS:
-        if entry.options.get(platform, True):
-            coordinator.platforms.append(platform)
-            hass.async_add_job(hass.config_entries.async_forward_entry_setup(entry, platform))
+    coordinator.platforms = [
+        platform for platform in PLATFORMS if entry.options.get(platform, True)
+    ]
+    await hass.config_entries.async_forward_entry_setups(entry, coordinator.platforms)
 
-    entry.add_update_listener(async_reload_entry)
+    coordinator.options = _reload_options(entry)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
@@ -61,11 +139,13 @@ class NADState:
     # Dict entry for each available zone
     power_state: dict = field(default_factory=dict)
     source: dict = field(default_factory=dict)
-    source_list: dict = field(default_factory=dict)
+    source_list: tuple = ()
     is_volume_muted: dict = field(default_factory=dict)
     volume_level: dict = field(default_factory=dict)
     # Sound mode applies to all zones
     sound_mode: str = None
+    # Secondary properties by command key, e.g. 'Main.Audio.CODEC'
+    properties: dict = field(default_factory=dict)
 
 
 class NADDataUpdateCoordinator(DataUpdateCoordinator):
@@ -75,35 +155,269 @@ class NADDataUpdateCoordinator(DataUpdateCoordinator):
         self,
         hass: HomeAssistant,
         client: NADApiClient,
+        engine: NADPollingEngine | None = None,
+        store: NADStore | None = None,
+        name: str = DOMAIN,
     ) -> None:
         """Initialize."""
         self.api = client
+        self.engine = engine
+        self.store = store
+        self._pacing_saved = client.pacing
         self.platforms = []
+        # Options the entry was set up with
+        self.options: dict[str, Any] = {}
         self.model = None
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        # Secondary properties this receiver has, all read in one batch per poll
+        self.properties = client.available_properties()
+        super().__init__(hass, _LOGGER, name=name, update_interval=SCAN_INTERVAL)
+        if self.properties:
+            client.add_listener(self._on_notification)
+        # Fields written since the last read back, by zone
+        self._pending_fields: dict[str, set[str]] = {}
+        # Zone states queued by apply_state, and done once they have been written
+        self._pending_state: dict[str, dict[str, Any]] = {}
+        self._applied: asyncio.Future | None = None
+        # Done once the full refresh in flight, if any, has published its data
+        self._polling: asyncio.Future | None = None
+        # Discovery of listening modes and tuner presets, run beside the polls
+        self._discovery: asyncio.Task | None = None
+        self._fields_refresh = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=PARTIAL_REFRESH_COOLDOWN,
+            immediate=False,
+            function=self._async_refresh_fields,
+        )
+        self._apply_pending = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=APPLY_STATE_COOLDOWN,
+            immediate=False,
+            function=self._async_apply_pending,
+        )
+
+    async def async_shutdown(self) -> None:
+        """Cancel any pending read back, write and discovery as well as the scheduled refresh"""
+        self._fields_refresh.async_cancel()
+        self._apply_pending.async_cancel()
+        if self._applied is not None:
+            self._applied.cancel()
+        if self._discovery is not None:
+            self._discovery.cancel()
+        await super().async_shutdown()
+
+    def _on_notification(self, key: str, value: str | None) -> None:
+        """Apply a property pushed by the receiver; called from the I/O thread"""
+        if key in self.properties and value is not None:
+            self.hass.loop.call_soon_threadsafe(self._async_set_property_value, key, value)
+
+    @callback
+    def _async_set_property_value(self, key: str, value: str) -> None:
+        if self.data is None or self.data.properties.get(key) == value:
+            return
+        self.data.properties[key] = value
+        if key.startswith("Tuner."):
+            # The station changed, so a zone playing the tuner may be on another preset
+            for zone, source in self.data.source.items():
+                if self.api.is_tuner_source(source):
+                    self.data.source[zone] = self.api.tuner_source_name()
+        self.async_set_updated_data(self.data)
+
+    async def async_set_property(self, key: str, value: str) -> None:
+        """Write a secondary property and publish the confirmed value"""
+        confirmed = await self.hass.async_add_executor_job(self.api.set_property, key, value)
+        if confirmed is not None:
+            self._async_set_property_value(key, confirmed)
+
+    async def _async_run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking read through the polling engine, or an executor without one"""
+        if self.engine is not None:
+            return await self.engine.async_poll(self.name, func, *args)
+        try:
+            return await self.hass.async_add_executor_job(func, *args)
+        except Exception as e:
+            raise UpdateFailed(f"Error fetching data from API: {e}")
+
+    async def _async_read(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking read that a refresh in flight must not cause to be skipped"""
+        if self.engine is not None:
+            return await self.engine.async_read(func, *args)
+        try:
+            return await self.hass.async_add_executor_job(func, *args)
+        except Exception as e:
+            raise UpdateFailed(f"Error fetching data from API: {e}")
 
     async def _async_update_data(self) -> NADState:
         """Fetch and cache data from the API"""
+        polling = self._polling = self.hass.loop.create_future()
+        try:
+            return await self._async_poll()
+        finally:
+            # Read backs waiting on this run once the data has been published
+            self._polling = None
+            polling.set_result(None)
+
+    async def _async_poll(self) -> NADState:
+        previous = self.data
+        data = await self._async_run(self._fetch_data)
+
+        if self.store is not None and self._pacing_changed():
+            self._pacing_saved = self.api.pacing
+            await self.store.async_set(STORAGE_PACING, self.api.model, list(self._pacing_saved))
+
+        # Modes and presets can only be cycled with the main zone on; once found
+        # they are saved and never discovered again. Discovery waits for the
+        # second poll so that it does not hold up setup, and runs as its own task
+        # as it takes many round trips and must not share a poll's deadline
+        if (
+            self._discovery is None
+            and self.store is not None
+            and previous is not None
+            and data.power_state.get(MAIN_NAME) == MediaPlayerState.ON
+            and self._needs_discovery()
+        ):
+            self._discovery = self.hass.async_create_task(self._async_discover())
+        return data
+
+    def _needs_discovery(self) -> bool:
+        return not self.api.listening_modes_attempted or (
+            self.api.has_tuner and not self.api.tuner_presets_attempted
+        )
+
+    async def _async_discover(self) -> None:
+        """Discover listening modes and tuner presets; listening modes are tried
+        once per setup whatever the result
+        """
         try:
-            if self.api.has_zone2:
-                zones = [MAIN_NAME, ZONE2_NAME]
-            else:
-                zones = [MAIN_NAME]
-            update = False
-            data = NADState()
-            for zone in zones:
-                data.power_state[zone] = self.api.get_power_state(zone)
-                if data.power_state[zone] == MediaPlayerState.ON:
-                    data.volume_level[zone] = self.api.get_volume_level(zone)
-                    data.is_volume_muted[zone] = self.api.muted(zone)
-                    data.source[zone] = self.api.get_source(zone)
-                    update = True
-            if update:
-                data.source_list = self.api.get_sources()
-                data.sound_mode = self.api.get_listening_mode(MAIN_NAME)
-            return data
+            if not self.api.listening_modes_attempted:
+                modes = await self.hass.async_add_executor_job(self.api.discover_listening_modes)
+                if modes is not None:
+                    await self.store.async_set(STORAGE_LISTENING_MODES, self.api.model, modes)
+            if self.api.has_tuner and not self.api.tuner_presets_attempted:
+                await self.hass.async_add_executor_job(self.api.discover_tuner_presets)
+                await self._async_save_tuner_presets()
+        finally:
+            self._discovery = None
+        self._async_publish_sources()
+
+    def _pacing_changed(self) -> bool:
+        """Whether the learned pacing has moved enough since it was last saved"""
+        rate, burst = self.api.pacing
+        saved_rate, saved_burst = self._pacing_saved
+        return burst != saved_burst or abs(rate - saved_rate) >= saved_rate * PACING_SAVE_CHANGE
+
+    async def async_rescan_tuner_presets(self) -> None:
+        """Scan the tuner presets again, e.g. after they were changed on the receiver"""
+        if not self.api.has_tuner:
+            return
+        if self._discovery is not None:
+            await self._discovery
+        await self.hass.async_add_executor_job(self.api.discover_tuner_presets)
+        await self._async_save_tuner_presets()
+        self._async_publish_sources()
+
+    async def _async_save_tuner_presets(self) -> None:
+        if self.store is not None:
+            await self.store.async_set(
+                STORAGE_TUNER_PRESETS, self.api.model, self.api.tuner_presets
+            )
+
+    @callback
+    def _async_publish_sources(self) -> None:
+        """Publish the source list, which names the presets, and the listening modes"""
+        if self.data is not None:
+            self.data.source_list = self.api.get_sources()
+            self.async_set_updated_data(self.data)
+
+    async def async_apply_zone_state(self, zone: str, fields: dict[str, Any]) -> None:
+        """Queue a partial state for one zone and wait until it is written.
+
+        Zones queued within a short window, such as those of one service call,
+        are merged into one burst.
+        """
+        self._pending_state.setdefault(zone, {}).update(fields)
+        if self._applied is None:
+            self._applied = self.hass.loop.create_future()
+        applied = self._applied
+        await self._apply_pending.async_call()
+        await applied
+
+    async def _async_apply_pending(self) -> None:
+        state, self._pending_state = self._pending_state, {}
+        applied, self._applied = self._applied, None
+        if not state:
+            return
+        try:
+            await self.async_apply_state(state)
         except Exception as e:
-            raise UpdateFailed(f"Error fetching data from API: {e}")
+            applied.set_exception(e)
+        else:
+            applied.set_result(None)
+
+    async def async_apply_state(self, state: dict[str, dict[str, Any]]) -> None:
+        """Write a partial state for one or more zones in one burst and publish the result"""
+        confirmed = await self.hass.async_add_executor_job(self.api.apply_state, state)
+        if self.data is None:
+            await self.async_request_refresh()
+            return
+        self._merge_zone_state(confirmed)
+        self.async_set_updated_data(self.data)
+
+    async def async_request_fields(self, zone: str, fields: Iterable[str]) -> None:
+        """Read back the fields a write may have changed.
+
+        Requests within a short window are merged into one batch, and only
+        those fields are read and merged into the current data.
+        """
+        self._pending_fields.setdefault(zone, set()).update(fields)
+        await self._fields_refresh.async_call()
+
+    async def _async_refresh_fields(self) -> None:
+        fields, self._pending_fields = self._pending_fields, {}
+        if not fields:
+            return
+        if self._polling is not None:
+            # A refresh started before the write may publish values it read
+            # earlier; read back after it so the fresher values win
+            await self._polling
+        if self.data is None:
+            await self.async_request_refresh()
+            return
+        try:
+            state = await self._async_read(self.api.get_zone_fields, fields)
+        except UpdateFailed as e:
+            _LOGGER.warning("read back of %s failed: %s", fields, e)
+            return
+        self._merge_zone_state(state)
+        self.async_set_updated_data(self.data)
+
+    def _merge_zone_state(self, state: dict[str, dict[str, Any]]) -> None:
+        for zone, fields in state.items():
+            for name, value in fields.items():
+                if name == "sound_mode":
+                    self.data.sound_mode = value
+                else:
+                    getattr(self.data, name)[zone] = value
+
+    def _fetch_data(self) -> NADState:
+        """Read the current state of all zones in one batch; runs in an executor thread"""
+        zones, properties = self.api.get_state(self.properties)
+        update = False
+        data = NADState()
+        for zone in self.api.zones:
+            fields = zones.get(zone, {})
+            data.power_state[zone] = fields.get("power_state")
+            if data.power_state[zone] == MediaPlayerState.ON:
+                data.volume_level[zone] = fields.get("volume_level")
+                data.is_volume_muted[zone] = fields.get("is_volume_muted")
+                data.source[zone] = fields.get("source")
+                update = True
+        if update:
+            data.source_list = self.api.get_sources()
+            data.sound_mode = zones.get(MAIN_NAME, {}).get("sound_mode")
+            data.properties = properties
+        return data
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -120,11 +434,42 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
+        _release_engine(hass, entry)
+        await hass.async_add_executor_job(coordinator.api.close)
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove cached receiver data when an entry is deleted."""
+    await NADStore(hass, entry.entry_id).async_remove()
+
+
+def _release_engine(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop an entry from the shared polling engine, stopping it after the last entry"""
+    engine = hass.data.get(DATA_POLLER)
+    if engine is not None and engine.unregister(entry.entry_id):
+        engine.shutdown()
+        hass.data.pop(DATA_POLLER)
+
+
+def _reload_options(entry: ConfigEntry) -> dict[str, Any]:
+    """Options that only take effect when the entry is set up again"""
+    return {key: value for key, value in entry.options.items() if key != CONF_MAX_CONCURRENT_POLLS}
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply the poll limit to the running engine, and reload for any other change"""
+    engine = hass.data.get(DATA_POLLER)
+    if engine is not None:
+        engine.set_max_concurrent(
+            entry.options.get(CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS)
+        )
+    coordinator = hass.data[DOMAIN].get(entry.entry_id)
+    if coordinator is None or coordinator.options != _reload_options(entry):
+        await async_reload_entry(hass, entry)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -2,7 +2,7 @@
 import logging
 import re
 import sys
-from typing import Tuple
+from typing import Any, Callable, Iterable, Tuple
 from math import floor
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -16,33 +16,105 @@ from .const import (
     MAIN_NAME,
     ZONE2_NAME,
     LISTENING_MODES,
+    MAX_LISTENING_MODES,
+    MAX_TUNER_PRESETS,
+    PROPERTIES,
+    PUSHED_PROPERTIES,
+    ZONE_FIELDS,
 )
+from .sources import NADSourceTable
+from .tuner import NADTuner
 
 # Use local implementation of NAD client rather than upstream
-from .nad_receiver import NADReceiverTelnet
+from .nad_receiver import NADReceiver, NADReceiverTelnet
+from .nad_receiver.nad_pacing import remember
+from .nad_receiver.nad_trace import log_subscriber
 
 
 class NADApiClient:
-    def __init__(self, host: str, port: int) -> None:
-        """NAD API Client."""
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        serial_port: str | None = None,
+        capabilities: dict | None = None,
+    ) -> None:
+        """NAD API Client. Connects over RS-232 if serial_port is given, otherwise telnet.
+
+        A capability dump saved from an earlier connection is reused when the
+        receiver still reports the same model, which replaces the full status
+        dump with a single query. Only its static parts are trusted: source
+        names and enabled states, and the tuner, are read again with the first poll.
+        """
         self._host = host
         self._port = port
-        self._receiver = NADReceiverTelnet(host, port)
-        self._capabilities = self.get_capabilities()
-        _ = self.get_sources()
-        self._source_name_to_id = {v: k for k, v in self._sources.items()}
-        self._listening_modes = LISTENING_MODES
-        self._volume_range = {}
-        self._volume_range[MAIN_NAME] = self.volume_range(MAIN_NAME)
+        self._serial_port = serial_port
+        if serial_port is not None:
+            self._receiver = NADReceiver(serial_port)
+        else:
+            self._receiver = NADReceiverTelnet(host, port)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            # Trace the command path only when it would be logged
+            self._receiver.add_trace_subscriber(log_subscriber(_LOGGER))
+        self._capabilities = self._load_capabilities(capabilities)
+        self.capabilities_cached = capabilities is not None and self._capabilities is capabilities
+        self._sources = NADSourceTable(self._capabilities)
+        self._tuner = NADTuner(self._capabilities)
+        # A cached dump holds the station playing and the source table as they
+        # were when it was saved, so both are read once with the first poll
+        self._tuner_stale = self.capabilities_cached and self._tuner.present
+        self._sources_stale = self.capabilities_cached
+        self.tuner_presets_discovered = False
+        # The scan audibly tunes through every preset, so it is tried once
+        self.tuner_presets_attempted = False
+        # Source list with tuner presets, rebuilt only when either part changes
+        self._source_list_cache = None
+        self._receiver.add_listener(self._on_notification)
+        # Replaced by the modes this receiver reports once they are discovered
+        self._listening_mode_list = tuple(LISTENING_MODES)
+        self._listening_modes = frozenset(LISTENING_MODES)
+        self.listening_modes_discovered = False
+        # Discovery cycles the receiver's mode, so it is tried once per setup
+        self.listening_modes_attempted = False
+        self._unknown_modes = set()
+        self.zones = self._discover_zones()
+        # Power state each zone was last seen in; a zone seen off is polled for power only
+        self._zone_power: dict[str, str] = {}
+        self._volume_range = {zone: self.volume_range(zone) for zone in self.zones}
+        # Writes are paced from here on, starting from what this model has taught us
+        self._pacer = self._receiver.pace(self.model)
+
+    def _discover_zones(self) -> list[str]:
+        """Main and every other zone that appears in the capability dump"""
+        numbers = set()
+        for key in self._capabilities or {}:
+            match = re.match(r"^zone(\d+)_", key)
+            if match:
+                numbers.add(int(match.group(1)))
+        zones = [MAIN_NAME] + [f"Zone{number}" for number in sorted(numbers)]
+        _LOGGER.debug("zones: %s", zones)
+        return zones
 
+    @property
+    def has_zone2(self) -> bool:
+        return ZONE2_NAME in self.zones
+
+    def _call(self, zone: str, function: str, operator: str, value: Any = None) -> Any:
+        """Run a zone function, e.g. 'volume', converting the reply as the receiver's methods do"""
+        reply = self._receiver.exec_command(
+            self._domain(zone), function, operator, None if value is None else str(value)
+        )
+        if reply is None or function not in ("source", "volume"):
+            return reply
         try:
-            _ = self._receiver.zone2_source("?")
-            self.has_zone2 = True
+            return float(reply) if function == "volume" else int(reply)
         except ValueError:
-            self.has_zone2 = False
+            # Sources may be named; a volume that is not a number is unknown
+            return reply if function == "source" else None
 
-        if self.has_zone2:
-            self._volume_range[ZONE2_NAME] = self.volume_range(ZONE2_NAME)
+    def close(self) -> None:
+        """Close the connection to the receiver"""
+        self._receiver.transport.close()
 
     def get_model(self):
         try:
@@ -56,6 +128,16 @@ class NADApiClient:
         except Exception as e:
             _LOGGER.error("model check failed: %s", e)
 
+    def _load_capabilities(self, cached: dict | None) -> dict | None:
+        """Revalidate cached capabilities against the receiver model, or read them"""
+        if cached is not None:
+            model = self.get_model()
+            if model is not None and model == cached.get("main_model"):
+                _LOGGER.debug("using cached capabilities for %s", model)
+                return cached
+            _LOGGER.debug("cached capabilities are for %s, not %s", cached.get("main_model"), model)
+        return self.get_capabilities()
+
     def get_capabilities(self) -> dict | None:
         """Fetch status of receiver to get capabilities"""
         if hasattr(self, "_capabilities"):
@@ -68,25 +150,74 @@ class NADApiClient:
         except Exception as e:
             _LOGGER.error("capability check failed: %s", e)
 
-    def get_sources(self) -> dict | None:
-        """Discover list of sources"""
-        if not hasattr(self, "_sources"):
-            try:
-                self._sources = {}
-                for source_id in range(1, 20):
-                    s_en = f"source{source_id}_enabled"
-                    s_name = f"source{source_id}_name"
-                    if s_en in self._capabilities:
-                        if self._capabilities[s_en] == "No":
-                            self._sources[source_id] = None
-                        else:
-                            self._sources[source_id] = self._capabilities[s_name]
-                _LOGGER.debug("get_sources sources=%s", self._sources.values())
-            except Exception as e:
-                _LOGGER.error("source check failed: %s", e)
-
-        source_list = [v for k, v in self._sources.items() if v is not None]
-        return source_list
+    def get_sources(self) -> tuple[str, ...]:
+        """Return the cached names of enabled sources followed by tuner presets"""
+        sources = self._sources.source_list
+        presets = self._tuner.source_names
+        if not presets:
+            return sources
+        cache = self._source_list_cache
+        if cache is None or cache[0] is not sources or cache[1] is not presets:
+            cache = self._source_list_cache = (sources, presets, sources + presets)
+        return cache[2]
+
+    def refresh_source(self, source_id: int) -> None:
+        """Re-read one source's name and enabled state with a targeted query"""
+        try:
+            replies = self._receiver.exec_frames(NADSourceTable.query_frames(source_id))
+            for key, value in (replies or {}).items():
+                self._sources.update_from_frame(key, value)
+        except Exception as e:
+            _LOGGER.error("refresh_source: error: %s", e)
+
+    def _on_notification(self, key: str, value: str | None) -> None:
+        """Apply frames pushed by the receiver"""
+        if self._sources.update_from_frame(key, value):
+            _LOGGER.debug("source update: %s=%s", key, value)
+        elif self._tuner.update_from_frame(key, value):
+            _LOGGER.debug("tuner update: %s=%s", key, value)
+
+    def add_listener(self, callback) -> Callable[[], None]:
+        """Register a callback for frames pushed by the receiver"""
+        return self._receiver.add_listener(callback)
+
+    def available_properties(self) -> list[str]:
+        """Secondary property keys present in the receiver's capability dump"""
+        capabilities = self._capabilities or {}
+        return [key for key in PROPERTIES if key.lower().replace(".", "_") in capabilities]
+
+    def get_properties(self, keys: list[str]) -> dict[str, str]:
+        """Read secondary properties in one batch; pushed properties come from the cache"""
+        values = self._pushed_properties(keys)
+        polled = [f"{key}?" for key in keys if key not in PUSHED_PROPERTIES]
+        if not polled:
+            return values
+        try:
+            replies = self._receiver.exec_frames(polled) or {}
+            _LOGGER.debug("get_properties: %s", replies)
+            values.update({key: value for key, value in replies.items() if value is not None})
+            return values
+        except Exception as e:
+            _LOGGER.error("get_properties: error: %s", e)
+            return {}
+
+    def _pushed_properties(self, keys: list[str]) -> dict[str, str]:
+        """Values of pushed properties, which are kept current without polling"""
+        values = {}
+        for key in keys:
+            if key in PUSHED_PROPERTIES and self._tuner.frequency.get(key.split(".")[1]):
+                values[key] = self._tuner.frequency[key.split(".")[1]]
+        return values
+
+    def set_property(self, key: str, value: str) -> str | None:
+        """Write a secondary property and return the value the receiver confirms"""
+        try:
+            replies = self._receiver.exec_frames([f"{key}={value}"]) or {}
+            _LOGGER.debug("set_property: %s=%s", key, replies.get(key))
+            return replies.get(key)
+        except Exception as e:
+            _LOGGER.error("set_property: error: %s", e)
+            return None
 
     def volume_to_ha(self, zone: str, volume: float) -> float:
         volume_range = abs(self._volume_range[zone][1]) + abs(self._volume_range[zone][0])
@@ -99,11 +230,173 @@ class NADApiClient:
         volume_ha = floor((volume * volume_range) + volume_min)
         return volume_ha
 
+    def apply_state(self, state: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """Write a partial state for one or more zones and return the confirmed state.
+
+        The state maps zone to NADState field, for example
+        {MAIN_NAME: {"power_state": MediaPlayerState.ON, "source": "CD", "volume_level": 0.4}}.
+        All writes go in one pipelined burst, split only where a zone must finish
+        powering on first. Fields the receiver did not confirm are left out.
+        """
+        writes = {}
+        for zone, fields in state.items():
+            writes[self._domain(zone)] = values = {}
+            for name, value in fields.items():
+                if name == "power_state":
+                    values["power"] = "On" if value == MediaPlayerState.ON else "Off"
+                elif name == "source":
+                    if self._sources.id(value) is None:
+                        _LOGGER.error("apply_state: zone '%s' unknown source '%s'", zone, value)
+                        continue
+                    values["source"] = self._sources.id(value)
+                elif name == "volume_level":
+                    values["volume"] = self.volume_from_ha(zone, value)
+                elif name == "is_volume_muted":
+                    values["mute"] = "On" if value else "Off"
+                elif name == "sound_mode" and zone == MAIN_NAME:
+                    if value not in self._listening_modes:
+                        _LOGGER.error("apply_state: unknown mode '%s'", value)
+                        continue
+                    values["listeningmode"] = value
+                else:
+                    _LOGGER.error("apply_state: zone '%s' unsupported field '%s'", zone, name)
+        _LOGGER.debug("apply_state: writes=%s", writes)
+
+        try:
+            replies = self._receiver.apply_state(writes) or {}
+        except Exception as e:
+            _LOGGER.error("apply_state: error: %s", e)
+            return {}
+        confirmed = {}
+        for zone in state:
+            confirmed[zone] = self._parse_zone_replies(zone, replies)
+        return confirmed
+
+    def get_state(
+        self, properties: list[str] = ()
+    ) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+        """Read every zone and the given secondary properties in one pipelined batch.
+
+        Returns the NADState fields for each zone, with only the power state of a
+        zone that is off, and the property values. A zone last seen off is only
+        asked for its power state, and is read in full once it is found on.
+        """
+        frames = []
+        standby = [
+            zone for zone in self.zones if self._zone_power.get(zone) == MediaPlayerState.OFF
+        ]
+        for zone in self.zones:
+            frames += self._zone_frames(zone, ("power_state",) if zone in standby else ZONE_FIELDS)
+        frames += [f"{key}?" for key in properties if key not in PUSHED_PROPERTIES]
+        if self._tuner_stale:
+            frames += [frame for frame in self._tuner.query_frames() if frame not in frames]
+        if self._sources_stale:
+            for source_id in self._sources.source_ids:
+                frames += NADSourceTable.query_frames(source_id)
+        # A receiver that fails or does not answer at all fails the poll
+        replies = self._receiver.exec_frames(frames)
+        if replies is None:
+            raise UpdateFailed("get_state: no reply from receiver")
+        if self._tuner_stale:
+            for key, value in replies.items():
+                self._tuner.update_from_frame(key, value)
+            self._tuner_stale = False
+        if self._sources_stale:
+            # Before zone replies are parsed, so sources are named from the new table
+            for key, value in replies.items():
+                self._sources.update_from_frame(key, value)
+            self._sources_stale = False
+
+        state = {}
+        for zone in self.zones:
+            fields = self._parse_zone_replies(zone, replies)
+            if fields.get("power_state") != MediaPlayerState.ON:
+                fields = {"power_state": fields.get("power_state")}
+            state[zone] = fields
+        woken = [zone for zone in standby if state[zone]["power_state"] == MediaPlayerState.ON]
+        if woken:
+            state.update(self.get_zone_fields({zone: ("power_state",) for zone in woken}))
+        values = self._pushed_properties(properties)
+        values.update({key: replies[key] for key in properties if replies.get(key) is not None})
+        _LOGGER.debug("get_state: %s %s", state, values)
+        return state, values
+
+    def get_zone_fields(self, fields: dict[str, Iterable[str]]) -> dict[str, dict[str, Any]]:
+        """Re-read only the given NADState fields of each zone in one pipelined batch.
+
+        Reading a zone's power state reads the whole zone, and a zone found to
+        be off returns only its power state.
+        """
+        frames = []
+        for zone, names in fields.items():
+            frames += self._zone_frames(zone, ZONE_FIELDS if "power_state" in names else names)
+        if not frames:
+            return {}
+        replies = self._receiver.exec_frames(frames)
+        if replies is None:
+            raise UpdateFailed("get_zone_fields: no reply from receiver")
+
+        state = {}
+        for zone in fields:
+            state[zone] = self._parse_zone_replies(zone, replies)
+            if state[zone].get("power_state") == MediaPlayerState.OFF:
+                state[zone] = {"power_state": MediaPlayerState.OFF}
+        _LOGGER.debug("get_zone_fields: %s", state)
+        return state
+
+    def _zone_frames(self, zone: str, names: Iterable[str]) -> list[str]:
+        """Query frames for NADState fields of a zone that the receiver has"""
+        domain = self._domain(zone)
+        frames = []
+        for name in names:
+            function = ZONE_FIELDS[name]
+            if function == "listeningmode" and zone != MAIN_NAME:
+                continue
+            key = self._receiver.command_key(domain, function)
+            # Power is always read; the zone is known from its other functions
+            if function != "power" and not self._has_function(key):
+                continue
+            frames.append(f"{key}?")
+        return frames
+
+    def _has_function(self, key: str) -> bool:
+        """Whether the capability dump has a 'Domain.Function' key, or there is no dump"""
+        if self._capabilities is None:
+            return True
+        return key.lower().replace(".", "_") in self._capabilities
+
+    def _parse_zone_replies(self, zone: str, replies: dict[str, str | None]) -> dict[str, Any]:
+        """Convert replies keyed by 'Domain.Function' into NADState fields for a zone"""
+        domain = self._domain(zone)
+        fields = {}
+        for name, function in ZONE_FIELDS.items():
+            if function == "listeningmode" and zone != MAIN_NAME:
+                continue
+            value = replies.get(self._receiver.command_key(domain, function))
+            if value is None:
+                continue
+            if function == "power":
+                fields[name] = MediaPlayerState.ON if value == "On" else MediaPlayerState.OFF
+                self._zone_power[zone] = fields[name]
+            elif function == "source":
+                fields[name] = self._source_name(int(value) if value.isdigit() else value)
+            elif function == "volume":
+                fields[name] = self.volume_to_ha(zone, float(value))
+            elif function == "mute":
+                fields[name] = value != "Off"
+            elif function == "listeningmode":
+                fields[name] = self._listening_mode(value)
+            else:
+                fields[name] = value
+        return fields
+
+    @staticmethod
+    def _domain(zone: str) -> str:
+        """Receiver command domain for a zone, e.g. 'zone3'"""
+        return zone.lower()
+
     def get_power_state(self, zone: str) -> str:
-        if zone == ZONE2_NAME:
-            status = self._receiver.zone2_power("?")
-        else:
-            status = self._receiver.main_power("?")
+        status = self._call(zone, "power", "?")
         if status == "On":
             _LOGGER.debug("get_power_state: zone=%s, status=%s", zone, status)
             return MediaPlayerState.ON
@@ -116,83 +409,243 @@ class NADApiClient:
 
     def get_source(self, zone: str) -> str | None:
         try:
-            if zone == ZONE2_NAME:
-                source = self._receiver.zone2_source("?")
-            else:
-                source = self._receiver.main_source("?")
-            if source is not None and source in self._sources:
-                _LOGGER.debug("get_source: zone='%s' source='%s'", zone, self._sources[source])
-                return self._sources[source]
-            else:
-                _LOGGER.error("get_source: zone='%s', unknown source '%s'", zone, source)
+            source = self._call(zone, "source", "?")
+            name = self._source_name(source)
+            _LOGGER.debug("get_source: zone='%s' source='%s'", zone, name)
+            return name
         except Exception as e:
             _LOGGER.error("get_source: error: %s", e)
 
+    def _source_name(self, source: int | str | None) -> str | None:
+        """Name of a source id, or of the tuner preset playing when it is the tuner"""
+        if isinstance(source, int) and source not in self._sources:
+            # A source the table has not seen, so ask the receiver about it
+            self.refresh_source(source)
+        if source is not None and source == self._tuner_source_id():
+            preset = self._tuner.current_name()
+            if preset is not None:
+                return preset
+        if source is not None and source in self._sources:
+            return self._sources.name(source)
+        _LOGGER.error("unknown source '%s'", source)
+        return None
+
     def set_source(self, zone: str, source: str) -> None:
         try:
-            if source is None or source not in self._source_name_to_id:
+            if self._tuner.preset(source) is not None:
+                self.select_tuner_preset(zone, source)
+                return
+            source_id = self._sources.id(source)
+            if source is None or source_id is None:
                 _LOGGER.error("set_source zone '%s' unknown source '%s'", zone, source)
                 return None
             _LOGGER.debug("set_source: zone='%s' source='%s'", zone, source)
-            if zone == ZONE2_NAME:
-                _ = self._receiver.zone2_source("=", self._source_name_to_id[source])
-            else:
-                _ = self._receiver.main_source("=", self._source_name_to_id[source])
+            _ = self._call(zone, "source", "=", source_id)
         except Exception as e:
             _LOGGER.error("set_source: error: %s", e)
 
+    @property
+    def has_tuner(self) -> bool:
+        return self._tuner.present
+
+    @property
+    def tuner_presets(self) -> dict[str, dict[str, str]]:
+        return self._tuner.presets
+
+    def set_tuner_presets(self, presets: dict[str, dict[str, str]]) -> bool:
+        """Use a previously scanned preset map, unless the tuner has changed since"""
+        if not self._tuner.matches(presets):
+            _LOGGER.debug("stored tuner presets %s do not match the tuner", presets)
+            return False
+        self._tuner.set_presets(presets)
+        self.tuner_presets_discovered = True
+        self.tuner_presets_attempted = True
+        return True
+
+    def _tuner_source_id(self) -> int | None:
+        for source_id in self._sources.source_ids:
+            if "tuner" in (self._sources.name(source_id) or "").lower():
+                return source_id
+        return None
+
+    def discover_tuner_presets(self) -> dict[str, dict[str, str]] | None:
+        """Scan the tuner presets once; a failed scan is kept as an empty map.
+
+        Returns None if the scan could not run.
+        """
+        self.tuner_presets_attempted = True
+        presets = self._scan_tuner_presets()
+        if presets is None:
+            _LOGGER.warning("discover_tuner_presets: scan failed, not retrying")
+        self._tuner.set_presets(presets or {band: {} for band in self._tuner.bands})
+        self.tuner_presets_discovered = True
+        return presets
+
+    def _scan_tuner_presets(self) -> dict[str, dict[str, str]] | None:
+        """Step once through each band's presets, one round trip per preset, and restore
+        the band and preset that were playing.
+        """
+        try:
+            start = self._receiver.exec_frames(
+                ["Tuner.Band?"] + [f"Tuner.{band}.Preset?" for band in self._tuner.bands]
+            )
+            if not start or start.get("Tuner.Band") is None:
+                return None
+            presets = {}
+            for band in self._tuner.bands:
+                first = start.get(f"Tuner.{band}.Preset")
+                if first is None:
+                    continue
+                step = [f"Tuner.{band}.Preset+", f"Tuner.{band}.Frequency?"]
+                band_presets = {}
+                for _ in range(MAX_TUNER_PRESETS):
+                    replies = self._receiver.exec_frames(step) or {}
+                    preset = replies.get(f"Tuner.{band}.Preset")
+                    frequency = replies.get(f"Tuner.{band}.Frequency")
+                    if preset is None or frequency is None or preset in band_presets:
+                        break
+                    band_presets[preset] = frequency
+                    if preset == first:
+                        break
+                # Return to the preset that was playing, in preset order
+                self._receiver.exec_frames([f"Tuner.{band}.Preset={first}"])
+                presets[band] = dict(
+                    sorted(band_presets.items(), key=lambda p: _preset_order(p[0]))
+                )
+            self._receiver.exec_frames([f"Tuner.Band={start['Tuner.Band']}"])
+            _LOGGER.debug("discover_tuner_presets: presets=%s", presets)
+            return presets
+        except Exception as e:
+            _LOGGER.error("discover_tuner_presets: error: %s", e)
+
+    def is_tuner_source(self, name: str | None) -> bool:
+        source_id = self._tuner_source_id()
+        if source_id is not None and name == self._sources.name(source_id):
+            return True
+        return name is not None and self._tuner.preset(name) is not None
+
+    def tuner_source_name(self) -> str | None:
+        """Name of the preset playing now, or of the tuner source"""
+        source_id = self._tuner_source_id()
+        preset = self._tuner.current_name()
+        if preset is not None or source_id is None:
+            return preset
+        return self._sources.name(source_id)
+
+    def select_tuner_preset(self, zone: str, name: str) -> None:
+        """Switch a zone to the tuner and tune a preset in one batch"""
+        band, preset = self._tuner.preset(name)
+        frames = [f"Tuner.Band={band}", f"Tuner.{band}.Preset={preset}"]
+        source_id = self._tuner_source_id()
+        if source_id is not None:
+            key = NADReceiver.command_key(self._domain(zone), "source")
+            frames.insert(0, f"{key}={source_id}")
+        _LOGGER.debug("select_tuner_preset: zone='%s' preset='%s'", zone, name)
+        self._receiver.exec_frames(frames)
+        self._tuner.select(name)
+
+    @property
+    def model(self) -> str | None:
+        """Receiver model from the capability dump, without a round trip"""
+        return (self._capabilities or {}).get("main_model")
+
+    @property
+    def pacing(self) -> tuple[float, int]:
+        """Learned rate in frames per second and burst in frames for writes"""
+        return self._pacer.settings
+
+    def set_pacing(self, rate: float, burst: int) -> None:
+        """Use a previously learned rate and burst"""
+        if self.model is not None:
+            remember(self.model, rate, burst)
+        self._pacer = self._receiver.pace(self.model)
+
+    @property
+    def listening_modes(self) -> list[str]:
+        """Listening modes in the order the receiver cycles through them"""
+        return list(self._listening_mode_list)
+
+    def set_listening_modes(self, modes: list[str]) -> None:
+        """Use a previously discovered set of listening modes"""
+        self._listening_mode_list = tuple(modes)
+        self._listening_modes = frozenset(modes)
+        self.listening_modes_discovered = True
+        self.listening_modes_attempted = True
+        self._unknown_modes = set()
+
+    def discover_listening_modes(self) -> list[str] | None:
+        """Cycle once through the receiver's listening modes and restore the current one.
+
+        The main zone must be on; returns None if discovery could not run. It
+        is only attempted once, and not at all for a model without listening modes.
+        """
+        self.listening_modes_attempted = True
+        if not self._has_function("Main.ListeningMode"):
+            _LOGGER.debug("discover_listening_modes: %s has no listening modes", self.model)
+            return None
+        try:
+            start = self._receiver.main_listeningmode("?")
+            if start is None:
+                return None
+            modes = [start]
+            for _ in range(MAX_LISTENING_MODES):
+                mode = self._receiver.main_listeningmode("+")
+                if mode is None or mode == start:
+                    break
+                modes.append(mode)
+            if mode != start:
+                _ = self._receiver.main_listeningmode("=", start)
+            if mode is None:
+                _LOGGER.warning("discover_listening_modes: no reply after '%s'", modes[-1])
+                return None
+            _LOGGER.debug("discover_listening_modes: modes=%s", modes)
+            self.set_listening_modes(modes)
+            return modes
+        except Exception as e:
+            _LOGGER.error("discover_listening_modes: error: %s", e)
+
     def get_listening_mode(self, zone: str) -> str | None:
         try:
-            if zone == ZONE2_NAME:
+            if zone != MAIN_NAME:
                 return None
             mode = self._receiver.main_listeningmode("?")
-            if mode is not None and mode in self._listening_modes:
-                _LOGGER.debug("get_listening_mode: zone='%s' mode='%s'", zone, mode)
-                return mode
-            else:
-                _LOGGER.error(
-                    "get_listening_mode: zone='%s', unknown mode '%s'",
-                    zone,
-                    mode,
-                )
+            _LOGGER.debug("get_listening_mode: zone='%s' mode='%s'", zone, mode)
+            return self._listening_mode(mode)
         except Exception as e:
             _LOGGER.error("get_listening_mode: error: %s", e)
 
+    def _listening_mode(self, mode: str | None) -> str | None:
+        if mode is not None and mode in self._listening_modes:
+            return mode
+        if mode not in self._unknown_modes:
+            # Report each unknown mode once rather than on every poll
+            self._unknown_modes.add(mode)
+            _LOGGER.warning("unknown listening mode '%s'", mode)
+        return None
+
     def set_listening_mode(self, zone: str, mode: str) -> None:
         try:
-            if zone == ZONE2_NAME:
+            if zone != MAIN_NAME:
                 return
             if mode is None or mode not in self._listening_modes:
                 _LOGGER.error("set_listening_mode: zone '%s' unknown mode '%s'", zone, mode)
                 return None
             _LOGGER.debug("set_listening_mode: zone='%s' mode='%s'", zone, mode)
-            _ = self._receiver.zone2_listeningmode("=", mode)
+            _ = self._receiver.main_listeningmode("=", mode)
         except Exception as e:
             _LOGGER.error("set_listening_mode: error: %s", e)
 
     def power(self, zone: str, state: str) -> None:
         try:
             _LOGGER.debug("power: zone=%s, state=%s", zone, state)
-            if zone == ZONE2_NAME:
-                if state == MediaPlayerState.ON:
-                    self._receiver.zone2_power("=", "On")
-                else:
-                    self._receiver.zone2_power("=", "Off")
-            else:
-                if state == MediaPlayerState.ON:
-                    self._receiver.main_power("=", "On")
-                else:
-                    self._receiver.main_power("=", "Off")
+            self._call(zone, "power", "=", "On" if state == MediaPlayerState.ON else "Off")
+            self._zone_power[zone] = state
         except Exception as e:
             _LOGGER.error("power: error: %s", e)
 
     def get_volume_level(self, zone: str) -> float:
         try:
-            if zone == ZONE2_NAME:
-                status = self._receiver.zone2_volume("?")
-            else:
-                status = self._receiver.main_volume("?")
-
+            status = self._call(zone, "volume", "?")
             volume = self.volume_to_ha(zone, float(status))
             _LOGGER.debug("get_volume_level: zone=%s, dB=%s, ha-volume=%.2f", zone, status, volume)
             return volume
@@ -201,10 +654,7 @@ class NADApiClient:
 
     def set_volume_level(self, zone: str, volume: float) -> None:
         try:
-            if zone == ZONE2_NAME:
-                status = self._receiver.zone2_volume("=", self.volume_from_ha(zone, volume))
-            else:
-                status = self._receiver.main_volume("=", self.volume_from_ha(zone, volume))
+            status = self._call(zone, "volume", "=", self.volume_from_ha(zone, volume))
             if "." not in str(status):
                 _LOGGER.error("get_volume_level: unknown volume status '%s'", status)
                 return None
@@ -212,12 +662,32 @@ class NADApiClient:
         except Exception as e:
             _LOGGER.error("set_volume_level: error: %s", e)
 
+    def step_volume(self, zone: str, steps: int) -> float | None:
+        """Send steps relative volume commands in one burst and return the final level"""
+        try:
+            domain = self._domain(zone)
+            operator = "+" if steps > 0 else "-"
+            replies = self._receiver.exec_commands([[domain, "volume", operator]] * abs(steps))
+            # Replies are keyed by command so the value is the reply to the last step
+            status = (replies or {}).get(self._receiver.command_key(domain, "volume"))
+            if status is None:
+                _LOGGER.error("step_volume: zone=%s, no reply to %d steps", zone, steps)
+                return None
+            volume = self.volume_to_ha(zone, float(status))
+            _LOGGER.debug(
+                "step_volume: zone=%s, steps=%d, dB=%s, ha-volume=%.2f",
+                zone,
+                steps,
+                status,
+                volume,
+            )
+            return volume
+        except Exception as e:
+            _LOGGER.error("step_volume: error: %s", e)
+
     def muted(self, zone: str) -> bool:
         try:
-            if zone == ZONE2_NAME:
-                status = self._receiver.zone2_mute("?")
-            else:
-                status = self._receiver.main_mute("?")
+            status = self._call(zone, "mute", "?")
             _LOGGER.debug("is_volume_muted: zone=%s, mute=%s", zone, status)
             if status == "Off":
                 return False
@@ -228,10 +698,7 @@ class NADApiClient:
 
     def mute(self, zone: str, mute: bool) -> bool:
         try:
-            if zone == ZONE2_NAME:
-                status = self._receiver.zone2_mute("=", "On" if mute else "Off")
-            else:
-                status = self._receiver.main_mute("=", "On" if mute else "Off")
+            status = self._call(zone, "mute", "=", "On" if mute else "Off")
             _LOGGER.debug("mute: zone=%s, mute=%s", zone, mute)
         except Exception as e:
             _LOGGER.error("mute: error: %s", e)
@@ -239,14 +706,15 @@ class NADApiClient:
     def volume_range(self, zone: str) -> Tuple[int, int]:
         try:
             capabilities = self.get_capabilities()
-            if zone == ZONE2_NAME:
-                min_vol = self._capabilities.get("zone2_volume_min", DEFAULT_MIN_VOLUME)
-                max_vol = self._capabilities.get("zone2_volume_max", DEFAULT_MAX_VOLUME)
-            else:
-                min_vol = self._capabilities.get("main_volume_min", DEFAULT_MIN_VOLUME)
-                max_vol = self._capabilities.get("main_volume_max", DEFAULT_MAX_VOLUME)
+            prefix = self._domain(zone)
+            min_vol = self._capabilities.get(f"{prefix}_volume_min", DEFAULT_MIN_VOLUME)
+            max_vol = self._capabilities.get(f"{prefix}_volume_max", DEFAULT_MAX_VOLUME)
             _LOGGER.debug("volume_range: zone=%s, min=%s, max=%s", zone, min_vol, max_vol)
             return (float(min_vol), float(max_vol))
         except Exception as e:
             _LOGGER.error("Error fetching capabilities: %s", e)
             raise UpdateFailed() from e
+
+
+def _preset_order(preset: str) -> tuple[int, str]:
+    return (int(preset), preset) if preset.isdigit() else (MAX_TUNER_PRESETS, preset)
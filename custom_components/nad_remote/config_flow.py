@@ -1,23 +1,60 @@
 """Adds config flow for NAD Amplifer remote control."""
+import asyncio
 import logging
 import re
-import socket
+from functools import partial
+from time import monotonic
 
+import async_timeout
 import voluptuous as vol
 from typing import Any
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
-from homeassistant.core import callback
+from homeassistant.const import CONF_DEVICE, CONF_HOST, CONF_NAME, CONF_PORT, CONF_TYPE
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.helpers.typing import DiscoveryInfoType
 
 from .api import NADApiClient
-from .const import DOMAIN
+from .scanner import ScanRangeTooLarge, async_scan, scan_range
+from .const import (
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_SCAN_NETWORK,
+    DEFAULT_MAX_CONCURRENT_POLLS,
+    DEFAULT_TELNET_PORT,
+    DOMAIN,
+    MAX_CONCURRENT_POLLS_LIMIT,
+    RESOLVE_CACHE_TTL,
+    RESOLVE_TIMEOUT,
+    TYPE_SERIAL,
+)
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+# Hostname to (expiry, resolvable) for recently announced receivers; each
+# announcement starts a new flow, so the cache outlives them and expired
+# entries are evicted on every lookup
+_resolved: dict[str, tuple[float, bool]] = {}
+
+
+async def async_resolves(hass: HomeAssistant, hostname: str) -> bool:
+    """Return true if hostname resolves, without blocking and with a short-lived cache"""
+    now = monotonic()
+    for expired in [name for name, (expiry, _) in _resolved.items() if expiry <= now]:
+        del _resolved[expired]
+    cached = _resolved.get(hostname)
+    if cached is not None:
+        return cached[1]
+    try:
+        async with async_timeout.timeout(RESOLVE_TIMEOUT):
+            await hass.loop.getaddrinfo(hostname, None)
+        resolvable = True
+    except (OSError, asyncio.TimeoutError):
+        resolvable = False
+    _resolved[hostname] = (now + RESOLVE_CACHE_TTL, resolvable)
+    return resolvable
+
 
 class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for nad_remote."""
@@ -29,8 +66,20 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._host = None
         self._port = None
+        self._device = None
+        self._name = None
+        self._network = None
+        # Receivers found by a subnet scan, model by 'host:port'
+        self._found = {}
         self._errors = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        return NADOptionsFlowHandler(config_entry)
+
     @callback
     def _async_get_entry(self):
         return self.async_create_entry(
@@ -53,15 +102,28 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
-    def _discovered_hostname(self, discovery_info: DiscoveryInfoType) -> str:
+    async def _async_discovered_hostname(self, discovery_info: DiscoveryInfoType) -> str:
         """Return the hostname or IP address of the discovered device"""
         hostname = discovery_info.hostname[:-1]
-        try:
-            socket.gethostbyname(hostname)
+        if await async_resolves(self.hass, hostname):
             return hostname
-        except socket.gaierror:
-            # Fallback on IP address
-            return discovery_info.addresses[0]
+        # Fallback on IP address
+        return discovery_info.addresses[0]
+
+    def _configured_as_announced(self, discovery_info: DiscoveryInfoType) -> bool:
+        """Return true if the entry for this unique id already matches the announcement"""
+        for entry in self._async_current_entries(include_ignore=True):
+            if entry.unique_id != self._unique_id:
+                continue
+            if entry.source == config_entries.SOURCE_IGNORE:
+                return True
+            hosts = (discovery_info.hostname[:-1], *discovery_info.addresses)
+            return (
+                entry.data.get(CONF_HOST) in hosts
+                and entry.data.get(CONF_PORT) == self._port
+                and entry.data.get(CONF_NAME) == self._name
+            )
+        return False
 
     def _discovered_service_name(self, discovery_info: DiscoveryInfoType) -> str:
         """Return the name of the discovered device"""
@@ -85,11 +147,36 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
-    async def _async_check_connection(self, host: str, port: int) -> bool:
-        """Return true if host is a NAD amplifier"""
+    def _user_schema(self):
+        """Telnet settings, or a serial port for receivers connected over RS-232"""
+        return vol.Schema(
+            {
+                vol.Optional(
+                    CONF_NAME, description="Name of the NAD receiver", default=self._name
+                ): str,
+                vol.Optional(CONF_HOST, description={"suggested_value": self._host}): str,
+                vol.Optional(
+                    CONF_PORT,
+                    description="Port number for the NAD received",
+                    default=self._port or DEFAULT_TELNET_PORT,
+                ): int,
+                vol.Optional(CONF_DEVICE, description={"suggested_value": self._device}): str,
+                vol.Optional(
+                    CONF_SCAN_NETWORK, description={"suggested_value": self._network}
+                ): str,
+            }
+        )
+
+    async def _async_check_connection(
+        self, host: str, port: int, serial_port: str | None = None
+    ) -> bool:
+        """Return true if host or serial port is a NAD amplifier"""
         try:
-            api = NADApiClient(host, port)
-            model = api.get_model()
+            api = await self.hass.async_add_executor_job(
+                partial(NADApiClient, host, port, serial_port=serial_port)
+            )
+            model = await self.hass.async_add_executor_job(api.get_model)
+            await self.hass.async_add_executor_job(api.close)
             if model is not None:
                 return True
             else:
@@ -101,25 +188,81 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Handle a flow initialized by the user."""
         errors = {}
-        if user_input is not None:
+        if user_input is not None and user_input.get(CONF_DEVICE):
+            # A serial port takes precedence over any telnet settings
+            self._device = user_input[CONF_DEVICE]
+            self._name = user_input[CONF_NAME]
+            valid = await self._async_check_connection(None, None, serial_port=self._device)
+            if valid:
+                _LOGGER.debug("created media player '%s' for %s", self._name, self._device)
+                return self.async_create_entry(
+                    title=self._device,
+                    data={CONF_NAME: self._name, CONF_TYPE: TYPE_SERIAL, CONF_DEVICE: self._device},
+                )
+            else:
+                errors["base"] = "cannot_connect"
+        elif user_input is not None and user_input.get(CONF_SCAN_NETWORK):
+            # No host was given, so look for receivers in the network range
+            self._network = user_input.pop(CONF_SCAN_NETWORK)
+            self._port = user_input.get(CONF_PORT) or DEFAULT_TELNET_PORT
+            self._name = user_input.get(CONF_NAME)
+            if user_input.get(CONF_HOST):
+                return await self.async_step_user(user_input)
+            try:
+                scan_range(self._network)
+                self._found = {
+                    f"{host}:{port}": model
+                    async for host, port, model in async_scan(self._network, ports=(self._port,))
+                }
+            except ScanRangeTooLarge:
+                errors["base"] = "network_too_large"
+            except ValueError:
+                errors["base"] = "invalid_network"
+            else:
+                if self._found:
+                    return await self.async_step_scan()
+                errors["base"] = "no_receivers_found"
+        elif user_input is not None:
             # Validate user input
-            self._host = user_input[CONF_HOST]
-            self._port = user_input[CONF_PORT]
+            self._host = user_input.get(CONF_HOST)
+            self._port = user_input.get(CONF_PORT)
             self._name = user_input[CONF_NAME]
-            valid = await self._async_check_connection(self._host, self._port)
+            valid = self._host and await self._async_check_connection(self._host, self._port)
             if valid:
                 _LOGGER.debug(
                     "created media player '%s' for %s:%d", self._name, self._host, self._port
                 )
                 return self.async_create_entry(title=user_input[CONF_HOST], data=user_input)
             else:
-                _LOGGER
                 errors["base"] = "cannot_connect"
 
         return self.async_show_form(
             step_id="user",
-            data_schema=self._config_schema(),
-            errors={},
+            data_schema=self._user_schema(),
+            errors=errors,
+        )
+
+    async def async_step_scan(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Choose one of the receivers found by a subnet scan."""
+        if user_input is not None:
+            address = user_input[CONF_HOST]
+            host, port = address.rsplit(":", 1)
+            name = user_input.get(CONF_NAME) or f"NAD {self._found[address]}"
+            _LOGGER.debug("created media player '%s' for scanned %s", name, address)
+            return self.async_create_entry(
+                title=host, data={CONF_NAME: name, CONF_HOST: host, CONF_PORT: int(port)}
+            )
+
+        return self.async_show_form(
+            step_id="scan",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST): vol.In(
+                        {address: f"{model} ({address})" for address, model in self._found.items()}
+                    ),
+                    vol.Optional(CONF_NAME, description={"suggested_value": self._name}): str,
+                }
+            ),
         )
 
     async def async_step_zeroconf(self, discovery_info: DiscoveryInfoType) -> FlowResult:
@@ -127,13 +270,19 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if discovery_info is None:
             return self.async_abort(reason="cannot_connect")
 
-        self._host = self._discovered_hostname(discovery_info)
         self._name = self._discovered_service_name(discovery_info)
         # Remove hex id, for example 'NAD T758 (98FDE018)'
         self._name = re.sub(r"\s+\(\w+\)", "", self._name)
         self._port = discovery_info.port
         self._unique_id = format_mac(discovery_info.addresses[-1])
 
+        # Receivers re-announce themselves often; one that is configured as
+        # announced is dismissed before any name resolution
+        await self.async_set_unique_id(self._unique_id)
+        if self._configured_as_announced(discovery_info):
+            return self.async_abort(reason="already_configured")
+        self._host = await self._async_discovered_hostname(discovery_info)
+
         # # Abort if this device has already been configured
         # self._async_abort_entries_match({CONF_HOST: self._host, CONF_NAME: self._name})
 
@@ -172,3 +321,39 @@ class NADFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=self._config_schema(),
             errors=errors,
         )
+
+
+class NADOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for nad_remote.
+
+    Every receiver is polled by one shared engine, so its concurrency limit is
+    the same for all of them; saving it from any entry copies it to the others.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        if user_input is not None:
+            for entry in self.hass.config_entries.async_entries(DOMAIN):
+                if entry.entry_id != self.config_entry.entry_id:
+                    self.hass.config_entries.async_update_entry(
+                        entry, options={**entry.options, **user_input}
+                    )
+            return self.async_create_entry(
+                title="", data={**self.config_entry.options, **user_input}
+            )
+
+        limit = self.config_entry.options.get(
+            CONF_MAX_CONCURRENT_POLLS, DEFAULT_MAX_CONCURRENT_POLLS
+        )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_MAX_CONCURRENT_POLLS, default=limit): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=MAX_CONCURRENT_POLLS_LIMIT)
+                    ),
+                }
+            ),
+        )
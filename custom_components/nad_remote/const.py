@@ -6,13 +6,106 @@ DOMAIN = "nad_remote"
 
 SCAN_INTERVAL = timedelta(seconds=30)
 
+# Connection types; entries created before serial support have no type and are telnet
+TYPE_TELNET = "telnet"
+TYPE_SERIAL = "serial"
+DEFAULT_TELNET_PORT = 23
+
+# Zeroconf hostnames are resolved within RESOLVE_TIMEOUT seconds and the
+# answer kept for RESOLVE_CACHE_TTL seconds across repeated announcements
+RESOLVE_TIMEOUT = 2.0
+RESOLVE_CACHE_TTL = 300.0
+
+# Subnet scan for receivers without zeroconf: the range to scan, the most
+# probes open at once and the seconds allowed for each connect and reply
+CONF_SCAN_NETWORK = "scan_network"
+SCAN_CONCURRENCY = 64
+SCAN_TIMEOUT = 0.5
+# Largest range scanned, a /22; the flow waits for the whole scan, which takes
+# up to SCAN_MAX_ADDRESSES * SCAN_TIMEOUT / SCAN_CONCURRENCY seconds per port
+SCAN_MAX_ADDRESSES = 1024
+
+# Shared polling engine: number of receivers refreshed in parallel and
+# the time allowed for any single receiver's refresh. The limit is an option
+# that applies to every receiver, as all are polled by the one engine
+CONF_MAX_CONCURRENT_POLLS = "max_concurrent_polls"
+DEFAULT_MAX_CONCURRENT_POLLS = 4
+MAX_CONCURRENT_POLLS_LIMIT = 16
+DEFAULT_POLL_DEADLINE = 15.0
+DATA_POLLER = f"{DOMAIN}_poller"
+
 DEFAULT_MIN_VOLUME = -92
 DEFAULT_MAX_VOLUME = -20
-VOLUME_INCREMENT = 0.05
 
 ZONE2_NAME = "Zone2"
 MAIN_NAME = "Main"
 
+# Per-zone state fields and the receiver function that holds each
+ZONE_FIELDS = {
+    "power_state": "power",
+    "source": "source",
+    "volume_level": "volume",
+    "is_volume_muted": "mute",
+    "sound_mode": "listeningmode",
+}
+# State fields each kind of write can change and so must be read back;
+# power changes everything in a zone
+WRITE_FIELDS = {
+    "power": tuple(ZONE_FIELDS),
+    "source": ("source",),
+    "volume": ("volume_level",),
+    "mute": ("is_volume_muted",),
+    "sound_mode": ("sound_mode",),
+}
+# Writes within this many seconds share one read back
+PARTIAL_REFRESH_COOLDOWN = 0.2
+# Zone states queued by apply_state within this many seconds share one burst
+APPLY_STATE_COOLDOWN = 0.05
+
+# Secondary receiver properties by command key, each polled in the one batch
+# and exposed only when the receiver's capability dump includes it
+SENSOR_PROPERTIES = {
+    "Main.Audio.CODEC": "Audio codec",
+    "Main.Sleep": "Sleep timer",
+    "Tuner.FM.Frequency": "FM frequency",
+    "Tuner.AM.Frequency": "AM frequency",
+}
+SWITCH_PROPERTIES = {
+    "Main.SpeakerA": "Speaker A",
+    "Main.SpeakerB": "Speaker B",
+    "Main.Tape1": "Tape monitor",
+    "Main.Video.ARC": "HDMI ARC",
+    "Tuner.FM.Mute": "FM mute",
+}
+# Select properties with the options offered; a value outside them is added
+SELECT_PROPERTIES = {
+    "Main.Dimmer": ("Display dimmer", ["0", "1", "2", "3"]),
+    "Tuner.Band": ("Tuner band", ["FM", "AM"]),
+}
+PROPERTIES = [*SENSOR_PROPERTIES, *SWITCH_PROPERTIES, *SELECT_PROPERTIES]
+# Properties the receiver pushes when they change, so they are never polled
+PUSHED_PROPERTIES = ["Tuner.FM.Frequency", "Tuner.AM.Frequency"]
+
+# Storage for values discovered from the receiver
+STORAGE_VERSION = 1
+STORAGE_LISTENING_MODES = "listening_modes"
+STORAGE_TUNER_PRESETS = "tuner_presets"
+# Saved without a model, the dump names its own and is revalidated on connect
+STORAGE_CAPABILITIES = "capabilities"
+STORAGE_PACING = "pacing"
+# Learned pacing is saved again once its rate moves by this share or its burst changes
+PACING_SAVE_CHANGE = 0.1
+
+# Upper bound on modes when cycling through them during discovery
+MAX_LISTENING_MODES = 32
+# Upper bound on presets per band when scanning them
+MAX_TUNER_PRESETS = 40
+
+# Services
+SERVICE_APPLY_STATE = "apply_state"
+SERVICE_RESCAN_TUNER_PRESETS = "rescan_tuner_presets"
+
+# Fallback until the receiver's own listening modes have been discovered
 LISTENING_MODES = [
     "None",
     "AnalogBypass",
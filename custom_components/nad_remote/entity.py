@@ -4,11 +4,16 @@ import logging
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import CONF_NAME
 
-from .const import DOMAIN, NAME
+from .const import DOMAIN, MAIN_NAME, NAME
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
+def zone_unique_id(config_entry, zone: str) -> str:
+    """Unique ID of a zone's media player, which also identifies the zone's device"""
+    return f"{config_entry.data.get(CONF_NAME)} ({zone})"
+
+
 class NADEntity(CoordinatorEntity):
     def __init__(self, coordinator, config_entry):
         super().__init__(coordinator)
@@ -27,3 +32,42 @@ class NADEntity(CoordinatorEntity):
             "model": self.model,
             "manufacturer": NAME,
         }
+
+
+class NADPropertyEntity(NADEntity):
+    """Entity for one secondary receiver property, read from the coordinator's cache"""
+
+    zone = MAIN_NAME
+
+    def __init__(self, coordinator, config_entry, key: str, name: str):
+        super().__init__(coordinator, config_entry)
+        self.key = key
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} {name}"
+
+    @property
+    def unique_id(self):
+        return f"{self.config_entry.entry_id}_{self.key}"
+
+    @property
+    def model(self):
+        return self.coordinator.api.model
+
+    @property
+    def device_info(self):
+        # Properties belong to the receiver's main zone device
+        return {
+            "identifiers": {(DOMAIN, zone_unique_id(self.config_entry, MAIN_NAME))},
+            "name": f"{self.config_entry.title} ({MAIN_NAME})",
+            "model": self.model,
+            "manufacturer": NAME,
+        }
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.value is not None
+
+    @property
+    def value(self) -> str | None:
+        if self.coordinator.data is None:
+            return None
+        return self.coordinator.data.properties.get(self.key)
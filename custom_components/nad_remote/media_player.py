@@ -1,6 +1,9 @@
 """Media Player Platform for NAD Remote"""
 import logging
 from datetime import timedelta
+from typing import Any
+
+import voluptuous as vol
 
 from homeassistant.components.media_player import (
     MediaPlayerDeviceClass,
@@ -12,14 +15,30 @@ from homeassistant.core import callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, STATE_OFF, STATE_ON, STATE_UNKNOWN
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, MAIN_NAME, VOLUME_INCREMENT, ZONE2_NAME
-from .entity import NADEntity
+from .const import (
+    DOMAIN,
+    MAIN_NAME,
+    SERVICE_APPLY_STATE,
+    SERVICE_RESCAN_TUNER_PRESETS,
+    WRITE_FIELDS,
+)
+from .entity import NADEntity, zone_unique_id
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+# Settings of a zone that apply_state writes together
+APPLY_STATE_SCHEMA = {
+    vol.Optional("power"): cv.boolean,
+    vol.Optional("source"): cv.string,
+    vol.Optional("volume_level"): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+    vol.Optional("is_volume_muted"): cv.boolean,
+    vol.Optional("sound_mode"): cv.string,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -28,16 +47,20 @@ async def async_setup_entry(
 ) -> None:
     """Setup Media Player platform."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    await coordinator.async_config_entry_first_refresh()
 
-    if coordinator.api.has_zone2:
-        zones = [MAIN_NAME, ZONE2_NAME]
-    else:
-        zones = [MAIN_NAME]
+    zones = coordinator.api.zones
     _LOGGER.debug("NAD media player zones: %s", ", ".join(zones))
     entities = [NADPlayer(zone, coordinator, config_entry) for zone in zones]
     async_add_entities(entities)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_APPLY_STATE, APPLY_STATE_SCHEMA, "async_apply_state"
+    )
+    platform.async_register_entity_service(
+        SERVICE_RESCAN_TUNER_PRESETS, {}, "async_rescan_tuner_presets"
+    )
+
 
 class NADPlayer(NADEntity, MediaPlayerEntity):
     """NAD Receiver Entity"""
@@ -50,6 +73,9 @@ class NADPlayer(NADEntity, MediaPlayerEntity):
         self.coordinator = coordinator
         self.config_entry = config_entry
         self.zone = zone
+        # Volume steps not yet sent to the receiver and the task sending them
+        self._volume_steps = 0
+        self._volume_step_task = None
         super().__init__(coordinator, config_entry)
 
     @property
@@ -69,7 +95,7 @@ class NADPlayer(NADEntity, MediaPlayerEntity):
     @property
     def unique_id(self):
         """Return a unique ID to use for this entity."""
-        return self.config_entry.data.get("name") + " (" + self.zone + ")"
+        return zone_unique_id(self.config_entry, self.zone)
 
     @property
     def name(self):
@@ -77,71 +103,118 @@ class NADPlayer(NADEntity, MediaPlayerEntity):
 
     @property
     def model(self):
-        return self.coordinator.api.get_model()
+        return self.coordinator.api.model
+
+    async def async_added_to_hass(self) -> None:
+        """Start from the setup poll rather than waiting for the next one"""
+        await super().async_added_to_hass()
+        if self.coordinator.data is not None:
+            self._update_from_data()
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        self._update_from_data()
+        self.async_write_ha_state()
+
+    def _update_from_data(self) -> None:
         try:
             power_state = self.coordinator.data.power_state[self.zone]
+            self._attr_state = power_state
             if power_state == MediaPlayerState.ON:
-                self._attr_state = power_state
                 self._attr_source = self.coordinator.data.source[self.zone]
                 self._attr_source_list = self.coordinator.data.source_list
                 self._attr_volume_level = self.coordinator.data.volume_level[self.zone]
                 self._attr_is_volume_muted = self.coordinator.data.is_volume_muted[self.zone]
                 if self.zone == MAIN_NAME:
                     self._attr_sound_mode = self.coordinator.data.sound_mode
+                    self._attr_sound_mode_list = self.coordinator.api.listening_modes
                 else:
                     self._attr_sound_mode = None
-            self.async_write_ha_state()
         except Exception as e:
             _LOGGER.warning("data update failed: zone='%s': %s", self.zone, e)
 
     async def async_select_source(self, source: str) -> None:
         """Select a source in the receiver"""
-        self.coordinator.api.set_source(self.zone, source)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(self.coordinator.api.set_source, self.zone, source)
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["source"])
 
     async def async_turn_off(self) -> None:
         """Turn the receiver zone off."""
-        self.coordinator.api.power(self.zone, STATE_OFF)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(self.coordinator.api.power, self.zone, STATE_OFF)
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["power"])
 
     async def async_turn_on(self) -> None:
         """Turn the receiver zone on."""
-        self.coordinator.api.power(self.zone, STATE_ON)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(self.coordinator.api.power, self.zone, STATE_ON)
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["power"])
 
     async def async_toggle(self) -> None:
         """Toggle the power on the receiver"""
-        state = self.coordinator.api.get_power_state(self.zone)
+        state = await self.hass.async_add_executor_job(
+            self.coordinator.api.get_power_state, self.zone
+        )
         if state == STATE_OFF:
             await self.async_turn_on()
         else:
             await self.async_turn_off()
 
     async def async_set_volume_level(self, volume: float) -> None:
-        self.coordinator.api.set_volume_level(self.zone, volume)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(
+            self.coordinator.api.set_volume_level, self.zone, volume
+        )
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["volume"])
 
     async def async_mute_volume(self, mute: bool) -> None:
         """Toggle the mute setting"""
-        self.coordinator.api.mute(self.zone, not self.is_volume_muted)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(
+            self.coordinator.api.mute, self.zone, not self.is_volume_muted
+        )
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["mute"])
 
     async def async_volume_up(self) -> None:
         """Volume up the media player."""
-        volume_level = min(0.0, self.volume_level - VOLUME_INCREMENT)
-        await self.set_volume_level(volume_level)
-        await self.coordinator.async_request_refresh()
+        await self._async_step_volume(1)
 
     async def async_volume_down(self) -> None:
         """Volume down the media player."""
-        volume_level = (self.volume_level + VOLUME_INCREMENT) % 1.0
-        await self.set_volume_level(volume_level)
-        await self.coordinator.async_request_refresh()
+        await self._async_step_volume(-1)
+
+    async def _async_step_volume(self, step: int) -> None:
+        """Queue a relative volume step, batching presses that arrive during a burst"""
+        self._volume_steps += step
+        if self._volume_step_task is None:
+            self._volume_step_task = self.hass.async_create_task(self._async_send_volume_steps())
+        await self._volume_step_task
+
+    async def _async_send_volume_steps(self) -> None:
+        try:
+            while self._volume_steps != 0:
+                steps = self._volume_steps
+                self._volume_steps = 0
+                volume_level = await self.hass.async_add_executor_job(
+                    self.coordinator.api.step_volume, self.zone, steps
+                )
+                if volume_level is not None:
+                    # The last reply carries the final level so no refresh is needed
+                    self.coordinator.data.volume_level[self.zone] = volume_level
+                    self._attr_volume_level = volume_level
+                    self.async_write_ha_state()
+        finally:
+            self._volume_step_task = None
+
+    async def async_apply_state(self, **fields: Any) -> None:
+        """Write several settings of this zone at once, with other zones in the same call"""
+        if "power" in fields:
+            fields["power_state"] = STATE_ON if fields.pop("power") else STATE_OFF
+        await self.coordinator.async_apply_zone_state(self.zone, fields)
+
+    async def async_rescan_tuner_presets(self) -> None:
+        """Scan the receiver's tuner presets again"""
+        await self.coordinator.async_rescan_tuner_presets()
 
     async def async_select_sound_mode(self, sound_mode: str) -> None:
-        await self.coordinator.api.set_listening_mode(self.zone, sound_mode)
-        await self.coordinator.async_request_refresh()
+        await self.hass.async_add_executor_job(
+            self.coordinator.api.set_listening_mode, self.zone, sound_mode
+        )
+        await self.coordinator.async_request_fields(self.zone, WRITE_FIELDS["sound_mode"])
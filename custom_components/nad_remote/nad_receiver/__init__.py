@@ -5,69 +5,253 @@ Not all receivers have all functions.
 Functions can be found on the NAD website: http://nadelectronics.com/software
 """
 
-import codecs
-import socket
-from time import sleep
-from typing import Any, Dict, Iterable, Optional, Union, List
-from .nad_commands import CMDS
-from .nad_transport import (
-    NadTransport,
-    SerialPortTransport,
-    TelnetTransportWrapper,
-    DEFAULT_TIMEOUT,
-)
+from collections import Counter
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union, List
+from .nad_commands import domain_commands
+from .nad_pacing import TokenBucket
+from .nad_rtt import POWER_ON_FLOOR
+from .nad_trace import COMMAND, PARSED, Traceable, TraceSubscriber
+from .nad_transport import NadTransport, DEFAULT_TIMEOUT, frame_key, split_frame
 
 import logging
 
 
-logging.basicConfig()
 _LOGGER = logging.getLogger("nad_receiver")
 # Uncomment this line to see all communication with the device:
 # _LOGGER.setLevel(logging.DEBUG)
 
+# Attempts for a batch: the first send and selective retries of missing
+# replies, which start only within BATCH_DEADLINE seconds of the first send. A
+# step with a lost reply needs two retries, one to read it back and one to resend it
+BATCH_ATTEMPTS = 3
+BATCH_DEADLINE = 3.0
 
-class NADReceiver:
+# How far a relative step moves a numeric value, e.g. 1 dB of volume
+STEP_SIZE = 1.0
+
+# Order in which apply_state writes a domain's functions
+WRITE_ORDER = ["power", "source", "listeningmode", "volume", "mute"]
+
+# Time allowed for a domain to become ready after power on, and the first
+# interval between readiness probes, which doubles after each probe
+POWER_ON_READY_TIMEOUT = 10.0
+READY_PROBE_INTERVAL = 0.05
+# Power states a domain boots from when it is turned on
+POWERED_OFF = ("Off", "Standby")
+
+
+def _operator(cmd: str) -> str:
+    return cmd[len(frame_key(cmd)) :][:1]
+
+
+def _writes_power(cmd: str) -> bool:
+    return _operator(cmd) != "?" and frame_key(cmd).lower().endswith(".power")
+
+
+def _write_order(function: str) -> int:
+    return WRITE_ORDER.index(function) if function in WRITE_ORDER else len(WRITE_ORDER)
+
+
+def _lost_steps(step: str, sent: int, before: Optional[str], after: str) -> int:
+    """How many of sent steps did not take effect, from the value before and after them.
+
+    A numeric value moves STEP_SIZE per step; any other value only shows whether
+    it changed at all, so all steps are lost if it did not.
+    """
+    if before is None:
+        return 0
+    try:
+        moved = (float(after) - float(before)) / STEP_SIZE
+    except ValueError:
+        return sent if after == before else 0
+    if _operator(step) == "-":
+        moved = -moved
+    return min(max(sent - round(moved), 0), sent)
+
+
+class NADReceiver(Traceable):
     """NAD receiver."""
 
     transport: NadTransport
+    _listeners: List[Callable[[str, Optional[str]], None]]
+    # Last known power state and domains still booting, keyed by lower case
+    # frame prefix such as 'main'; booting maps to (prefix, deadline)
+    _power: Dict[str, str]
+    _booting: Dict[str, Tuple[str, float]]
+    # Last value seen for each lower case key
+    _values: Dict[str, str]
+    # Time a domain is held for after power on
+    ready_timeout = POWER_ON_READY_TIMEOUT
+
+    def _init_state(self) -> None:
+        self._listeners = []
+        self._values = {}
+        self._power = {}
+        self._booting = {}
 
     def __init__(self, serial_port: str) -> None:
         """Create RS232 connection."""
+        from .nad_transport import SerialPortTransport
+
         self.transport = SerialPortTransport(serial_port)
+        self._init_state()
 
-    def exec_command(
+    def _command(
         self, domain: str, function: str, operator: str, value: Optional[str] = None
-    ) -> Optional[str]:
-        """
-        Write a command to the receiver and read the value it returns.
-
-        The receiver will always return a value, also when setting a value.
-        """
-        if operator in CMDS[domain][function]["supported_operators"]:
+    ) -> str:
+        """Build the protocol frame for a command, checking the operator is supported."""
+        command = domain_commands(domain)[function]
+        if operator in command["supported_operators"]:
             if operator == "=" and value is None:
                 raise ValueError("No value provided")
 
-            cmd = "".join([CMDS[domain][function]["cmd"], operator])  # type: ignore
+            cmd = "".join([command["cmd"], operator])  # type: ignore
             assert isinstance(cmd, str)
             if value:
                 cmd = cmd + value
         else:
             raise ValueError("Invalid operator provided %s" % operator)
+        return cmd
 
-        try:
-            msg = self.transport.communicate(cmd)
-            _LOGGER.debug(f"sent: '{cmd}' reply: '{msg}'")
-            return msg.split("=")[1]
-        except IndexError:
-            pass
-        return None
+    @staticmethod
+    def command_key(domain: str, function: str) -> str:
+        """Return the 'Domain.Function' key that replies to a command carry."""
+        return domain_commands(domain)[function]["cmd"]
+
+    def add_listener(self, callback: Callable[[str, Optional[str]], None]) -> Callable[[], None]:
+        """
+        Register a callback for frames that are not replies to a command, such as
+        notifications the receiver pushes when its front panel is used.
 
-    def exec_commands(self, commands: List) -> Optional[List[str]]:
+        Returns a function that removes the listener.
+        """
+        self._listeners.append(callback)
+        return lambda: self._listeners.remove(callback)
+
+    def add_trace_subscriber(self, subscriber: TraceSubscriber) -> Callable[[], None]:
+        """
+        Subscribe to trace events from the receiver and its transport: commands
+        issued, frames written and received, and replies parsed.
+
+        Returns a function that unsubscribes.
+        """
+        removers = [super().add_trace_subscriber(subscriber)]
+        if isinstance(self.transport, Traceable):
+            removers.append(self.transport.add_trace_subscriber(subscriber))
+
+        def remove() -> None:
+            for remover in removers:
+                remover()
+
+        return remove
+
+    def _notify(self, frame: str) -> None:
+        key, value = split_frame(frame)
+        _LOGGER.debug("unsolicited: '%s'", frame)
+        self._observe(key, value, write=False)
+        for callback in list(self._listeners):
+            callback(key, value)
+
+    def _observe(self, key: str, value: Optional[str], write: bool) -> None:
+        """Note a value the receiver reported."""
+        if value is not None:
+            self._values[key.lower()] = value
+        self._observe_power(key, value, write)
+
+    def _observe_power(self, key: str, value: Optional[str], write: bool) -> None:
+        """Track power state, noting a domain as booting when a write turns it on.
+
+        Only a domain known to have been off boots; one whose state was unknown
+        may already have been on and is not held.
+        """
+        prefix, _, function = key.partition(".")
+        if function.lower() != "power" or value is None:
+            return
+        previous = self._power.get(prefix.lower())
+        self._power[prefix.lower()] = value
+        if write and value == "On" and previous in POWERED_OFF:
+            _LOGGER.debug("%s booting", prefix)
+            self._booting[prefix.lower()] = (prefix, monotonic() + self.ready_timeout)
+
+    def _hold(self, cmds: List[str]) -> None:
+        """Hold commands for a domain that is powering on until it is ready."""
+        if not self._booting:
+            return
+        held: Dict[str, List[str]] = {}
+        for cmd in cmds:
+            key = frame_key(cmd)
+            prefix = key.split(".")[0].lower()
+            if prefix in self._booting and key not in held.setdefault(prefix, []):
+                held[prefix].append(key)
+        for prefix, keys in held.items():
+            if keys:
+                self._wait_until_ready(prefix, keys)
+
+    def _wait_until_ready(self, prefix: str, keys: List[str]) -> bool:
+        """
+        Wait for a booting domain to answer a query for each held function;
+        probes are spaced exponentially up to the boot deadline.
+        """
+        name, deadline = self._booting[prefix]
+        waiting = {key.lower(): key for key in keys}
+        interval = READY_PROBE_INTERVAL
+        while True:
+            msgs = self.transport.communicate_multiline([f"{key}?" for key in waiting.values()])
+            for msg in msgs or []:
+                if not msg:
+                    continue
+                key, value = split_frame(msg)
+                if key.lower() in waiting and value is not None:
+                    del waiting[key.lower()]
+                    self._observe(key, value, write=False)
+                else:
+                    # Other frames, even from this domain, do not show the held
+                    # functions are ready
+                    self._notify(msg)
+            if not waiting:
+                self._booting.pop(prefix, None)
+                _LOGGER.debug("%s ready after probe", name)
+                return True
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                _LOGGER.debug("%s not ready by deadline", name)
+                self._booting.pop(prefix, None)
+                return False
+            sleep(min(interval, remaining))
+            interval *= 2
+
+    def pace(self, model: Optional[str]) -> TokenBucket:
+        """Pace writes to the receiver, starting from what was learned for model"""
+        pacer = TokenBucket.for_model(model)
+        self.transport.pacer = pacer
+        return pacer
+
+    def exec_command(
+        self, domain: str, function: str, operator: str, value: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Write a command to the receiver and read the value it returns.
+
+        The receiver will always return a value, also when setting a value.
+        A missing reply is retried as exec_frames retries one.
+        """
+        cmd = self._command(domain, function, operator, value)
+        replies = self._exchange([cmd], self._communicate_one)
+        return replies.get(frame_key(cmd)) if replies else None
+
+    def _communicate_one(self, cmds: List[str]) -> List[str]:
+        msg = self.transport.communicate(cmds[0])
+        return [msg] if msg else []
+
+    def exec_commands(self, commands: List) -> Optional[Dict[str, Optional[str]]]:
         """
         Write a series of commands to the receiver and read the values
         it returns.
 
         The receiver will always return a value, also when setting a value.
+        Returns a dictionary of replies keyed by 'Domain.Function', for example
+        'Main.Volume'. Repeated commands for the same key return the last reply.
         """
         cmds = []
         for command in commands:
@@ -75,28 +259,172 @@ class NADReceiver:
             function = command[1]
             operator = command[2]
             value = command[3] if len(command) > 3 else None
-            if operator in CMDS[domain][function]["supported_operators"]:
-                if operator == "=" and value is None:
-                    raise ValueError("No value provided")
-
-                cmd = "".join([CMDS[domain][function]["cmd"], operator])  # type: ignore
-                assert isinstance(cmd, str)
-                if value:
-                    cmd = cmd + value
+            cmds.append(self._command(domain, function, operator, value))
+
+        return self.exec_frames(cmds)
+
+    def exec_frames(self, cmds: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Send pre-built command frames as one pipelined batch and correlate the
+        replies by their 'Domain.Function' key rather than by position.
+
+        Frames that do not answer a command in the batch are passed to the
+        listeners. Commands whose reply is missing are retried while attempts
+        and the batch's BATCH_DEADLINE last. '?' and '=' commands are simply
+        resent. Relative '+'/'-' commands are counted per occurrence: a key
+        with fewer replies than steps sent is read back with '?', and only the
+        steps the value read shows did not take effect are resent, so a step
+        that did take effect is never applied twice.
+        Replies that only a retry got mean the batch was sent too fast for
+        the receiver, which slows the transport's pacer.
+        """
+        return self._exchange(cmds, self.transport.communicate_multiline)
+
+    def _exchange(
+        self, cmds: List[str], send: Callable[[List[str]], List[str]]
+    ) -> Optional[Dict[str, Optional[str]]]:
+        keys = {frame_key(cmd).lower(): frame_key(cmd) for cmd in cmds}
+        writes = {frame_key(cmd).lower() for cmd in cmds if _operator(cmd) != "?"}
+        steps = {frame_key(cmd): cmd for cmd in cmds if _operator(cmd) in ("+", "-")}
+        stepped = Counter(frame_key(cmd) for cmd in cmds if frame_key(cmd) in steps)
+        # What a step's key read before the batch, to tell how many lost steps took effect
+        before = {key: self._values.get(key.lower()) for key in steps}
+        # Keys of steps being read back
+        checking = set()
+        replies: Dict[str, Optional[str]] = {}
+        pending = cmds
+        dropped = False
+        deadline = monotonic() + BATCH_DEADLINE
+        for attempt in range(BATCH_ATTEMPTS):
+            if attempt > 0 and monotonic() >= deadline:
+                _LOGGER.debug("no time left to retry: '%s'", pending)
+                break
+            self._hold(pending)
+            if self.tracer:
+                self.tracer.emit(COMMAND, pending)
+            rtt = self.transport.rtt
+            if rtt is not None and any(_writes_power(cmd) for cmd in pending):
+                # Waking from standby takes far longer than answering a query
+                with rtt.floor(POWER_ON_FLOOR):
+                    msgs = send(pending)
             else:
-                raise ValueError("Invalid operator provided %s" % operator)
+                msgs = send(pending)
+            # Replies this attempt got, by key
+            got: Counter[str] = Counter()
+            for msg in msgs or []:
+                key, reply = split_frame(msg)
+                if key.lower() in keys:
+                    replies[keys[key.lower()]] = reply
+                    got[keys[key.lower()]] += 1
+                    self._observe(key, reply, write=key.lower() in writes)
+                else:
+                    self._notify(msg)
+            if attempt > 0 and got:
+                dropped = True
+
+            retry = []
+            sent = Counter(frame_key(cmd) for cmd in pending)
+            for cmd in dict.fromkeys(pending):
+                key = frame_key(cmd)
+                if key in checking and got[key]:
+                    checking.discard(key)
+                    lost = _lost_steps(steps[key], stepped[key], before[key], replies[key])
+                    if lost:
+                        _LOGGER.debug("%d of '%s' did not take effect, resending", lost, steps[key])
+                        retry += [steps[key]] * lost
+                elif cmd == steps.get(key) and got[key] < sent[key]:
+                    # Each step answers once, so any missing reply means reading it back
+                    checking.add(key)
+                    retry.append(key + "?")
+                elif not got[key]:
+                    retry.append(cmd)
+            if not retry:
+                break
+            _LOGGER.debug("retrying: '%s'", retry)
+            pending = retry
 
-            cmds.append(cmd)
+        pacer = self.transport.pacer
+        if pacer is not None:
+            if dropped:
+                pacer.on_loss()
+            else:
+                pacer.on_success()
+        if self.tracer:
+            self.tracer.emit(PARSED, replies)
+        if not replies:
+            return None
+        return replies
 
-        try:
-            msgs = self.transport.communicate_multiline(cmds)
-            _LOGGER.debug(f"sent: '{cmds}' reply: '{msgs}'")
-            if msgs is None:
-                return None
-            return [msg.split("=")[1] for msg in msgs]
-        except IndexError:
-            pass
-        return None
+    def apply_state(self, state: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Write a partial state for one or more domains in pipelined batches.
+
+        The state maps domain to function to value, for example
+        {"main": {"power": "On", "volume": "-40"}, "zone2": {"mute": "On"}}.
+        Power is written first. A domain being powered on gets its other writes
+        in a second batch, which is held until the domain has booted; all other
+        writes go in the first batch. Returns the confirmed replies keyed by
+        'Domain.Function'.
+        """
+        batch = []
+        after_power_on = []
+        powering_on = []
+        for domain, values in state.items():
+            if values.get("power") == "On":
+                powering_on.append(domain)
+            for function in sorted(values, key=_write_order):
+                cmd = self._command(domain, function, "=", str(values[function]))
+                if domain in powering_on and function != "power":
+                    after_power_on.append(cmd)
+                else:
+                    batch.append(cmd)
+
+        replies = self.exec_frames(batch) or {}
+        if after_power_on:
+            replies.update(self.exec_frames(after_power_on) or {})
+        return replies or None
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the status of the device.
+
+        Returns a dictionary with keys 'volume' (int 0-200) , 'power' (bool),
+         'muted' (bool) and 'source' (str).
+        """
+        nad_reply = self.exec_commands(
+            [
+                ["main", "power", "?"],
+                ["main", "mute", "?"],
+                ["main", "volume", "?"],
+            ]
+        )
+        if nad_reply is None:
+            return None
+
+        return {
+            "power": nad_reply.get("Main.Power"),
+            "muted": nad_reply.get("Main.Mute"),
+            "volume": nad_reply.get("Main.Volume"),
+        }
+
+    def status_all(self) -> Optional[Dict[str, Any]]:
+        """
+        Return all status values of the device.
+
+        Returns a dictionary with keys like 'main_volume' for
+        each available status value.
+        """
+        if self.tracer:
+            self.tracer.emit(COMMAND, ["?"])
+        nad_reply = self.transport.communicate_multiline(["?"])
+        if nad_reply is None:
+            return None
+
+        values = [split_frame(x) for x in nad_reply]
+        status = {k.lower().replace(".", "_"): v for k, v in values if v is not None}
+        if self.tracer:
+            self.tracer.emit(PARSED, status)
+        return status
 
     def main_dimmer(self, operator: str, value: Optional[str] = None) -> Optional[str]:
         """Execute Main.Dimmer."""
@@ -273,43 +601,12 @@ class NADReceiverTelnet(NADReceiver):
     Known supported model: Nad T787.
     """
 
-    def __init__(self, host: str, port: int = 23, timeout: int = DEFAULT_TIMEOUT):
-        """Create NADTelnet."""
-        self.transport = TelnetTransportWrapper(host, port, timeout)
-
-    def status(self) -> Optional[Dict[str, Any]]:
-        """
-        Return the status of the device.
-
-        Returns a dictionary with keys 'volume' (int 0-200) , 'power' (bool),
-         'muted' (bool) and 'source' (str).
-        """
-        nad_reply = self.exec_commands(
-            [
-                ["main", "power", "?"],
-                ["main", "mute", "?"],
-                ["main", "volume", "?"],
-            ]
-        )
-        if nad_reply is None:
-            return None
-
-        return {"power": nad_reply[0], "muted": nad_reply[1], "volume": nad_reply[2]}
-
-    def status_all(self) -> Optional[Dict[str, Any]]:
-        """
-        Return all status values of the device.
-
-        Returns a dictionary with keys like 'main_volume' for
-        each available status value.
-        """
-        nad_reply = self.transport.communicate_multiline("?")
-        _LOGGER.debug(f"sent: '?' reply: '{nad_reply}'")
-        if nad_reply is None:
-            return None
+    def __init__(self, host: str, port: int = 23, timeout: float = DEFAULT_TIMEOUT):
+        """Create NADTelnet. timeout is the read timeout until the round trip is measured."""
+        from .nad_transport import TelnetTransportWrapper
 
-        values = [x.split("=") for x in nad_reply]
-        return {x[0].lower().replace(".", "_"): x[1] for x in values}
+        self.transport = TelnetTransportWrapper(host, port, timeout)
+        self._init_state()
 
 
 class NADReceiverTCP:
@@ -346,6 +643,8 @@ class NADReceiverTCP:
 
     PORT = 50001
     BUFFERSIZE = 1024
+    # Time allowed for a whole reply to arrive
+    REPLY_TIMEOUT = 5.0
 
     def __init__(self, host: str) -> None:
         """Setup globals."""
@@ -353,6 +652,9 @@ class NADReceiverTCP:
 
     def _send(self, message: str, read_reply: bool = False) -> Optional[str]:
         """Send a command string to the amplifier."""
+        import codecs
+        import socket
+
         sock: socket.socket
         for tries in range(0, 3):
             try:
@@ -371,17 +673,26 @@ class NADReceiverTCP:
         with sock:
             sock.send(codecs.decode(message.encode(), encoding="hex_codec"))
             if read_reply:
-                sleep(0.1)
+                # The reply may arrive in pieces; read until it is as long as the
+                # message, which has one reply per command
                 reply = ""
-                tries = 0
-                max_tries = 20
-                while len(reply) < len(message) and tries < max_tries:
+                deadline = monotonic() + self.REPLY_TIMEOUT
+                while len(reply) < len(message):
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    sock.settimeout(remaining)
                     try:
-                        reply += codecs.encode(sock.recv(self.BUFFERSIZE), "hex").decode("utf-8")
-                        return reply
-                    except (ConnectionError, BrokenPipeError):
-                        pass
-                    tries += 1
+                        data = sock.recv(self.BUFFERSIZE)
+                    except (socket.timeout, ConnectionError):
+                        break
+                    if not data:
+                        break
+                    reply += codecs.encode(data, "hex").decode("utf-8")
+                if len(reply) < len(message):
+                    _LOGGER.debug("short reply '%s' to '%s'", reply, message)
+                    return None
+                return reply
         return None
 
     def status(self) -> Optional[Dict[str, Any]]:
@@ -424,7 +735,21 @@ class NADReceiverTCP:
             return None
         if not status["power"]:
             self._send(self.CMD_ON, read_reply=True)
-            sleep(0.5)  # Give NAD7050 some time before next command
+            self._wait_until_ready()
+
+    def _wait_until_ready(self, timeout: float = POWER_ON_READY_TIMEOUT) -> bool:
+        """Probe with exponential spacing until the NAD7050 reports power on."""
+        deadline = monotonic() + timeout
+        interval = READY_PROBE_INTERVAL
+        while True:
+            status = self.status()
+            if status and status["power"]:
+                return True
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return False
+            sleep(min(interval, remaining))
+            interval *= 2
 
     def set_volume(self, volume: int) -> None:
         """Set volume level of the device. Accepts integer values 0-200."""
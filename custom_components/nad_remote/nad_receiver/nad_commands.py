@@ -4,7 +4,7 @@ Commands and operators used by NAD.
 CMDS[domain][function]
 """
 
-from typing import Dict, Iterable, Union
+from typing import Any, Dict, Iterable, Union
 
 CMDS: Dict[str, Dict[str, Dict[str, Union[str, Iterable[str]]]]] = {
     "main": {
@@ -49,3 +49,22 @@ CMDS: Dict[str, Dict[str, Dict[str, Union[str, Iterable[str]]]]] = {
         "mute": {"cmd": "Zone2.Mute", "supported_operators": ["+", "-", "=", "?"]},
     },
 }
+
+
+# Functions of every zone after Main, e.g. 'zone3' has 'Zone3.Power'
+ZONE_FUNCTIONS = {"power": "Power", "source": "Source", "volume": "Volume", "mute": "Mute"}
+ZONE_OPERATORS = ["+", "-", "=", "?"]
+
+
+def domain_commands(domain: str) -> Dict[str, Dict[str, Any]]:
+    """Commands of a domain; zone domains such as 'zone3' are added on first use"""
+    commands = CMDS.get(domain)
+    if commands is None:
+        number = domain[len("zone") :]
+        if not domain.startswith("zone") or not number.isdigit():
+            raise KeyError(domain)
+        commands = CMDS[domain] = {
+            function: {"cmd": f"Zone{number}.{name}", "supported_operators": ZONE_OPERATORS}
+            for function, name in ZONE_FUNCTIONS.items()
+        }
+    return commands
@@ -1,89 +1,183 @@
-from .nad_transport import NadTransport
-import re
-from typing import Callable, Optional
+from .nad_transport import NadTransport, split_frame
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
 
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "profiles")
 
-class Fake_NAD_C_356BE_Transport(NadTransport):
-    """A fake NAD C 356BE device.
+TOGGLE = "toggle"
+CYCLE = "cycle"
+RANGE = "range"
+VALUE = "value"
+READONLY = "readonly"
+RELATIVE = "relative"
 
-    Behaves just like the real device (although faster).
-    This is convenient for testing or when integrating this
-    library into other applications, such as Home Assistant.
+
+def load_profile(name: str) -> Dict[str, Any]:
+    """Load a bundled device profile by model name, e.g. 'T787'."""
+    with open(os.path.join(PROFILE_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _format_number(value: float) -> str:
+    return f"{round(value, 4):g}"
+
+
+class FakeNADTransport(NadTransport):
+    """A fake NAD device built from a device profile.
+
+    A profile is a dict (or the path of a JSON file) with:
+
+    - 'status': a captured status_all dump, the list of 'Key=Value' frames the
+      device sends in reply to '?'. It sets every function's initial value.
+    - 'behaviours': optional per-function behaviour keyed by 'Key', one of
+      toggle (On/Off, + and - flip), cycle ('values' list, + and - step with
+      wraparound; 'sets' maps other functions to a value per step, such as a
+      preset's frequency), range (numeric 'min', 'max' and 'step'), value (any
+      value can be set), readonly and relative (+ and - are echoed, nothing is
+      reported). Functions missing from the dump take their 'value' from here.
+    - 'power_gated': when true a domain whose Power is Off answers nothing
+      except for Power and readonly functions, like the C 356BE.
+
+    Functions without a behaviour get one from their value: On/Off toggles,
+    numbers with 'Key.Min' and 'Key.Max' in the dump are ranges and anything
+    else is a plain value. Each command is dispatched with one dict lookup.
     """
 
-    def __init__(self) -> None:
-        self._toggle = {
-            "Power": False,
-            "Mute": False,
-            "Tape1": False,
-            "SpeakerA": True,
-            "SpeakerB": False,
+    def __init__(self, profile: Union[Dict[str, Any], str]) -> None:
+        if isinstance(profile, str):
+            with open(profile, encoding="utf-8") as f:
+                profile = json.load(f)
+        self.power_gated: bool = profile.get("power_gated", False)
+        # Current values and behaviours, keyed by the canonical 'Key'
+        self._values: Dict[str, str] = {}
+        self._behaviours: Dict[str, Dict[str, Any]] = {}
+        # Lower case 'key' to canonical 'Key'
+        self._keys: Dict[str, str] = {}
+
+        for frame in profile.get("status", []):
+            key, value = split_frame(frame)
+            if value is not None:
+                self._values[key] = value
+                self._keys[key.lower()] = key
+        behaviours = profile.get("behaviours", {})
+        for key, behaviour in behaviours.items():
+            self._keys[key.lower()] = key
+            if key not in self._values and "value" in behaviour:
+                self._values[key] = str(behaviour["value"])
+        for key in self._keys.values():
+            self._behaviours[key] = behaviours.get(key) or self._infer(key)
+
+        self._handlers: Dict[str, Callable[[str, str, str], Optional[str]]] = {
+            TOGGLE: self._toggle,
+            CYCLE: self._cycle,
+            RANGE: self._range,
+            VALUE: self._value,
+            READONLY: self._readonly,
         }
-        self._model = "C356BEE"
-        self._version = "V1.02"
-        self._sources = "CD TUNER DISC/MDC AUX TAPE2 MP".split()
-        self._source = "CD"
-        self._command_regex = re.compile(
-            r"(?P<component>\w+)\.(?P<function>\w+)(?P<operator>[=\?\+\-])(?P<value>.*)"
-        )
-
-    def _toggle_property(self, property: str, operator: str, value: str) -> str:
-        assert value in ["", "On", "Off"]
-        val = self._toggle[property]
+
+    def _infer(self, key: str) -> Dict[str, Any]:
+        value = self._values.get(key)
+        if value in ("On", "Off"):
+            return {"type": TOGGLE}
+        if f"{key}.Min" in self._values and f"{key}.Max" in self._values:
+            return {
+                "type": RANGE,
+                "min": float(self._values[f"{key}.Min"]),
+                "max": float(self._values[f"{key}.Max"]),
+                "step": 1,
+            }
+        return {"type": VALUE}
+
+    def _toggle(self, key: str, operator: str, value: str) -> Optional[str]:
+        current = self._values.get(key) == "On"
         if operator in ("+", "-"):
-            val = not val
+            current = not current
+        elif operator == "=":
+            if value not in ("On", "Off"):
+                return None
+            current = value == "On"
+        self._values[key] = "On" if current else "Off"
+        return self._values[key]
+
+    def _cycle(self, key: str, operator: str, value: str) -> Optional[str]:
+        values = self._behaviours[key]["values"]
         if operator == "=":
-            val = value == "On"
-        self._toggle[property] = val
-        return "On" if val else "Off"
+            if value not in values:
+                return None
+            self._values[key] = value
+        elif operator in ("+", "-"):
+            index = values.index(self._values[key]) if self._values.get(key) in values else 0
+            index = (index + (1 if operator == "+" else -1)) % len(values)
+            self._values[key] = values[index]
+        if operator != "?":
+            for target, linked in self._behaviours[key].get("sets", {}).items():
+                self._values[target] = linked[values.index(self._values[key])]
+        return self._values.get(key)
 
-    def communicate(self, command: str) -> str:
-        match = self._command_regex.fullmatch(command)
-        if not match or match.group("component") != "Main":
+    def _range(self, key: str, operator: str, value: str) -> Optional[str]:
+        behaviour = self._behaviours[key]
+        current = float(self._values.get(key, behaviour["min"]))
+        if operator == "=":
+            try:
+                current = float(value)
+            except ValueError:
+                return None
+        elif operator in ("+", "-"):
+            step = behaviour.get("step", 1)
+            current += step if operator == "+" else -step
+        current = min(max(current, behaviour["min"]), behaviour["max"])
+        self._values[key] = _format_number(current)
+        return self._values[key]
+
+    def _value(self, key: str, operator: str, value: str) -> Optional[str]:
+        if operator == "=":
+            self._values[key] = value
+        elif operator != "?":
+            return None
+        return self._values.get(key)
+
+    def _readonly(self, key: str, operator: str, value: str) -> Optional[str]:
+        return self._values.get(key) if operator == "?" else None
+
+    def _reply(self, command: str) -> str:
+        # The operator is the first of these after the key, values may contain any of them
+        index = min((i for i in (command.find(op) for op in "?=+-") if i > 0), default=-1)
+        if index < 0:
+            return ""
+        key = self._keys.get(command[:index].lower())
+        if key is None:
             return ""
-        component = match.group("component")
-        function = match.group("function")
-        operator = match.group("operator")
-        value = match.group("value")
+        operator, value = command[index], command[index + 1 :]
 
-        response: Callable[
-            [Optional[str]], str
-        ] = lambda val: f"{component}.{function}{'=' + val if val else ''}"
+        behaviour = self._behaviours[key]
+        kind = behaviour["type"]
+        if self.power_gated and kind != READONLY and not key.endswith(".Power"):
+            power = self._values.get(key.split(".", 1)[0] + ".Power")
+            if power == "Off":
+                return ""
+        if kind == RELATIVE:
+            return f"{key}{operator}" if operator in ("+", "-") else ""
+        reply = self._handlers[kind](key, operator, value)
+        return f"{key}={reply}" if reply is not None else ""
 
-        if function == "Version" and operator == "?":
-            return response(self._version)
-        if function == "Model" and operator == "?":
-            return response(self._model)
+    def communicate(self, command: str) -> str:
+        return self._reply(command)
 
-        if function == "Power":
-            return response(self._toggle_property(function, operator, value))
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        if cmds == ["?"]:
+            return [f"{key}={value}" for key, value in self._values.items()]
+        replies = [self._reply(cmd) for cmd in cmds]
+        return [reply for reply in replies if reply]
 
-        if not self._toggle["Power"]:
-            # Except for power, all other functions return "" when power is off.
-            return ""
 
-        if function in self._toggle.keys():
-            return response(self._toggle_property(function, operator, value))
-
-        if function == "Volume":
-            # this thing doesn't report volume, but increase/decrease works and we do get the original command back
-            if operator in ("+", "-"):
-                return response(None) + operator
-
-        if function == "Source":
-            index = self._sources.index(self._source)
-            assert index >= 0
-            if operator == "+":
-                index += 1
-            if operator == "-":
-                index -= 1
-            if operator == "=":
-                index = self._sources.index(value)
-            if index < 0:
-                index = len(self._sources) - 1
-            if index == len(self._sources):
-                index = 0
-            self._source = self._sources[index]
-            return response(self._source)
-
-        return ""
+class Fake_NAD_C_356BE_Transport(FakeNADTransport):
+    """A fake NAD C 356BE device.
+
+    Behaves just like the real device (although faster).
+    This is convenient for testing or when integrating this
+    library into other applications, such as Home Assistant.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(load_profile("C356BEE"))
@@ -0,0 +1,115 @@
+"""
+Pacing of frames sent to a receiver.
+
+NAD firmware silently drops commands that arrive faster than it can handle
+them. A token bucket per receiver lets a burst of frames out at once and
+spaces the rest at a steady rate. Both are learned while running: a batch
+with missing replies halves them, and clean batches that had to be paced
+raise them a step at a time, so sends settle just under the receiver's limit.
+What is learned is shared by receivers of the same model.
+"""
+import threading
+from time import monotonic, sleep
+from typing import Dict, Optional, Tuple
+
+# Starting point for a model nothing has been learned about, in frames per
+# second and frames sent back to back
+DEFAULT_RATE = 25.0
+DEFAULT_BURST = 8
+MIN_RATE = 2.0
+MAX_RATE = 200.0
+MAX_BURST = 32
+# Additive increase per clean paced batch, and one more frame of burst after
+# this many of them; a loss multiplies both by LOSS_DECREASE
+RATE_INCREASE = 1.0
+BURST_INCREASE_EVERY = 8
+LOSS_DECREASE = 0.5
+
+# Learned (rate, burst) by model
+_learned: Dict[str, Tuple[float, int]] = {}
+_learned_lock = threading.Lock()
+
+
+def learned(model: str) -> Optional[Tuple[float, int]]:
+    """Return the (rate, burst) learned for a model, if any"""
+    with _learned_lock:
+        return _learned.get(model)
+
+
+def remember(model: str, rate: float, burst: int) -> None:
+    """Start new buckets for model from a (rate, burst) learned earlier"""
+    with _learned_lock:
+        _learned[model] = (min(max(rate, MIN_RATE), MAX_RATE), min(max(int(burst), 1), MAX_BURST))
+
+
+class TokenBucket:
+    """Paces frames to one receiver and adapts to the losses it sees."""
+
+    def __init__(
+        self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, model: Optional[str] = None
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.model = model
+        self._tokens = float(burst)
+        self._last = monotonic()
+        self._lock = threading.Lock()
+        # Whether a send waited for tokens since the last feedback, and clean
+        # paced batches since the burst last grew
+        self._paced = False
+        self._clean = 0
+
+    @classmethod
+    def for_model(cls, model: Optional[str]) -> "TokenBucket":
+        """Return a bucket starting from what was learned for model"""
+        rate, burst = (learned(model) if model else None) or (DEFAULT_RATE, DEFAULT_BURST)
+        return cls(rate, burst, model)
+
+    @property
+    def settings(self) -> Tuple[float, int]:
+        return self.rate, self.burst
+
+    def take(self, wanted: int) -> int:
+        """Wait until a frame may be sent; returns how many of wanted frames may go now"""
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                taken = min(wanted, int(self._tokens))
+                self._tokens -= taken
+                return taken
+            # Reserve the next token and wait for it outside the lock
+            delay = (1 - self._tokens) / self.rate
+            self._tokens -= 1
+            self._paced = True
+        sleep(delay)
+        return 1
+
+    def on_success(self) -> None:
+        """A batch got every reply; probe a little faster if it was held back"""
+        with self._lock:
+            if not self._paced:
+                return
+            self._paced = False
+            self.rate = min(MAX_RATE, self.rate + RATE_INCREASE)
+            self._clean += 1
+            if self._clean >= BURST_INCREASE_EVERY:
+                self._clean = 0
+                self.burst = min(MAX_BURST, self.burst + 1)
+        self._learn()
+
+    def on_loss(self) -> None:
+        """A batch lost replies; back off"""
+        with self._lock:
+            self._paced = False
+            self._clean = 0
+            self.rate = max(MIN_RATE, self.rate * LOSS_DECREASE)
+            self.burst = max(1, int(self.burst * LOSS_DECREASE))
+            self._tokens = min(self._tokens, self.burst)
+        self._learn()
+
+    def _learn(self) -> None:
+        if self.model is not None:
+            with _learned_lock:
+                _learned[self.model] = (self.rate, self.burst)
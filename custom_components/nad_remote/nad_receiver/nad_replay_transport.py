@@ -0,0 +1,84 @@
+from .nad_transport import NadTransport, TrafficRecorder
+from time import monotonic, sleep
+from typing import List, Tuple
+
+
+class ReplayMismatch(Exception):
+    """The frames sent do not match the next exchange in the recording."""
+
+
+class ReplayTransport(NadTransport):
+    """Play back a recording made with NadTransport.record_to.
+
+    Every batch sent must match the next batch in the recording and gets the
+    replies that were recorded for it. With realtime set, replies are delayed
+    to keep the recorded timing; otherwise they are returned immediately.
+    """
+
+    def __init__(self, path: str, realtime: bool = False) -> None:
+        self.path = path
+        self.realtime = realtime
+        self.exchanges = self._load(path)
+        self.position = 0
+        self._start: float = 0.0
+        self._offset: float = 0.0
+
+    @staticmethod
+    def _load(path: str) -> List[Tuple[float, float, List[str], List[str]]]:
+        """Return (sent at, replied at, sent, received) for every recorded batch"""
+        exchanges: List[Tuple[float, float, List[str], List[str]]] = []
+        sent: List[str] = []
+        received: List[str] = []
+        start = end = 0.0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split(" ", 2)
+                t, event = float(parts[0]), parts[1]
+                frame = parts[2] if len(parts) > 2 else ""
+                if event == TrafficRecorder.SENT:
+                    if received:
+                        exchanges.append((start, end, sent, received))
+                        sent, received = [], []
+                    if not sent:
+                        start = t
+                    sent.append(frame)
+                    end = t
+                elif event == TrafficRecorder.RECEIVED:
+                    received.append(frame)
+                    end = t
+                elif event == TrafficRecorder.END:
+                    exchanges.append((start, t, sent, received))
+                    sent, received = [], []
+        if sent:
+            exchanges.append((start, end, sent, received))
+        return exchanges
+
+    def done(self) -> bool:
+        return self.position >= len(self.exchanges)
+
+    def rewind(self) -> None:
+        self.position = 0
+
+    def communicate(self, command: str) -> str:
+        rsp = self.communicate_multiline([command])
+        return rsp[0] if rsp else ""
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        if self.done():
+            raise ReplayMismatch(f"Recording ended before {cmds}")
+        sent_at, replied_at, sent, received = self.exchanges[self.position]
+        if sent != list(cmds):
+            raise ReplayMismatch(f"Expected {sent} at exchange {self.position}, got {cmds}")
+        if self.realtime:
+            if self.position == 0:
+                # Align the first batch to now and keep the recorded spacing after it
+                self._start = monotonic()
+                self._offset = sent_at
+            delay = self._start + replied_at - self._offset - monotonic()
+            if delay > 0:
+                sleep(delay)
+        self.position += 1
+        return list(received)
@@ -0,0 +1,89 @@
+"""
+Adaptive read timeouts for a receiver connection.
+
+Each transport measures how long its receiver takes to answer and keeps a
+smoothed round trip time and its variance, the way TCP does (RFC 6298).
+Reads wait for the retransmission timeout derived from them, so a missing
+reply or the end of a batch is noticed within milliseconds on a LAN. A read
+that gets nothing at all doubles the timeout until the next measurement, so
+a receiver that slows down, e.g. while booting, is given more time. Connects
+and power-on writes have their own floors, as both take far longer than a
+reply to a query.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Timeout before the first measurement
+INITIAL_RTO = 1.0
+MIN_RTO = 0.05
+MAX_RTO = 2.0
+# Gains for the smoothed round trip time and its variance, and the number of
+# variances added to make the timeout
+RTT_GAIN = 1 / 8
+RTTVAR_GAIN = 1 / 4
+RTTVAR_FACTOR = 4
+# Least time allowed to open a connection, and to answer a write that powers a
+# domain on
+CONNECT_FLOOR = 2.0
+POWER_ON_FLOOR = 5.0
+
+
+class RttEstimator:
+    """Smoothed round trip time of one receiver and the read timeout it implies."""
+
+    def __init__(self, initial: float = INITIAL_RTO) -> None:
+        self.initial = initial
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self._backoff = 1
+        self._floors: List[float] = []
+        self._lock = threading.Lock()
+
+    def _base(self) -> float:
+        if self.srtt is None:
+            return self.initial
+        return max(self.srtt + RTTVAR_FACTOR * self.rttvar, MIN_RTO)
+
+    @property
+    def rto(self) -> float:
+        """Retransmission timeout: how long to wait for a reply"""
+        with self._lock:
+            return min(self._base() * self._backoff, MAX_RTO)
+
+    def timeout(self) -> float:
+        """Read timeout, at least any floor being held"""
+        rto = self.rto
+        with self._lock:
+            return max([rto, *self._floors])
+
+    def connect_timeout(self) -> float:
+        return max(self.timeout(), CONNECT_FLOOR)
+
+    def sample(self, rtt: float) -> None:
+        """Add a measured round trip time"""
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar = (1 - RTTVAR_GAIN) * self.rttvar + RTTVAR_GAIN * abs(self.srtt - rtt)
+                self.srtt = (1 - RTT_GAIN) * self.srtt + RTT_GAIN * rtt
+            self._backoff = 1
+
+    def on_timeout(self) -> None:
+        """A read got no reply at all; wait longer until the next measurement"""
+        with self._lock:
+            if self._base() * self._backoff < MAX_RTO:
+                self._backoff *= 2
+
+    @contextmanager
+    def floor(self, seconds: float) -> Iterator[None]:
+        """Have reads wait at least seconds while in the context"""
+        with self._lock:
+            self._floors.append(seconds)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._floors.remove(seconds)
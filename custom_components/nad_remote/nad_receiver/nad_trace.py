@@ -0,0 +1,90 @@
+"""
+Tracing hooks on the command path.
+
+Receivers and transports emit structured events to subscribers. With no
+subscriber attached their tracer is None and each hook is a single attribute
+test, so tracing costs nothing in normal use.
+"""
+from collections import deque
+from time import monotonic
+from typing import Any, Callable, Deque, List, NamedTuple, Optional
+
+import logging
+
+# A receiver issued a batch of command frames
+COMMAND = "command"
+# A transport wrote frames to the device
+WRITE = "write"
+# A transport received a frame
+FRAME = "frame"
+# A transport read ended with nothing more to read
+END = "end"
+# A receiver finished matching replies to a batch
+PARSED = "parsed"
+
+
+class TraceEvent(NamedTuple):
+    time: float
+    event: str
+    data: Any
+
+
+TraceSubscriber = Callable[[TraceEvent], None]
+
+
+class Tracer:
+    """Fan out trace events to subscribers."""
+
+    def __init__(self) -> None:
+        self.subscribers: List[TraceSubscriber] = []
+
+    def emit(self, event: str, data: Any = None) -> None:
+        trace_event = TraceEvent(monotonic(), event, data)
+        for subscriber in self.subscribers:
+            subscriber(trace_event)
+
+
+class Traceable:
+    """Mixin giving an object a tracer that exists only while subscribed."""
+
+    tracer: Optional[Tracer] = None
+
+    def add_trace_subscriber(self, subscriber: TraceSubscriber) -> Callable[[], None]:
+        """Subscribe to trace events; returns a function that unsubscribes."""
+        if self.tracer is None:
+            self.tracer = Tracer()
+        tracer = self.tracer
+        tracer.subscribers.append(subscriber)
+
+        def remove() -> None:
+            if subscriber in tracer.subscribers:
+                tracer.subscribers.remove(subscriber)
+            if not tracer.subscribers and self.tracer is tracer:
+                self.tracer = None
+
+        return remove
+
+
+def log_subscriber(logger: logging.Logger, level: int = logging.DEBUG) -> TraceSubscriber:
+    """Return a subscriber that logs every event."""
+
+    def log(event: TraceEvent) -> None:
+        logger.log(level, "%s: %s", event.event, event.data)
+
+    return log
+
+
+class TraceBuffer:
+    """Subscriber keeping the most recent events for post-mortems."""
+
+    def __init__(self, maxlen: int = 256) -> None:
+        self._events: Deque[TraceEvent] = deque(maxlen=maxlen)
+
+    def __call__(self, event: TraceEvent) -> None:
+        self._events.append(event)
+
+    def events(self) -> List[TraceEvent]:
+        return list(self._events)
+
+    def clear(self) -> None:
+        self._events.clear()
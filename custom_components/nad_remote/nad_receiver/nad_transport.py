@@ -1,20 +1,135 @@
 import abc
-import serial  # type: ignore
-import telnetlib
+import collections
+import os
+import queue
 import threading
+from concurrent.futures import Future
+from time import monotonic
 
-from typing import Optional, List
+from typing import TYPE_CHECKING, Any, Callable, Counter, Optional, List, Tuple
 
 import logging
 
-logging.basicConfig()
+from .nad_pacing import TokenBucket
+from .nad_rtt import INITIAL_RTO, RttEstimator
+from .nad_trace import END, FRAME, WRITE, Traceable, TraceEvent, TraceSubscriber
+
+if TYPE_CHECKING:
+    import socket
+    import telnetlib
+
+# serial and telnetlib are imported only when a transport that needs them is opened,
+# socket and select only when a connection is checked or configured
 _LOGGER = logging.getLogger("nad_receiver.transport")
 
 
-DEFAULT_TIMEOUT = 1
+# Read timeout until the receiver's round trip time has been measured; after
+# that reads wait for the timeout the transport's RttEstimator derives
+DEFAULT_TIMEOUT = INITIAL_RTO
+CR = b"\r"
+
+FRAME_OPERATORS = "=?+-"
+
+# Most queued requests the telnet actor merges into one write, and how long
+# it waits for a request before its thread exits
+MAX_MERGED_REQUESTS = 8
+ACTOR_IDLE_TIMEOUT = 5.0
+
+# While a telnet connection is open and idle the actor sends this query every
+# HEARTBEAT_INTERVAL seconds and reconnects if it goes unanswered, so a dead
+# connection is replaced before a caller's command waits out its timeout
+HEARTBEAT_COMMAND = "Main.Power?"
+HEARTBEAT_INTERVAL = 15.0
+
+# TCP keepalive: idle seconds before the first probe, seconds between probes
+# and unanswered probes before the OS reports the connection dead
+KEEPALIVE_IDLE = 10
+KEEPALIVE_INTERVAL = 5
+KEEPALIVE_COUNT = 3
+
+
+def frame_key(frame: str) -> str:
+    """Return the 'Domain.Function' key of a command or reply, e.g. 'Main.Volume'"""
+    for i, c in enumerate(frame):
+        if c in FRAME_OPERATORS:
+            return frame[:i]
+    return frame
+
+
+def enable_keepalive(sock: "socket.socket") -> None:
+    """Have the OS probe an idle connection so that a dead peer ends in a socket error"""
+    import socket
+
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # TCP_KEEPALIVE is the macOS name for the idle time
+    idle = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+    for option, value in (
+        (idle, KEEPALIVE_IDLE),
+        (getattr(socket, "TCP_KEEPINTVL", None), KEEPALIVE_INTERVAL),
+        (getattr(socket, "TCP_KEEPCNT", None), KEEPALIVE_COUNT),
+    ):
+        if option is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, option, value)
+
+
+def split_frame(frame: str) -> Tuple[str, Optional[str]]:
+    """Split a reply into its key and value; replies without '=' have no value"""
+    key, sep, value = frame.partition("=")
+    if not sep:
+        return frame_key(frame), None
+    return key, value
+
+
+class TrafficRecorder:
+    """
+    Append-only record of every frame sent to and received from a receiver.
+
+    Each line is '<seconds> <event> <frame>' where seconds is monotonic time
+    since recording started and event is '>' for a frame sent, '<' for a frame
+    received and '.' (with no frame) where a read ended with nothing more to
+    read. A ReplayTransport can play a recording back.
+    """
 
+    HEADER = "# nad_receiver recording 1\n"
+    SENT = ">"
+    RECEIVED = "<"
+    END = "."
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._start = monotonic()
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        if new:
+            self._file.write(self.HEADER)
+
+    def __call__(self, event: TraceEvent) -> None:
+        """Record a transport trace event"""
+        t = event.time - self._start
+        if event.event == WRITE:
+            lines = [f"{t:.6f} {self.SENT} {frame}\n" for frame in event.data]
+        elif event.event == FRAME:
+            lines = [f"{t:.6f} {self.RECEIVED} {event.data}\n"]
+        elif event.event == END:
+            lines = [f"{t:.6f} {self.END} \n"]
+        else:
+            return
+        with self._lock:
+            self._file.writelines(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class NadTransport(Traceable, abc.ABC):
+    _recording: Optional[Tuple[TrafficRecorder, Callable[[], None]]] = None
+    # Spaces out writes so the receiver's firmware does not drop frames
+    pacer: Optional[TokenBucket] = None
+    # Measures the receiver's round trip time and sets read timeouts from it
+    rtt: Optional[RttEstimator] = None
 
-class NadTransport(abc.ABC):
     @abc.abstractmethod
     def communicate(self, command: str) -> str:
         pass
@@ -22,17 +137,61 @@ class NadTransport(abc.ABC):
     def communicate_multiline(self, command: str) -> str:
         pass
 
+    def close(self) -> None:
+        """Release the connection to the device"""
+
+    def record_to(self, path: Optional[str]) -> None:
+        """Record all traffic to an append-only file, or stop recording if path is None"""
+        if self._recording is not None:
+            recorder, remove = self._recording
+            remove()
+            recorder.close()
+            self._recording = None
+        if path is not None:
+            recorder = TrafficRecorder(path)
+            self._recording = (recorder, self.add_trace_subscriber(recorder))
+
+    def _write_frames(self, frames: List[bytes], write: Callable[[bytes], Any]) -> Optional[float]:
+        """Write encoded frames at once, or in groups the pacer lets through.
+
+        Returns when the frames were written if they went in one write, from
+        which the first reply measures the round trip time.
+        """
+        if self.pacer is None:
+            write(b"".join(frames))
+            return monotonic()
+        sent = 0
+        writes = 0
+        while sent < len(frames):
+            count = self.pacer.take(len(frames) - sent)
+            write(b"".join(frames[sent : sent + count]))
+            sent += count
+            writes += 1
+        return monotonic() if writes == 1 else None
+
+    def _measure(self, written: Optional[float], replied: bool) -> None:
+        """Time the first reply to a write, or back off if there was none"""
+        if self.rtt is None:
+            return
+        if not replied:
+            self.rtt.on_timeout()
+        elif written is not None:
+            self.rtt.sample(monotonic() - written)
+
 
 class SerialPortTransport(NadTransport):
     """Transport for NAD protocol over RS-232."""
 
-    def __init__(self, serial_port: str) -> None:
-        """Create RS232 connection."""
-        self.ser = serial.Serial(
+    def __init__(self, serial_port: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+        """Create RS232 connection. Accepts a device path or a pyserial URL."""
+        import serial  # type: ignore
+
+        self.rtt = RttEstimator(timeout)
+        self.ser = serial.serial_for_url(
             serial_port,
             baudrate=115200,
-            timeout=DEFAULT_TIMEOUT,
-            write_timeout=DEFAULT_TIMEOUT,
+            timeout=timeout,
+            write_timeout=timeout,
         )
         self.lock = threading.Lock()
 
@@ -45,15 +204,57 @@ class SerialPortTransport(NadTransport):
         with self.lock:
             self._open_connection()
 
-            self.ser.write(f"\r{command}\r".encode("utf-8"))
+            written = self._write_frames([f"\r{command}\r".encode("utf-8")], self.ser.write)
+            if self.tracer:
+                self.tracer.emit(WRITE, [command])
             # To get complete messages, always read until we get '\r'
             # Messages will be of the form '\rMESSAGE\r' which
             # pyserial handles nicely
-            msg = self.ser.read_until(serial.CR)
+            self.ser.timeout = self.rtt.timeout()
+            msg = self.ser.read_until(CR)
             if not msg.strip():  # discard '\r' if it was sent
-                msg = self.ser.read_until(serial.CR)
+                msg = self.ser.read_until(CR)
             assert isinstance(msg, bytes)
-            return msg.strip().decode()
+            msg = msg.strip().decode()
+            self._measure(written, bool(msg))
+            if self.tracer:
+                self.tracer.emit(FRAME if msg else END, msg or None)
+            return msg
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        with self.lock:
+            self._open_connection()
+
+            # Pipeline the batch, paced, and hold the port only once for the
+            # batch rather than once per command
+            frames = [f"\r{cmd}\r".encode("utf-8") for cmd in cmds]
+            written = self._write_frames(frames, self.ser.write)
+            if self.tracer:
+                self.tracer.emit(WRITE, cmds)
+
+            rsp_lines = []
+            self.ser.timeout = self.rtt.timeout()
+            while True:
+                # Replies are '\rMESSAGE\r' so every other read is a bare '\r';
+                # a read that times out with nothing at all ends the batch
+                rsp = self.ser.read_until(CR)
+                if not rsp:
+                    break
+                rsp = rsp.strip().decode()
+                if len(rsp) > 1:
+                    if not rsp_lines:
+                        self._measure(written, True)
+                        # Floors are for the first reply, the rest follow closely
+                        self.ser.timeout = self.rtt.rto
+                    rsp_lines.append(rsp)
+                    if self.tracer:
+                        self.tracer.emit(FRAME, rsp)
+
+            if not rsp_lines:
+                self._measure(written, False)
+            if self.tracer:
+                self.tracer.emit(END)
+            return rsp_lines
 
 
 # TelnetTransport wrapper
@@ -61,9 +262,14 @@ class SerialPortTransport(NadTransport):
 # a way that e.g. Home Assistant will not
 # receive any exceptions
 class TelnetTransportWrapper(NadTransport):
-    def __init__(self, host: str, port: int, timeout: int) -> None:
+    def __init__(self, host: str, port: int, timeout: float) -> None:
         """Create NADTelnet."""
         self.nad_telnet = TelnetTransport(host, port, timeout)
+        self._requests: "queue.Queue[Optional[Tuple[List[str], bool, Future]]]" = queue.Queue()
+        self._actor: Optional[threading.Thread] = None
+        self._actor_lock = threading.Lock()
+        # Notifications read with a heartbeat reply, passed on with the next reply
+        self._unsolicited: List[str] = []
 
     def __del__(self) -> None:
         """Destroy NADTelnet."""
@@ -92,9 +298,30 @@ class TelnetTransportWrapper(NadTransport):
 
         return True
 
+    def record_to(self, path: Optional[str]) -> None:
+        self.nad_telnet.record_to(path)
+
+    def add_trace_subscriber(self, subscriber: TraceSubscriber) -> Callable[[], None]:
+        return self.nad_telnet.add_trace_subscriber(subscriber)
+
+    @property  # type: ignore[override]
+    def pacer(self) -> Optional[TokenBucket]:
+        return self.nad_telnet.pacer
+
+    @pacer.setter
+    def pacer(self, pacer: Optional[TokenBucket]) -> None:
+        self.nad_telnet.pacer = pacer
+
+    @property  # type: ignore[override]
+    def rtt(self) -> Optional[RttEstimator]:
+        return self.nad_telnet.rtt
+
     def _open_connection(self) -> bool:
         if self.nad_telnet.is_open():
-            return True
+            if self.nad_telnet.is_alive():
+                return True
+            _LOGGER.debug("Connection to %s lost, reconnecting", self.nad_telnet.host)
+            self.nad_telnet.close_connection()
 
         try:
             self.nad_telnet.open_connection()
@@ -104,15 +331,15 @@ class TelnetTransportWrapper(NadTransport):
 
         return self._pre_read()
 
-    def communicate(self, cmd: str) -> str:
+    def _communicate(self, cmd: str) -> str:
         rsp = ""
         if not self._open_connection():
             return rsp
 
         try:
             rsp = self.nad_telnet.communicate(cmd)
-        except EOFError as cc:
-            # Connection closed
+        except (EOFError, OSError) as cc:
+            # Connection closed, reset or timed out by keepalive
             _LOGGER.debug("Connection closed: %s", cc)
             self.nad_telnet.close_connection()
         except UnicodeError as ue:
@@ -121,15 +348,17 @@ class TelnetTransportWrapper(NadTransport):
 
         return rsp
 
-    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+    def _communicate_multiline(
+        self, cmds: List[str], expect: Optional[Counter[str]] = None
+    ) -> List[str]:
         rsp = ""
         if not self._open_connection():
             return rsp
 
         try:
-            rsp = self.nad_telnet.communicate_multiline(cmds)
-        except EOFError as cc:
-            # Connection closed
+            rsp = self.nad_telnet.communicate_multiline(cmds, expect)
+        except (EOFError, OSError) as cc:
+            # Connection closed, reset or timed out by keepalive
             _LOGGER.debug("Connection closed: %s", cc)
             self.nad_telnet.close_connection()
         except UnicodeError as ue:
@@ -138,6 +367,146 @@ class TelnetTransportWrapper(NadTransport):
 
         return rsp
 
+    # All socket access happens on a single actor thread. Callers on any thread
+    # queue a request and wait on its future; the actor merges queued requests
+    # into one pipelined write and hands each caller the replies to its commands.
+
+    def communicate(self, cmd: str) -> str:
+        return self._submit([cmd], single=True).result()
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        return self._submit(cmds, single=False).result()
+
+    def close(self) -> None:
+        """Stop the actor and close the connection"""
+        with self._actor_lock:
+            actor = self._actor
+            if actor is not None:
+                self._requests.put(None)
+        if actor is not None:
+            actor.join()
+        else:
+            self.nad_telnet.close_connection()
+
+    def _submit(self, cmds: List[str], single: bool) -> Future:
+        future: Future = Future()
+        with self._actor_lock:
+            self._requests.put((cmds, single, future))
+            if self._actor is None:
+                self._actor = threading.Thread(
+                    target=self._run, name=f"nad_telnet_{self.nad_telnet.host}", daemon=True
+                )
+                self._actor.start()
+        return future
+
+    def _run(self) -> None:
+        held = None
+        while True:
+            if held is not None:
+                request, held = held, None
+            else:
+                connected = self.nad_telnet.is_open()
+                try:
+                    request = self._requests.get(
+                        timeout=HEARTBEAT_INTERVAL if connected else ACTOR_IDLE_TIMEOUT
+                    )
+                except queue.Empty:
+                    if connected:
+                        self._heartbeat()
+                        continue
+                    with self._actor_lock:
+                        if self._requests.empty():
+                            self._actor = None
+                            return
+                    continue
+            if request is None:
+                self.nad_telnet.close_connection()
+                with self._actor_lock:
+                    self._actor = None
+                return
+
+            batch = [request]
+            while _mergeable(request) and len(batch) < MAX_MERGED_REQUESTS:
+                try:
+                    queued = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is None or not _mergeable(queued):
+                    held = queued
+                    break
+                batch.append(queued)
+            self._serve(batch)
+
+    def _heartbeat(self) -> None:
+        """Query an idle connection and replace it if the receiver does not answer"""
+        key = frame_key(HEARTBEAT_COMMAND)
+        replies = (
+            self._communicate_multiline([HEARTBEAT_COMMAND], expect=collections.Counter([key]))
+            or []
+        )
+        if any(frame_key(reply) == key for reply in replies):
+            self._unsolicited += [reply for reply in replies if frame_key(reply) != key]
+            return
+        _LOGGER.debug("No heartbeat from %s, reconnecting", self.nad_telnet.host)
+        self.nad_telnet.close_connection()
+        self._open_connection()
+
+    def _serve(self, batch: List[Tuple[List[str], bool, Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                cmds, single, future = batch[0]
+                if single:
+                    future.set_result(self._communicate(cmds[0]))
+                else:
+                    replies = self._communicate_multiline(cmds)
+                    future.set_result(self._take_unsolicited() + list(replies or []))
+                return
+
+            cmds = [cmd for request in batch for cmd in request[0]]
+            # A key asked for by several requests is answered once for each
+            expected = collections.Counter(frame_key(cmd) for cmd in cmds)
+            _LOGGER.debug("Merged %d requests into one write", len(batch))
+            replies = self._communicate_multiline(cmds, expect=expected) or []
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Each reply goes to the first request still owed one for its key. Frames
+        # nobody asked for are notifications; the first multiline request takes
+        # them so they still reach the receiver's listeners
+        owed = [collections.Counter(frame_key(cmd) for cmd in request[0]) for request in batch]
+        received: List[List[str]] = [[] for _ in batch]
+        unmatched = self._take_unsolicited()
+        for reply in replies:
+            key = frame_key(reply)
+            index = next((i for i, counts in enumerate(owed) if counts[key] > 0), None)
+            if index is None:
+                unmatched.append(reply)
+            else:
+                owed[index][key] -= 1
+                received[index].append(reply)
+        target = next((request for request in batch if not request[1]), batch[0])
+        for request, mine in zip(batch, received):
+            cmds, single, future = request
+            if request is target:
+                mine += unmatched
+            if single:
+                future.set_result(mine[0] if mine else "")
+            else:
+                future.set_result(mine)
+
+    def _take_unsolicited(self) -> List[str]:
+        unsolicited, self._unsolicited = self._unsolicited, []
+        return unsolicited
+
+
+def _mergeable(request: Optional[Tuple[List[str], bool, Future]]) -> bool:
+    # A '?' status dump has no per-command replies to hand out
+    return request is not None and "?" not in request[0]
+
+
 class TelnetTransport(NadTransport):
     """
     Support NAD amplifiers that use telnet for communication.
@@ -146,12 +515,12 @@ class TelnetTransport(NadTransport):
     Known supported model: Nad T787.
     """
 
-    def __init__(self, host: str, port: int, timeout: int) -> None:
-        """Create NADTelnet."""
-        self.telnet: Optional[telnetlib.Telnet] = None
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        """Create NADTelnet. Reads wait timeout seconds until the round trip is measured."""
+        self.telnet: Optional["telnetlib.Telnet"] = None
         self.host = host
         self.port = port
-        self.timeout = timeout
+        self.rtt = RttEstimator(timeout)
 
     def __del__(self) -> None:
         try:
@@ -162,12 +531,30 @@ class TelnetTransport(NadTransport):
     def is_open(self) -> bool:
         return True if self.telnet else False
 
+    def is_alive(self) -> bool:
+        """Check without a round trip that the peer has not closed or reset the connection"""
+        if not self.telnet:
+            return False
+        import select
+        import socket
+
+        sock = self.telnet.get_socket()
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            # A connection closed by the peer is readable with nothing to read
+            return not readable or sock.recv(1, socket.MSG_PEEK) != b""
+        except OSError:
+            return False
+
     def open_connection(self) -> None:
         if self.telnet:
             raise Exception("Connection already open for host '%s:%s'" % (self.host, self.port))
 
+        import telnetlib
+
         _LOGGER.debug("Open connection to: '%s:%s'" % (self.host, self.port))
-        self.telnet = telnetlib.Telnet(self.host, self.port, self.timeout)
+        self.telnet = telnetlib.Telnet(self.host, self.port, self.rtt.connect_timeout())
+        enable_keepalive(self.telnet.get_socket())
 
     def close_connection(self) -> None:
         telnet = self.telnet
@@ -180,39 +567,65 @@ class TelnetTransport(NadTransport):
         if not self.telnet:
             raise Exception("Connection is closed")
 
-        self.telnet.read_until(data, self.timeout)
+        self.telnet.read_until(data, self.rtt.timeout())
 
     def communicate(self, cmd: str) -> str:
         if not self.telnet:
             raise Exception("Connection is closed")
 
-        _LOGGER.debug("Sending command: '%s'", cmd)
-        self.telnet.write(f"\n{cmd}\r".encode())
+        written = self._write_frames([f"\n{cmd}\r".encode()], self.telnet.write)
+        if self.tracer:
+            self.tracer.emit(WRITE, [cmd])
 
         # Notice NAD response to command ends with \r and starts with \n
         # E.g. b'\nMain.Power=On\r'
-        rsp = self.telnet.read_until(b"\r", self.timeout)
-        _LOGGER.debug("Read response: '%s'", str(rsp))
-        return rsp.strip().decode()
+        rsp = self.telnet.read_until(b"\r", self.rtt.timeout())
+        rsp = rsp.strip().decode()
+        self._measure(written, bool(rsp))
+        if self.tracer:
+            self.tracer.emit(FRAME if rsp else END, rsp or None)
+        return rsp
 
-    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+    def communicate_multiline(
+        self, cmds: List[str], expect: Optional[Counter[str]] = None
+    ) -> List[str]:
+        """Send cmds in one write and read replies until a read times out, or
+        until every key in expect has had as many replies as it counts"""
         if not self.telnet:
             raise Exception("Connection is closed")
+        pending = collections.Counter(expect) if expect else None
 
-        _LOGGER.debug("Sending commands: '%s'", cmds)
-        cmd = b"".join([f"\n{cmd}\r".encode() for cmd in cmds])
-        self.telnet.write(cmd)
+        written = self._write_frames([f"\n{cmd}\r".encode() for cmd in cmds], self.telnet.write)
+        if self.tracer:
+            self.tracer.emit(WRITE, cmds)
 
         rsp_lines = []
+        # Replies within a batch follow each other far faster than a round trip,
+        # so once the first has arrived a read that waits out the RTO ends the batch
+        timeout = self.rtt.timeout()
         while True:
             # Notice NAD response to command ends with \r and starts with \n
             # E.g. b'\nMain.Power=On\r'
-            rsp = self.telnet.read_until(b"\r", self.timeout)
-            _LOGGER.debug("Read response: '%s'", str(rsp))
+            rsp = self.telnet.read_until(b"\r", timeout)
             rsp = rsp.strip().decode()
             if len(rsp) > 1:
+                if not rsp_lines:
+                    self._measure(written, True)
+                    timeout = self.rtt.rto
                 rsp_lines.append(rsp)
+                if self.tracer:
+                    self.tracer.emit(FRAME, rsp)
+                if pending is not None:
+                    key = frame_key(rsp)
+                    if pending[key] > 0:
+                        pending[key] -= 1
+                    if not sum(pending.values()):
+                        break
             else:
                 break
 
-        return rsp_lines
\ No newline at end of file
+        if not rsp_lines:
+            self._measure(written, False)
+        if self.tracer:
+            self.tracer.emit(END)
+        return rsp_lines
@@ -0,0 +1,187 @@
+"""Shared polling engine for all configured NAD receivers."""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Callable
+
+import async_timeout
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import DEFAULT_MAX_CONCURRENT_POLLS, DEFAULT_POLL_DEADLINE
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+@dataclass
+class NADDevicePollMetrics:
+    """Poll statistics for a single receiver"""
+
+    polls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    last_duration: float | None = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+
+    @property
+    def mean_duration(self) -> float | None:
+        completed = self.polls - self.failures - self.timeouts
+        if completed <= 0:
+            return None
+        return self.total_duration / completed
+
+
+@dataclass
+class NADPollMetrics:
+    """Fleet-wide poll statistics"""
+
+    devices: dict[str, NADDevicePollMetrics] = field(default_factory=dict)
+    in_flight: int = 0
+    max_in_flight: int = 0
+    # Wall-clock span from the first poll start to the last poll end of
+    # the most recent set of overlapping polls
+    last_cycle_duration: float | None = None
+
+    def device(self, name: str) -> NADDevicePollMetrics:
+        if name not in self.devices:
+            self.devices[name] = NADDevicePollMetrics()
+        return self.devices[name]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "devices": len(self.devices),
+            "polls": sum(d.polls for d in self.devices.values()),
+            "failures": sum(d.failures for d in self.devices.values()),
+            "timeouts": sum(d.timeouts for d in self.devices.values()),
+            "skipped": sum(d.skipped for d in self.devices.values()),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "last_cycle_duration": self.last_cycle_duration,
+        }
+
+
+class NADPollingEngine:
+    """Run receiver refreshes concurrently with bounded parallelism.
+
+    Every config entry submits its blocking refresh through the one engine. Refreshes
+    run on a dedicated thread pool so that they neither wait on nor block Home
+    Assistant's shared executor, at most ``max_concurrent`` run at any one time,
+    and each is bounded by a per-device deadline so an offline receiver cannot
+    delay the others.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_POLLS,
+        deadline: float = DEFAULT_POLL_DEADLINE,
+    ) -> None:
+        self.hass = hass
+        self.max_concurrent = max_concurrent
+        self.deadline = deadline
+        self.metrics = NADPollMetrics()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="nad_remote_poll"
+        )
+        self._running: dict[str, asyncio.Future] = {}
+        self._cycle_start: float | None = None
+        self._users: set[str] = set()
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        """Change the concurrency limit; refreshes already running finish on the old pool"""
+        if max_concurrent == self.max_concurrent:
+            return
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        executor, self._executor = self._executor, ThreadPoolExecutor(
+            max_workers=max_concurrent, thread_name_prefix="nad_remote_poll"
+        )
+        executor.shutdown(wait=False)
+        _LOGGER.debug("polling up to %d receivers at once", max_concurrent)
+
+    def register(self, name: str) -> None:
+        """Register a receiver with the engine"""
+        self._users.add(name)
+        self.metrics.device(name)
+
+    def unregister(self, name: str) -> bool:
+        """Remove a receiver; returns True when no receivers remain"""
+        self._users.discard(name)
+        self.metrics.devices.pop(name, None)
+        return not self._users
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    async def async_poll(self, name: str, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking refresh for one receiver within its deadline"""
+        device = self.metrics.device(name)
+        running = self._running.get(name)
+        if running is not None and not running.done():
+            # Blocking I/O cannot be cancelled, so a timed-out refresh may still
+            # hold its thread; never stack another refresh behind it.
+            device.skipped += 1
+            raise UpdateFailed(f"{name}: previous refresh still running")
+
+        async with self._semaphore:
+            self._start_poll()
+            start = monotonic()
+            device.polls += 1
+            future = self.hass.loop.run_in_executor(self._executor, func, *args)
+            self._running[name] = future
+            try:
+                async with async_timeout.timeout(self.deadline):
+                    result = await asyncio.shield(future)
+            except asyncio.TimeoutError as e:
+                device.timeouts += 1
+                _LOGGER.warning("%s: refresh exceeded %.1fs deadline", name, self.deadline)
+                raise UpdateFailed(f"{name}: refresh timed out") from e
+            except UpdateFailed:
+                device.failures += 1
+                raise
+            except Exception as e:
+                device.failures += 1
+                raise UpdateFailed(f"{name}: {e}") from e
+            else:
+                duration = monotonic() - start
+                device.last_duration = duration
+                device.total_duration += duration
+                device.max_duration = max(device.max_duration, duration)
+                return result
+            finally:
+                self._end_poll()
+
+    async def async_read(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a short blocking read, such as a read back after a write, within the deadline
+
+        Reads share the concurrency limit with refreshes but are never skipped
+        and are not counted in the poll metrics.
+        """
+        async with self._semaphore:
+            future = self.hass.loop.run_in_executor(self._executor, func, *args)
+            try:
+                async with async_timeout.timeout(self.deadline):
+                    return await asyncio.shield(future)
+            except asyncio.TimeoutError as e:
+                raise UpdateFailed("read timed out") from e
+            except UpdateFailed:
+                raise
+            except Exception as e:
+                raise UpdateFailed(str(e)) from e
+
+    def _start_poll(self) -> None:
+        if self.metrics.in_flight == 0:
+            self._cycle_start = monotonic()
+        self.metrics.in_flight += 1
+        self.metrics.max_in_flight = max(self.metrics.max_in_flight, self.metrics.in_flight)
+
+    def _end_poll(self) -> None:
+        self.metrics.in_flight -= 1
+        if self.metrics.in_flight == 0 and self._cycle_start is not None:
+            self.metrics.last_cycle_duration = monotonic() - self._cycle_start
+            _LOGGER.debug("poll cycle complete: %s", self.metrics.as_dict())
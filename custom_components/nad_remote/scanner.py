@@ -0,0 +1,96 @@
+"""Subnet scan for NAD receivers that do not announce themselves over zeroconf."""
+import asyncio
+import ipaddress
+import logging
+import re
+from collections.abc import AsyncIterator, Iterable
+from contextlib import suppress
+
+from .const import DEFAULT_TELNET_PORT, SCAN_CONCURRENCY, SCAN_MAX_ADDRESSES, SCAN_TIMEOUT
+from .nad_receiver.nad_transport import split_frame
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+MODEL_QUERY = b"\nMain.Model?\r"
+
+
+class ScanRangeTooLarge(ValueError):
+    """The network range has more addresses than a scan will probe."""
+
+
+def scan_range(network: str) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
+    """Parse a CIDR range to scan; raises ValueError if it is invalid or too large"""
+    parsed = ipaddress.ip_network(network, strict=False)
+    if parsed.num_addresses > SCAN_MAX_ADDRESSES:
+        raise ScanRangeTooLarge(f"{network} has more than {SCAN_MAX_ADDRESSES} addresses")
+    return parsed
+
+
+async def async_probe(host: str, port: int, timeout: float = SCAN_TIMEOUT) -> str | None:
+    """Return the model of the NAD receiver at host:port, or None if there is none"""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        # Some firmwares greet with their model, the others answer the query
+        writer.write(MODEL_QUERY)
+        buffer = b""
+        while (remaining := deadline - loop.time()) > 0:
+            data = await asyncio.wait_for(reader.read(1024), remaining)
+            if not data:
+                break
+            *lines, buffer = re.split(rb"[\r\n]", buffer + data)
+            for line in lines:
+                key, value = split_frame(line.decode(errors="replace").strip())
+                if key == "Main.Model" and value and re.match(r"^\w+\d+", value):
+                    return value
+    except (OSError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+        with suppress(OSError):
+            await writer.wait_closed()
+    return None
+
+
+async def async_scan(
+    network: str,
+    ports: Iterable[int] = (DEFAULT_TELNET_PORT,),
+    concurrency: int = SCAN_CONCURRENCY,
+    timeout: float = SCAN_TIMEOUT,
+) -> AsyncIterator[tuple[str, int, str]]:
+    """Probe every port of every host in a CIDR range, e.g. '192.168.1.0/24'.
+
+    Yields (host, port, model) for each receiver as soon as it answers, with
+    at most concurrency probes open at once. Raises ValueError if network is
+    not a valid range, and ScanRangeTooLarge if it is larger than a /22.
+    """
+    hosts = scan_range(network).hosts()
+    targets = ((str(host), port) for host in hosts for port in ports)
+    found: asyncio.Queue[tuple[str, int, str] | None] = asyncio.Queue()
+
+    async def worker() -> None:
+        # Workers share the one iterator, so each target is probed once
+        for host, port in targets:
+            model = await async_probe(host, port, timeout)
+            if model is not None:
+                _LOGGER.debug("scan found %s at %s:%d", model, host, port)
+                await found.put((host, port, model))
+
+    async def run() -> None:
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            await found.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while (result := await found.get()) is not None:
+            yield result
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
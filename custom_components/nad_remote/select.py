@@ -0,0 +1,48 @@
+"""Select Platform for NAD Remote"""
+import logging
+
+from homeassistant.components.select import SelectEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SELECT_PROPERTIES
+from .entity import NADPropertyEntity
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Setup Select platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    keys = [key for key in coordinator.properties if key in SELECT_PROPERTIES]
+    _LOGGER.debug("NAD selects: %s", ", ".join(keys))
+    async_add_entities(
+        NADPropertySelect(coordinator, config_entry, key, *SELECT_PROPERTIES[key]) for key in keys
+    )
+
+
+class NADPropertySelect(NADPropertyEntity, SelectEntity):
+    """Receiver property with a fixed set of values"""
+
+    def __init__(self, coordinator, config_entry, key: str, name: str, options: list[str]):
+        super().__init__(coordinator, config_entry, key, name)
+        self._options = options
+
+    @property
+    def options(self) -> list[str]:
+        value = self.value
+        if value is not None and value not in self._options:
+            return [*self._options, value]
+        return self._options
+
+    @property
+    def current_option(self) -> str | None:
+        return self.value
+
+    async def async_select_option(self, option: str) -> None:
+        await self.coordinator.async_set_property(self.key, option)
@@ -0,0 +1,34 @@
+"""Sensor Platform for NAD Remote"""
+import logging
+
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SENSOR_PROPERTIES
+from .entity import NADPropertyEntity
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Setup Sensor platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    keys = [key for key in coordinator.properties if key in SENSOR_PROPERTIES]
+    _LOGGER.debug("NAD sensors: %s", ", ".join(keys))
+    async_add_entities(
+        NADPropertySensor(coordinator, config_entry, key, SENSOR_PROPERTIES[key]) for key in keys
+    )
+
+
+class NADPropertySensor(NADPropertyEntity, SensorEntity):
+    """Read-only receiver property"""
+
+    @property
+    def native_value(self):
+        return self.value
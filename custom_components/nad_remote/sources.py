@@ -0,0 +1,107 @@
+"""Indexed table of NAD receiver sources."""
+import logging
+import re
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Keys in the status_all capability dump, e.g. 'source3_name'
+CAPABILITY_REGEX = re.compile(r"source(\d+)_(name|enabled)")
+# Keys in frames from the receiver, e.g. 'Source3.Name'
+FRAME_REGEX = re.compile(r"Source(\d+)\.(Name|Enabled)", re.IGNORECASE)
+
+
+class NADSourceTable:
+    """Source names and ids indexed both ways.
+
+    The table is built once from the capability dump and then updated one
+    source at a time. Every change bumps ``version``; ``source_list`` is an
+    immutable tuple rebuilt only after a change, so polls share one object.
+    """
+
+    def __init__(self, capabilities: dict | None = None) -> None:
+        self.version = 0
+        self._names: dict[int, str] = {}
+        self._enabled: dict[int, bool] = {}
+        self._ids: dict[str, int] = {}
+        self._source_list: tuple[str, ...] | None = None
+        if capabilities:
+            self.load(capabilities)
+
+    def load(self, capabilities: dict) -> None:
+        """Replace the table with the sources in a capability dump"""
+        self._names = {}
+        self._enabled = {}
+        for key, value in capabilities.items():
+            match = CAPABILITY_REGEX.fullmatch(key)
+            if match is None:
+                continue
+            source_id = int(match.group(1))
+            if match.group(2) == "name":
+                self._names[source_id] = value
+            else:
+                self._enabled[source_id] = value != "No"
+        self._changed()
+        _LOGGER.debug("source table version %d: %s", self.version, self.source_list)
+
+    def _changed(self) -> None:
+        self._ids = {name: source_id for source_id, name in self._names.items()}
+        self._source_list = None
+        self.version += 1
+
+    @property
+    def source_ids(self) -> list[int]:
+        return sorted(self._names.keys() | self._enabled.keys())
+
+    @property
+    def source_list(self) -> tuple[str, ...]:
+        """Names of enabled sources in source id order"""
+        if self._source_list is None:
+            self._source_list = tuple(
+                self._names[source_id]
+                for source_id in self.source_ids
+                if self._enabled.get(source_id, True) and source_id in self._names
+            )
+        return self._source_list
+
+    def name(self, source_id: int) -> str | None:
+        """Return the name of an enabled source"""
+        if not self._enabled.get(source_id, True):
+            return None
+        return self._names.get(source_id)
+
+    def id(self, name: str) -> int | None:
+        return self._ids.get(name)
+
+    def __contains__(self, source_id: int) -> bool:
+        return source_id in self._names
+
+    def update(self, source_id: int, name: str | None = None, enabled: bool | None = None) -> bool:
+        """Update one source; returns True if anything changed"""
+        changed = False
+        if name is not None and self._names.get(source_id) != name:
+            self._names[source_id] = name
+            changed = True
+        if enabled is not None and self._enabled.get(source_id) != enabled:
+            self._enabled[source_id] = enabled
+            changed = True
+        if changed:
+            self._changed()
+            _LOGGER.debug("source table version %d: %s", self.version, self.source_list)
+        return changed
+
+    def update_from_frame(self, key: str, value: str | None) -> bool:
+        """Apply a 'SourceN.Name' or 'SourceN.Enabled' frame; returns True if it was one"""
+        match = FRAME_REGEX.fullmatch(key)
+        if match is None or value is None:
+            return False
+        source_id = int(match.group(1))
+        if match.group(2).lower() == "name":
+            self.update(source_id, name=value)
+        else:
+            self.update(source_id, enabled=value != "No")
+        return True
+
+    @staticmethod
+    def query_frames(source_id: int) -> list[str]:
+        """Frames for a targeted query of one source"""
+        return [f"Source{source_id}.Name?", f"Source{source_id}.Enabled?"]
@@ -0,0 +1,40 @@
+"""Persistent per-receiver cache for NAD Amplifer remote control."""
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, STORAGE_VERSION
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class NADStore:
+    """Cache of slow-to-discover receiver properties, one file per config entry.
+
+    Each value is saved with the receiver model it was discovered on so that a
+    different receiver behind the same entry does not reuse stale results.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        self._data = await self._store.async_load() or {}
+
+    def get(self, key: str, model: str | None) -> Any:
+        """Return a cached value if it was saved for the same model"""
+        item = self._data.get(key)
+        if item is None or item.get("model") != model:
+            return None
+        return item["value"]
+
+    async def async_set(self, key: str, model: str | None, value: Any) -> None:
+        self._data[key] = {"model": model, "value": value}
+        await self._store.async_save(self._data)
+        _LOGGER.debug("saved %s for model %s", key, model)
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
@@ -0,0 +1,42 @@
+"""Switch Platform for NAD Remote"""
+import logging
+from typing import Any
+
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SWITCH_PROPERTIES
+from .entity import NADPropertyEntity
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Setup Switch platform."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    keys = [key for key in coordinator.properties if key in SWITCH_PROPERTIES]
+    _LOGGER.debug("NAD switches: %s", ", ".join(keys))
+    async_add_entities(
+        NADPropertySwitch(coordinator, config_entry, key, SWITCH_PROPERTIES[key]) for key in keys
+    )
+
+
+class NADPropertySwitch(NADPropertyEntity, SwitchEntity):
+    """On/Off receiver property"""
+
+    @property
+    def is_on(self) -> bool | None:
+        value = self.value
+        return None if value is None else value == "On"
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        await self.coordinator.async_set_property(self.key, "On")
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        await self.coordinator.async_set_property(self.key, "Off")
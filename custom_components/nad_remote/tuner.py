@@ -0,0 +1,97 @@
+"""Tuner state and preset map for NAD receivers."""
+import logging
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+BANDS = ("FM", "AM")
+
+
+class NADTuner:
+    """Tuner band, frequencies and preset map, kept current from pushed frames.
+
+    Presets map each band to ``{preset: frequency}`` and are exposed as source
+    names such as 'FM 98.5'. The map is filled once by a scan and then only
+    read, so resolving the current preset needs no round trip.
+    """
+
+    def __init__(self, capabilities: dict | None = None) -> None:
+        capabilities = capabilities or {}
+        self.band: str | None = capabilities.get("tuner_band")
+        self.frequency: dict[str, str | None] = {
+            band: capabilities.get(f"tuner_{band.lower()}_frequency") for band in BANDS
+        }
+        self.bands = [band for band in BANDS if f"tuner_{band.lower()}_preset" in capabilities]
+        # Preset each band was on when the capabilities were read
+        self.preset_now: dict[str, str | None] = {
+            band: capabilities.get(f"tuner_{band.lower()}_preset") for band in self.bands
+        }
+        self.presets: dict[str, dict[str, str]] = {}
+        self._names: dict[str, tuple[str, str]] = {}
+        self._source_names: tuple[str, ...] = ()
+
+    @property
+    def present(self) -> bool:
+        return bool(self.bands)
+
+    @property
+    def source_names(self) -> tuple[str, ...]:
+        """Preset source names in band and preset order"""
+        return self._source_names
+
+    def set_presets(self, presets: dict[str, dict[str, str]]) -> None:
+        """Use a scanned or stored preset map"""
+        self.presets = {band: dict(presets[band]) for band in BANDS if band in presets}
+        self._names = {}
+        for band, band_presets in self.presets.items():
+            for preset, frequency in band_presets.items():
+                # The first preset for a station wins
+                self._names.setdefault(f"{band} {frequency}", (band, preset))
+        self._source_names = tuple(self._names)
+        _LOGGER.debug("tuner presets: %s", self._source_names)
+
+    def matches(self, presets: dict[str, dict[str, str]]) -> bool:
+        """Whether a stored preset map was scanned from a tuner like this one
+
+        The bands must be the same, and a band's current preset must be in
+        its map, unless the scan found nothing for that band.
+        """
+        if set(presets) != set(self.bands):
+            return False
+        return all(
+            not presets[band] or self.preset_now[band] in (None, *presets[band])
+            for band in self.bands
+        )
+
+    def preset(self, name: str) -> tuple[str, str] | None:
+        """Return (band, preset) for a preset source name"""
+        return self._names.get(name)
+
+    def current_name(self) -> str | None:
+        """Source name of the station playing now, if it is a preset"""
+        if self.band is None:
+            return None
+        name = f"{self.band} {self.frequency.get(self.band)}"
+        return name if name in self._names else None
+
+    def select(self, name: str) -> None:
+        """Record that a preset was selected"""
+        band, preset = self._names[name]
+        self.band = band
+        self.frequency[band] = self.presets[band][preset]
+
+    def query_frames(self) -> list[str]:
+        """Frames that read the band and every band's frequency"""
+        return ["Tuner.Band?"] + [f"Tuner.{band}.Frequency?" for band in self.bands]
+
+    def update_from_frame(self, key: str, value: str | None) -> bool:
+        """Apply a 'Tuner.Band' or 'Tuner.XX.Frequency' frame; returns True if it was one"""
+        if value is None:
+            return False
+        if key == "Tuner.Band":
+            self.band = value
+            return True
+        for band in BANDS:
+            if key == f"Tuner.{band}.Frequency":
+                self.frequency[band] = value
+                return True
+        return False
@@ -1 +1,55 @@
 """Global fixtures for NAD Amplifer remote control integration."""
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.nad_remote.nad_receiver.nad_fake_transport import (
+    FakeNADTransport,
+    load_profile,
+)
+
+TELNET_TRANSPORT = "custom_components.nad_remote.nad_receiver.nad_transport.TelnetTransportWrapper"
+
+
+class CountingTransport(FakeNADTransport):
+    """A fake receiver that records every batch it is sent."""
+
+    def __init__(self, profile: str = "T787") -> None:
+        super().__init__(load_profile(profile))
+        self.batches: List[List[str]] = []
+
+    def communicate(self, command: str) -> str:
+        self.batches.append([command])
+        return super().communicate(command)
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        self.batches.append(list(cmds))
+        return super().communicate_multiline(cmds)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+def fake_receiver():
+    """Connect to a fake T787 instead of a receiver on the network."""
+    transport = CountingTransport()
+    with patch(TELNET_TRANSPORT, lambda host, port, timeout: transport):
+        yield transport
+
+
+@pytest.fixture
+def bypass_get_data(fake_receiver):
+    """Set up against the fake receiver."""
+    yield
+
+
+@pytest.fixture
+def error_on_get_data():
+    """Fail to connect to the receiver."""
+    with patch(TELNET_TRANSPORT, side_effect=OSError("Connection refused")):
+        yield
@@ -0,0 +1,221 @@
+"""Soak test harness: many simulated receivers on the real integration stack.
+
+Each receiver is a fake built from a device profile that answers after a
+configurable latency, drops a share of batches and drifts its volume so
+that polls change state. The receivers are set up as config entries, so
+the real coordinators, polling engine and entities run on the event loop
+while the harness measures:
+
+- event loop lag, from a task that sleeps for a fixed tick and records how
+  late it wakes up
+- poll durations and failures, from the shared polling engine
+- memory growth over the run, from tracemalloc
+- the rate of state writes, from state_changed events
+
+Run a longer soak with, for example,
+NAD_SOAK_SECONDS=300 NAD_SOAK_RECEIVERS=32 pytest tests/test_soak.py, and set
+NAD_SOAK_REPORT to a path to save the report as JSON for comparison between
+releases.
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import Any, List
+from unittest.mock import patch
+
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.nad_remote.const import DATA_POLLER, DOMAIN
+from custom_components.nad_remote.nad_receiver.nad_fake_transport import (
+    FakeNADTransport,
+    load_profile,
+)
+
+TELNET_TRANSPORT = "custom_components.nad_remote.nad_receiver.nad_transport.TelnetTransportWrapper"
+
+
+@dataclass
+class SoakConfig:
+    """Shape of a soak run"""
+
+    receivers: int = 8
+    duration: float = 2.0
+    poll_interval: float = 0.2
+    # Seconds each batch takes to answer and the share of batches that go unanswered
+    latency: float = 0.01
+    failure_rate: float = 0.05
+    # Share of batches after which the receiver's volume has moved
+    change_rate: float = 0.5
+    profile: str = "T787"
+    lag_tick: float = 0.01
+    seed: int = 0
+
+
+@dataclass
+class SoakReport:
+    """Measurements from a soak run"""
+
+    config: SoakConfig
+    elapsed: float = 0.0
+    entities: int = 0
+    loop_lag_p50: float = 0.0
+    loop_lag_p95: float = 0.0
+    loop_lag_p99: float = 0.0
+    loop_lag_max: float = 0.0
+    polls: int = 0
+    poll_failures: int = 0
+    poll_timeouts: int = 0
+    poll_skipped: int = 0
+    poll_mean: float | None = None
+    poll_max: float = 0.0
+    dropped_batches: int = 0
+    memory_start: int = 0
+    memory_end: int = 0
+    memory_peak: int = 0
+    state_writes: int = 0
+
+    @property
+    def memory_growth(self) -> int:
+        return self.memory_end - self.memory_start
+
+    @property
+    def state_write_rate(self) -> float:
+        return self.state_writes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        report = asdict(self)
+        report["memory_growth"] = self.memory_growth
+        report["state_write_rate"] = self.state_write_rate
+        return report
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+class SimulatedReceiver(FakeNADTransport):
+    """A profile-driven fake receiver with latency, dropped batches and a drifting volume."""
+
+    def __init__(self, config: SoakConfig, rng: random.Random) -> None:
+        super().__init__(load_profile(config.profile))
+        self.config = config
+        self.rng = rng
+        self.dropped = 0
+        # Batches are only dropped once set up, as a setup poll without any reply
+        # leaves the entry to be retried
+        self.dropping = False
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        # Runs on a polling engine thread, as a blocking read would
+        time.sleep(self.config.latency)
+        if self.dropping and self.rng.random() < self.config.failure_rate:
+            self.dropped += 1
+            return []
+        if self.rng.random() < self.config.change_rate:
+            self._reply(self.rng.choice(["Main.Volume+", "Main.Volume-"]))
+        return super().communicate_multiline(cmds)
+
+
+class LoopLagMonitor:
+    """Records how late a task sleeping for a fixed tick wakes up"""
+
+    def __init__(self, tick: float) -> None:
+        self.tick = tick
+        self.lags: List[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.tick)
+            self.lags.append(max(0.0, loop.time() - start - self.tick))
+
+    def percentile(self, percent: float) -> float:
+        if not self.lags:
+            return 0.0
+        if len(self.lags) == 1:
+            return self.lags[0]
+        return statistics.quantiles(self.lags, n=100, method="inclusive")[int(percent) - 1]
+
+
+async def async_run_soak(hass: HomeAssistant, config: SoakConfig) -> SoakReport:
+    """Set up config.receivers simulated receivers, run them for config.duration and report"""
+    rng = random.Random(config.seed)
+    receivers = {f"receiver{i}": SimulatedReceiver(config, rng) for i in range(config.receivers)}
+    report = SoakReport(config=config)
+    writes = 0
+
+    def count_write(event) -> None:
+        nonlocal writes
+        writes += 1
+
+    entries = []
+    with patch(TELNET_TRANSPORT, lambda host, port, timeout: receivers[host]), patch(
+        "custom_components.nad_remote.SCAN_INTERVAL", timedelta(seconds=config.poll_interval)
+    ):
+        for host in receivers:
+            entry = MockConfigEntry(
+                domain=DOMAIN,
+                data={CONF_HOST: host, CONF_PORT: 23, CONF_NAME: f"NAD {host}"},
+                entry_id=host,
+            )
+            entry.add_to_hass(hass)
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            entries.append(entry)
+        await hass.async_block_till_done()
+        report.entities = len(hass.states.async_entity_ids())
+        for receiver in receivers.values():
+            receiver.dropping = True
+
+        tracemalloc.start()
+        report.memory_start = tracemalloc.get_traced_memory()[0]
+        monitor = LoopLagMonitor(config.lag_tick)
+        remove_listener = hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+        monitor.start()
+        start = time.monotonic()
+        await asyncio.sleep(config.duration)
+        report.elapsed = time.monotonic() - start
+        await monitor.stop()
+        remove_listener()
+        report.memory_end, report.memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Unloading drops each receiver's poll metrics
+        devices = list(hass.data[DATA_POLLER].metrics.devices.values())
+        for entry in entries:
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    report.loop_lag_p50 = monitor.percentile(50)
+    report.loop_lag_p95 = monitor.percentile(95)
+    report.loop_lag_p99 = monitor.percentile(99)
+    report.loop_lag_max = max(monitor.lags, default=0.0)
+    report.polls = sum(device.polls for device in devices)
+    report.poll_failures = sum(device.failures for device in devices)
+    report.poll_timeouts = sum(device.timeouts for device in devices)
+    report.poll_skipped = sum(device.skipped for device in devices)
+    completed = report.polls - report.poll_failures - report.poll_timeouts
+    if completed > 0:
+        report.poll_mean = sum(device.total_duration for device in devices) / completed
+    report.poll_max = max((device.max_duration for device in devices), default=0.0)
+    report.dropped_batches = sum(receiver.dropped for receiver in receivers.values())
+    report.state_writes = writes
+    return report
@@ -1,14 +1,32 @@
 """Tests for NAD Home Assistant API."""
 
 import asyncio
+import threading
+import time
 import pytest
 
-from datetime import timezone
+from datetime import timedelta, timezone
 from unittest.mock import patch, MagicMock
 
 from homeassistant.components.media_player import MediaPlayerState
+import homeassistant.util.dt as dt_util
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from custom_components.nad_remote import NADDataUpdateCoordinator
 from custom_components.nad_remote.api import NADApiClient
-from custom_components.nad_remote.const import ZONE2_NAME, MAIN_NAME
+from custom_components.nad_remote.const import (
+    MAIN_NAME,
+    STORAGE_TUNER_PRESETS,
+    WRITE_FIELDS,
+    ZONE2_NAME,
+)
+from custom_components.nad_remote.nad_receiver.nad_fake_transport import (
+    FakeNADTransport,
+    load_profile,
+)
+from custom_components.nad_remote.nad_receiver.nad_trace import TraceBuffer
+from custom_components.nad_remote.poller import NADPollingEngine
+from custom_components.nad_remote.store import NADStore
 from .const import MOCK_HOSTNAME, MOCK_MODEL, MOCK_MODEL, MOCK_STATUS_ALL, MOCK_STATUS_ONE_ZONE
 
 MOCK_RX_STATE = {
@@ -31,53 +49,18 @@ def mock_rx_func(name: str, op: str, arg: str):
         MOCK_RX_STATE[name] = arg
 
 
-def mock_main_mute(op: str, arg: str = None):
-    return mock_rx_func("main_mute", op, arg)
-
-
-def mock_zone2_mute(op: str, arg: str = None):
-    return mock_rx_func("zone2_mute", op, arg)
-
-
-def mock_main_power(op: str, arg: str = None):
-    return mock_rx_func("main_power", op, arg)
-
-
-def mock_zone2_power(op: str, arg: str = None):
-    return mock_rx_func("zone2_power", op, arg)
-
-
-def mock_main_source(op: str, arg: str = None):
-    return mock_rx_func("main_source", op, arg)
-
-
-def mock_main_volume(op: str, arg: str = None):
-    return mock_rx_func("main_volume", op, arg)
+def mock_exec_command(domain: str, function: str, op: str, arg: str = None):
+    return mock_rx_func(f"{domain}_{function}", op, arg)
 
 
 def mock_main_listeningmode(op: str, arg: str = None):
     return mock_rx_func("main_listeningmode", op, arg)
 
 
-def mock_zone2_source(op: str, arg: str = None):
-    return mock_rx_func("zone2_source", op, arg)
-
-
-def mock_zone2_volume(op: str, arg: str = None):
-    return mock_rx_func("zone2_volume", op, arg)
-
-
 MOCK_MAP = {
     "main_model": MagicMock(return_value=MOCK_MODEL),
-    "main_mute": MagicMock(side_effect=mock_main_mute),
-    "main_power": MagicMock(side_effect=mock_main_power),
-    "main_source": MagicMock(side_effect=mock_main_source),
-    "main_volume": MagicMock(side_effect=mock_main_volume),
     "main_listeningmode": MagicMock(side_effect=mock_main_listeningmode),
-    "zone2_mute": MagicMock(side_effect=mock_zone2_mute),
-    "zone2_power": MagicMock(side_effect=mock_zone2_power),
-    "zone2_source": MagicMock(side_effect=mock_zone2_source),
-    "zone2_volume": MagicMock(side_effect=mock_zone2_volume),
+    "exec_command": MagicMock(side_effect=mock_exec_command),
 }
 
 
@@ -87,7 +70,7 @@ async def test_api(hass):
     with patch.multiple(
         "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
         status_all=MagicMock(return_value=MOCK_STATUS_ALL),
-        **MOCK_MAP
+        **MOCK_MAP,
     ):
         api = NADApiClient(MOCK_HOSTNAME, 23)
         assert api.get_model() == MOCK_MODEL
@@ -126,7 +109,7 @@ async def test_api_single_zone(hass):
     with patch.multiple(
         "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
         status_all=MagicMock(return_value=MOCK_STATUS_ONE_ZONE),
-        **MOCK_MAP
+        **MOCK_MAP,
     ):
         api = NADApiClient(MOCK_HOSTNAME, 23)
         assert api.get_model() == MOCK_MODEL
@@ -138,3 +121,523 @@ async def test_api_single_zone(hass):
         assert api.get_power_state(MAIN_NAME) == MediaPlayerState.ON
         api.set_source(MAIN_NAME, "Test Source 1")
         assert api.get_source(MAIN_NAME) == "Test Source 1"
+
+
+@pytest.mark.asyncio
+async def test_api_step_volume(hass):
+    """Test relative volume steps are sent as one burst."""
+    exec_commands = MagicMock(return_value={"Main.Volume": "-30.0", "Zone2.Volume": "-30.0"})
+    with patch.multiple(
+        "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
+        status_all=MagicMock(return_value=MOCK_STATUS_ALL),
+        exec_commands=exec_commands,
+        **MOCK_MAP,
+    ):
+        api = NADApiClient(MOCK_HOSTNAME, 23)
+        assert round(api.step_volume(MAIN_NAME, 3), 2) == 0.63
+        exec_commands.assert_called_once_with([["main", "volume", "+"]] * 3)
+        exec_commands.reset_mock()
+        api.step_volume(ZONE2_NAME, -2)
+        exec_commands.assert_called_once_with([["zone2", "volume", "-"]] * 2)
+
+
+@pytest.mark.asyncio
+async def test_api_source_table(hass):
+    """Test the source list is cached and updated from notifications."""
+    with patch.multiple(
+        "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
+        status_all=MagicMock(return_value=MOCK_STATUS_ALL),
+        exec_frames=MagicMock(return_value={"Source5.Enabled": "Yes", "Source5.Name": "Tuner"}),
+        **MOCK_MAP,
+    ):
+        api = NADApiClient(MOCK_HOSTNAME, 23)
+        sources = api.get_sources()
+        assert sources == ("Test Source 1", "Test Source 2")
+        assert api.get_sources() is sources
+
+        # A rename pushed by the receiver updates the table in place
+        api._receiver._notify("Source2.Name=Renamed")
+        assert api.get_sources() == ("Test Source 1", "Renamed")
+        api.set_source(MAIN_NAME, "Renamed")
+        assert api.get_source(MAIN_NAME) == "Renamed"
+
+        # An unknown source is fetched with a targeted query
+        MOCK_RX_STATE["main_source"] = 5
+        assert api.get_source(MAIN_NAME) == "Tuner"
+        assert api.get_sources() == ("Test Source 1", "Renamed", "Tuner")
+        MOCK_RX_STATE["main_source"] = 1
+
+
+@pytest.mark.asyncio
+async def test_api_listening_modes(hass):
+    """Test listening modes are discovered by cycling and the current mode restored."""
+    modes = ["Stereo", "EARS", "PLIIMovie"]
+
+    def cycle(op: str, arg: str = None):
+        if op == "+":
+            current = modes.index(MOCK_RX_STATE["main_listeningmode"])
+            MOCK_RX_STATE["main_listeningmode"] = modes[(current + 1) % len(modes)]
+            return MOCK_RX_STATE["main_listeningmode"]
+        return mock_rx_func("main_listeningmode", op, arg)
+
+    with patch.multiple(
+        "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
+        status_all=MagicMock(return_value={**MOCK_STATUS_ALL, "main_listeningmode": "Stereo"}),
+        **{**MOCK_MAP, "main_listeningmode": MagicMock(side_effect=cycle)},
+    ):
+        api = NADApiClient(MOCK_HOSTNAME, 23)
+        assert not api.listening_modes_discovered
+        assert api.get_listening_mode(MAIN_NAME) is None
+        MOCK_RX_STATE["main_listeningmode"] = "EARS"
+        assert api.discover_listening_modes() == ["EARS", "PLIIMovie", "Stereo"]
+        assert api.listening_modes_discovered
+        assert MOCK_RX_STATE["main_listeningmode"] == "EARS"
+        api.set_listening_mode(MAIN_NAME, "Stereo")
+        assert api.get_listening_mode(MAIN_NAME) == "Stereo"
+        assert api.get_listening_mode(ZONE2_NAME) is None
+
+
+@pytest.mark.asyncio
+async def test_api_apply_state(hass):
+    """Test a multi-zone scene is translated to one write and confirmed."""
+    apply_state = MagicMock(
+        return_value={
+            "Main.Power": "On",
+            "Main.Source": "2",
+            "Main.Volume": "-42.5",
+            "Zone2.Mute": "On",
+        }
+    )
+    with patch.multiple(
+        "custom_components.nad_remote.nad_receiver.NADReceiverTelnet",
+        status_all=MagicMock(return_value=MOCK_STATUS_ALL),
+        apply_state=apply_state,
+        **MOCK_MAP,
+    ):
+        api = NADApiClient(MOCK_HOSTNAME, 23)
+        confirmed = api.apply_state(
+            {
+                MAIN_NAME: {
+                    "power_state": MediaPlayerState.ON,
+                    "source": "Test Source 2",
+                    "volume_level": 0.5,
+                },
+                ZONE2_NAME: {"is_volume_muted": True},
+            }
+        )
+        apply_state.assert_called_once_with(
+            {"main": {"power": "On", "source": 2, "volume": -43}, "zone2": {"mute": "On"}}
+        )
+        assert confirmed[MAIN_NAME]["power_state"] == MediaPlayerState.ON
+        assert confirmed[MAIN_NAME]["source"] == "Test Source 2"
+        assert round(confirmed[MAIN_NAME]["volume_level"], 1) == 0.5
+        assert confirmed[ZONE2_NAME] == {"is_volume_muted": True}
+
+
+def fake_api(profile: str = "T787", capabilities: dict | None = None) -> NADApiClient:
+    with patch(
+        "custom_components.nad_remote.nad_receiver.nad_transport.TelnetTransportWrapper",
+        lambda host, port, timeout: FakeNADTransport(load_profile(profile)),
+    ):
+        return NADApiClient(MOCK_HOSTNAME, 23, capabilities=capabilities)
+
+
+@pytest.mark.asyncio
+async def test_api_fake_profile(hass):
+    """Test the API against a fake T787 built from its device profile."""
+    api = fake_api()
+    assert api.get_model() == "T787"
+    assert api.has_zone2
+    assert api.get_sources() == ("BluOS", "Blu-ray", "Game", "TV", "Tuner")
+    assert api.get_power_state(MAIN_NAME) == MediaPlayerState.ON
+    assert api.get_power_state(ZONE2_NAME) == MediaPlayerState.OFF
+    api.power(ZONE2_NAME, MediaPlayerState.ON)
+    assert api.get_power_state(ZONE2_NAME) == MediaPlayerState.ON
+    api.set_source(ZONE2_NAME, "Tuner")
+    assert api.get_source(ZONE2_NAME) == "Tuner"
+    api.set_volume_level(MAIN_NAME, 0.5)
+    assert round(api.get_volume_level(MAIN_NAME), 1) == 0.5
+    assert api.discover_listening_modes() == [
+        "Stereo",
+        "EARS",
+        "ProLogic",
+        "PLIIMovie",
+        "PLIIMusic",
+        "DolbySurround",
+        "None",
+    ]
+    assert api.get_listening_mode(MAIN_NAME) == "Stereo"
+
+
+@pytest.mark.asyncio
+async def test_coordinator_properties(hass):
+    """Test secondary properties are read in one batch and updated by push."""
+    api = fake_api()
+    coordinator = NADDataUpdateCoordinator(hass, client=api)
+    assert coordinator.properties == [
+        "Main.Audio.CODEC",
+        "Main.Sleep",
+        "Tuner.FM.Frequency",
+        "Tuner.AM.Frequency",
+        "Main.Video.ARC",
+        "Tuner.FM.Mute",
+        "Main.Dimmer",
+        "Tuner.Band",
+    ]
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+    await coordinator.async_refresh()
+    assert coordinator.data.properties == {
+        "Main.Audio.CODEC": "PCM",
+        "Main.Sleep": "0",
+        "Tuner.FM.Frequency": "98.5",
+        "Tuner.AM.Frequency": "1000",
+        "Main.Video.ARC": "Off",
+        "Tuner.FM.Mute": "Off",
+        "Main.Dimmer": "2",
+        "Tuner.Band": "FM",
+    }
+    # Properties are read in the one poll batch; tuner frequencies are pushed, so not polled
+    batches = [e.data for e in trace.events() if e.event == "command"]
+    assert len(batches) == 1
+    assert {f"{key}?" for key in coordinator.properties} - set(batches[0]) == {
+        "Tuner.FM.Frequency?",
+        "Tuner.AM.Frequency?",
+    }
+
+    await coordinator.async_set_property("Main.Video.ARC", "On")
+    assert coordinator.data.properties["Main.Video.ARC"] == "On"
+
+    await hass.async_add_executor_job(api._receiver._notify, "Tuner.Band=AM")
+    await hass.async_block_till_done()
+    assert coordinator.data.properties["Tuner.Band"] == "AM"
+
+
+@pytest.mark.asyncio
+async def test_api_tuner_presets(hass):
+    """Test presets are scanned once, offered as sources and tracked by push."""
+    api = fake_api()
+    assert api.has_tuner
+    assert api.discover_tuner_presets() == {
+        "FM": {"1": "98.5", "2": "101.1", "3": "88.2", "4": "104.9", "5": "98.5"},
+        "AM": {"1": "1000", "2": "1530", "3": "720"},
+    }
+    assert api._receiver.tuner_band("?") == "FM"
+    assert api._receiver.tuner_fm_preset("?") == "1"
+    assert api.get_sources()[5:] == (
+        "FM 98.5",
+        "FM 101.1",
+        "FM 88.2",
+        "FM 104.9",
+        "AM 1000",
+        "AM 1530",
+        "AM 720",
+    )
+
+    api.set_source(MAIN_NAME, "AM 1530")
+    assert api.get_source(MAIN_NAME) == "AM 1530"
+    api._receiver._notify("Tuner.AM.Frequency=720")
+    assert api.get_source(MAIN_NAME) == "AM 720"
+    api._receiver._notify("Tuner.AM.Frequency=999")
+    assert api.get_source(MAIN_NAME) == "Tuner"
+
+
+@pytest.mark.asyncio
+async def test_coordinator_tuner_presets_stored(hass):
+    """Test the preset scan runs once and its result is stored."""
+    api = fake_api()
+    store = NADStore(hass, "test")
+    coordinator = NADDataUpdateCoordinator(hass, client=api, store=store)
+    await coordinator.async_refresh()
+    # The scan waits for the poll after the first
+    assert store.get(STORAGE_TUNER_PRESETS, "T787") is None
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert store.get(STORAGE_TUNER_PRESETS, "T787") == api.tuner_presets
+    assert "FM 101.1" in coordinator.data.source_list
+
+    api = fake_api()
+    api.set_tuner_presets(store.get(STORAGE_TUNER_PRESETS, "T787"))
+    coordinator = NADDataUpdateCoordinator(hass, client=api, store=store)
+    with patch.object(api, "discover_tuner_presets") as discover:
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+    discover.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_api_cached_capabilities_sources(hass):
+    """Test a cached dump's source table is read again with the first poll."""
+    cached = {**fake_api().get_capabilities(), "source1_name": "Old", "source2_enabled": "No"}
+    api = fake_api(capabilities=cached)
+    assert api.capabilities_cached
+    assert api.get_sources()[0] == "Old"
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+    state, _ = api.get_state()
+    batches = [e.data for e in trace.events() if e.event == "command"]
+    assert len(batches) == 1
+    assert {"Source1.Name?", "Source2.Enabled?"} <= set(batches[0])
+    assert api.get_sources()[:2] == ("BluOS", "Blu-ray")
+    assert state[MAIN_NAME]["source"] == "BluOS"
+
+    # Later polls do not read the table
+    trace.clear()
+    api.get_state()
+    assert "Source1.Name?" not in [e.data for e in trace.events() if e.event == "command"][0]
+
+
+@pytest.mark.asyncio
+async def test_coordinator_tuner_scan_once(hass):
+    """Test a failed preset scan is stored empty and only rescanned when asked or changed."""
+    api = fake_api()
+    store = NADStore(hass, "test")
+    coordinator = NADDataUpdateCoordinator(hass, client=api, store=store)
+    with patch.object(api, "_scan_tuner_presets", return_value=None) as scan:
+        for _ in range(3):
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+    scan.assert_called_once()
+    empty = {band: {} for band in api._tuner.bands}
+    assert store.get(STORAGE_TUNER_PRESETS, "T787") == empty
+
+    # The stored result is used, unless the tuner has other bands now
+    api = fake_api()
+    assert api.set_tuner_presets(empty)
+    assert api.tuner_presets_attempted
+    api = fake_api()
+    assert not api.set_tuner_presets({"FM": {}})
+    # A preset the map has not seen means presets were added since the scan
+    assert not api.set_tuner_presets({"FM": {"2": "98.5"}, "AM": {}})
+    assert not api.tuner_presets_attempted
+
+    coordinator = NADDataUpdateCoordinator(hass, client=api, store=store)
+    await coordinator.async_refresh()
+    await coordinator.async_rescan_tuner_presets()
+    assert store.get(STORAGE_TUNER_PRESETS, "T787") == api.tuner_presets
+    assert "FM 101.1" in coordinator.data.source_list
+
+
+@pytest.mark.asyncio
+async def test_coordinator_tuner_scan_beside_polls(hass):
+    """Test the preset scan runs as its own task, so polls finish while it runs."""
+    api = fake_api()
+    engine = NADPollingEngine(hass, deadline=1.0)
+    engine.register("test")
+    coordinator = NADDataUpdateCoordinator(
+        hass, client=api, engine=engine, store=NADStore(hass, "test"), name="test"
+    )
+    scanning = threading.Event()
+    release = threading.Event()
+    scan = api._scan_tuner_presets
+
+    def slow_scan():
+        scanning.set()
+        release.wait(5)
+        return scan()
+
+    with patch.object(api, "_scan_tuner_presets", slow_scan):
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+        await hass.async_add_executor_job(scanning.wait, 5)
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert "FM 101.1" not in coordinator.data.source_list
+        release.set()
+        await hass.async_block_till_done()
+    assert "FM 101.1" in coordinator.data.source_list
+    assert engine.metrics.device("test").timeouts == 0
+    await coordinator.async_shutdown()
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_coordinator_listening_modes_once(hass):
+    """Test listening mode discovery runs once per setup, and never without the function."""
+    api = fake_api()
+    coordinator = NADDataUpdateCoordinator(hass, client=api, store=NADStore(hass, "test"))
+    with patch.object(api._receiver, "main_listeningmode", return_value=None) as mode:
+        for _ in range(3):
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+    mode.assert_called_once_with("?")
+    assert api.listening_modes_attempted
+    assert not api.listening_modes_discovered
+
+    api = fake_api("C356BEE")
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+    assert api.discover_listening_modes() is None
+    assert api.listening_modes_attempted
+    assert not trace.events()
+
+
+@pytest.mark.asyncio
+async def test_api_four_zones(hass):
+    """Test zones are discovered from capabilities and polled in one batch."""
+    api = fake_api("T778")
+    assert api.zones == [MAIN_NAME, ZONE2_NAME, "Zone3", "Zone4"]
+    api.power("Zone4", MediaPlayerState.ON)
+    api.set_volume_level("Zone4", 0.5)
+    api.set_source("Zone4", "Game")
+
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+    # Zone commands go straight to the receiver, without probing for the zone first
+    assert api.get_power_state(ZONE2_NAME) == MediaPlayerState.OFF
+    assert [e.data for e in trace.events() if e.event == "command"] == [["Zone2.Power?"]]
+    trace.clear()
+    coordinator = NADDataUpdateCoordinator(hass, client=api)
+    await coordinator.async_refresh()
+    assert len([e for e in trace.events() if e.event == "command"]) == 1
+    assert coordinator.data.power_state == {
+        MAIN_NAME: MediaPlayerState.ON,
+        ZONE2_NAME: MediaPlayerState.OFF,
+        "Zone3": MediaPlayerState.OFF,
+        "Zone4": MediaPlayerState.ON,
+    }
+    assert coordinator.data.source == {MAIN_NAME: "BluOS", "Zone4": "Game"}
+    assert round(coordinator.data.volume_level["Zone4"], 1) == 0.5
+    assert coordinator.data.properties["Main.Audio.CODEC"] == "PCM"
+
+
+@pytest.mark.asyncio
+async def test_api_standby_polls_power_only(hass):
+    """Test a zone seen off is polled for power only, and only for functions the model has."""
+    api = fake_api("C356BEE")
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+    state, _ = api.get_state()
+    assert state == {MAIN_NAME: {"power_state": MediaPlayerState.OFF}}
+    # Volume is relative only and listening modes are missing from the dump
+    assert [e.data for e in trace.events() if e.event == "command"][0] == [
+        "Main.Power?",
+        "Main.Source?",
+        "Main.Mute?",
+    ]
+
+    trace.clear()
+    api.get_state()
+    assert [e.data for e in trace.events() if e.event == "command"] == [["Main.Power?"]]
+
+    # Turned on at the front panel, the zone is read in full on the next poll
+    api._receiver.transport.communicate("Main.Power=On")
+    state, _ = api.get_state()
+    assert state[MAIN_NAME]["power_state"] == MediaPlayerState.ON
+    assert state[MAIN_NAME]["is_volume_muted"] is False
+
+
+@pytest.mark.asyncio
+async def test_coordinator_read_back_during_poll(hass):
+    """Test a read back waits for a poll in flight and is not skipped by it."""
+    api = fake_api()
+    engine = NADPollingEngine(hass)
+    engine.register("test")
+    coordinator = NADDataUpdateCoordinator(hass, client=api, engine=engine, name="test")
+    await coordinator.async_refresh()
+    get_state = api.get_state
+
+    def slow_get_state(properties=()):
+        state = get_state(properties)
+        time.sleep(0.2)
+        return state
+
+    with patch.object(api, "get_state", slow_get_state):
+        poll = asyncio.ensure_future(coordinator.async_refresh())
+        await asyncio.sleep(0.05)
+        api.set_source(MAIN_NAME, "Game")
+        coordinator._pending_fields = {MAIN_NAME: set(WRITE_FIELDS["source"])}
+        await coordinator._async_refresh_fields()
+        await poll
+    assert coordinator.data.source[MAIN_NAME] == "Game"
+    assert engine.metrics.device("test").skipped == 0
+    await coordinator.async_shutdown()
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_coordinator_receiver_offline(hass):
+    """Test a receiver that fails or stops answering fails the poll and its read backs."""
+    api = fake_api()
+    engine = NADPollingEngine(hass)
+    engine.register("test")
+    coordinator = NADDataUpdateCoordinator(hass, client=api, engine=engine, name="test")
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+
+    transport = api._receiver.transport
+    with patch.object(transport, "communicate_multiline", return_value=[]):
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+        with pytest.raises(UpdateFailed):
+            api.get_zone_fields({MAIN_NAME: WRITE_FIELDS["source"]})
+    with patch.object(transport, "communicate_multiline", side_effect=OSError("reset")):
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+    assert engine.metrics.device("test").failures == 2
+
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    await coordinator.async_shutdown()
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_coordinator_apply_zone_state_merged(hass):
+    """Test zone states queued within the cooldown are written in one burst."""
+    api = fake_api()
+    coordinator = NADDataUpdateCoordinator(hass, client=api)
+    await coordinator.async_refresh()
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+
+    async def apply_later(zone, fields):
+        for _ in range(3):
+            await asyncio.sleep(0)
+        await coordinator.async_apply_zone_state(zone, fields)
+
+    await asyncio.gather(
+        coordinator.async_apply_zone_state(MAIN_NAME, {"is_volume_muted": True}),
+        apply_later(ZONE2_NAME, {"is_volume_muted": True}),
+    )
+    batches = [e.data for e in trace.events() if e.event == "command"]
+    assert len(batches) == 1
+    assert sorted(batches[0]) == ["Main.Mute=On", "Zone2.Mute=On"]
+    assert coordinator.data.is_volume_muted[MAIN_NAME] is True
+    await coordinator.async_shutdown()
+
+
+@pytest.mark.asyncio
+async def test_coordinator_partial_refresh(hass):
+    """Test writes read back only the fields they change, merged into one batch."""
+    api = fake_api()
+    coordinator = NADDataUpdateCoordinator(hass, client=api)
+    await coordinator.async_refresh()
+    trace = TraceBuffer()
+    api._receiver.add_trace_subscriber(trace)
+
+    api.set_source(MAIN_NAME, "Game")
+    await coordinator.async_request_fields(MAIN_NAME, WRITE_FIELDS["source"])
+    api.mute(MAIN_NAME, True)
+    await coordinator.async_request_fields(MAIN_NAME, WRITE_FIELDS["mute"])
+    api.power(ZONE2_NAME, MediaPlayerState.ON)
+    await coordinator.async_request_fields(ZONE2_NAME, WRITE_FIELDS["power"])
+    trace.clear()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    batches = [e.data for e in trace.events() if e.event == "command"]
+    assert len(batches) == 1
+    assert set(batches[0]) == {
+        "Main.Source?",
+        "Main.Mute?",
+        "Zone2.Power?",
+        "Zone2.Source?",
+        "Zone2.Volume?",
+        "Zone2.Mute?",
+    }
+    assert coordinator.data.source[MAIN_NAME] == "Game"
+    assert coordinator.data.is_volume_muted[MAIN_NAME] is True
+    assert coordinator.data.power_state[ZONE2_NAME] == MediaPlayerState.ON
+    assert coordinator.data.source[ZONE2_NAME] is not None
+    await coordinator.async_shutdown()
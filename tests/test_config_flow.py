@@ -1,13 +1,22 @@
 """Test NAD Amplifer remote control config flow."""
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
-from custom_components.nad_remote.const import DOMAIN
+from custom_components.nad_remote import config_flow
+from custom_components.nad_remote.const import (
+    CONF_MAX_CONCURRENT_POLLS,
+    CONF_SCAN_NETWORK,
+    DOMAIN,
+    RESOLVE_CACHE_TTL,
+)
 from homeassistant import config_entries
 from homeassistant import data_entry_flow
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+from homeassistant.helpers.device_registry import format_mac
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from .const import MOCK_CONFIG
+from .const import MOCK_CONFIG, MOCK_HOSTNAME
 
 
 # This fixture bypasses the actual setup of the integration
@@ -40,8 +49,8 @@ async def test_successful_config_flow(hass, bypass_get_data):
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["step_id"] == "user"
 
-    # If a user were to enter `test_username` for username and `test_password`
-    # for password, it would result in this function call
+    # If a user were to enter the host and port of a receiver, it would
+    # result in this function call
     result = await hass.config_entries.flow.async_configure(
         result["flow_id"], user_input=MOCK_CONFIG
     )
@@ -49,7 +58,7 @@ async def test_successful_config_flow(hass, bypass_get_data):
     # Check that the config flow is complete and a new entry is created with
     # the input data
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
-    assert result["title"] == "test_username"
+    assert result["title"] == MOCK_HOSTNAME
     assert result["data"] == MOCK_CONFIG
     assert result["result"]
 
@@ -59,7 +68,7 @@ async def test_successful_config_flow(hass, bypass_get_data):
 # (note the function parameters) to raise an Exception during
 # validation of the input config.
 async def test_failed_config_flow(hass, error_on_get_data):
-    """Test a failed config flow due to credential validation failure."""
+    """Test a failed config flow when the receiver cannot be reached."""
 
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
@@ -73,4 +82,139 @@ async def test_failed_config_flow(hass, error_on_get_data):
     )
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
-    assert result["errors"] == {"base": "auth"}
+    assert result["errors"] == {"base": "cannot_connect"}
+
+
+def zeroconf_info(address="192.168.1.20", port=23):
+    """Return a zeroconf announcement for a NAD receiver."""
+    return SimpleNamespace(
+        hostname="nad-t787.local.",
+        name="NAD T787 (98FDE018)._telnet._tcp.local.",
+        addresses=[address],
+        port=port,
+    )
+
+
+async def test_zeroconf_configured_receiver(hass):
+    """Test a configured receiver's announcements are dismissed without resolving names."""
+    MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=format_mac("192.168.1.20"),
+        data={CONF_HOST: "nad-t787.local", CONF_PORT: 23, CONF_NAME: "NAD T787"},
+    ).add_to_hass(hass)
+
+    with patch.object(hass.loop, "getaddrinfo") as resolve:
+        for _ in range(3):
+            result = await hass.config_entries.flow.async_init(
+                DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=zeroconf_info()
+            )
+            assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+            assert result["reason"] == "already_configured"
+    resolve.assert_not_called()
+
+
+async def test_zeroconf_new_receiver(hass):
+    """Test a new receiver's hostname is resolved once and offered for confirmation."""
+    with patch.object(hass.loop, "getaddrinfo", return_value=[]) as resolve:
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": config_entries.SOURCE_ZEROCONF}, data=zeroconf_info()
+        )
+        assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+        assert result["step_id"] == "discovery_confirm"
+        # A second receiver with the same hostname uses the cached answer
+        await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_ZEROCONF},
+            data=zeroconf_info(address="192.168.1.21"),
+        )
+    assert resolve.call_count == 1
+
+
+async def test_scan_config_flow(hass):
+    """Test receivers found by a subnet scan are offered and set up."""
+
+    async def scan(network, ports):
+        assert network == "192.168.1.0/24"
+        yield ("192.168.1.20", ports[0], "T787")
+        yield ("192.168.1.31", ports[0], "C356BEE")
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch("custom_components.nad_remote.config_flow.async_scan", scan):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            user_input={CONF_NAME: "", CONF_SCAN_NETWORK: "192.168.1.0/24", CONF_PORT: 23},
+        )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "scan"
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_HOST: "192.168.1.31:23"}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["data"] == {CONF_NAME: "NAD C356BEE", CONF_HOST: "192.168.1.31", CONF_PORT: 23}
+
+
+async def test_scan_config_flow_invalid_network(hass):
+    """Test an invalid network range is reported on the user form."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_NAME: "NAD", CONF_SCAN_NETWORK: "192.168.1.0/33"}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["errors"] == {"base": "invalid_network"}
+
+
+async def test_options_flow_shared_limit(hass):
+    """Test the poll limit option is saved for every receiver."""
+    entries = [
+        MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id=entry_id)
+        for entry_id in ("first", "second")
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entries[0].entry_id)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_MAX_CONCURRENT_POLLS: 2}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert [entry.options for entry in entries] == [{CONF_MAX_CONCURRENT_POLLS: 2}] * 2
+
+
+async def test_scan_config_flow_network_too_large(hass):
+    """Test a network range larger than a /22 is refused before scanning."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch("custom_components.nad_remote.config_flow.async_scan") as scan:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input={CONF_NAME: "NAD", CONF_SCAN_NETWORK: "10.0.0.0/8"}
+        )
+    scan.assert_not_called()
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["errors"] == {"base": "network_too_large"}
+
+
+async def test_resolve_cache_evicts(hass):
+    """Test resolved hostnames are cached for a while and then evicted."""
+    config_flow._resolved.clear()
+    with patch.object(hass.loop, "getaddrinfo") as getaddrinfo, patch(
+        "custom_components.nad_remote.config_flow.monotonic", return_value=1000.0
+    ):
+        assert await config_flow.async_resolves(hass, "nad-t787.local")
+        assert await config_flow.async_resolves(hass, "nad-t787.local")
+    assert getaddrinfo.call_count == 1
+
+    with patch.object(hass.loop, "getaddrinfo", side_effect=OSError), patch(
+        "custom_components.nad_remote.config_flow.monotonic",
+        return_value=1000.0 + RESOLVE_CACHE_TTL,
+    ):
+        assert not await config_flow.async_resolves(hass, "nad-c356.local")
+    assert list(config_flow._resolved) == ["nad-c356.local"]
@@ -0,0 +1,66 @@
+"""Import-time budget for the NAD Amplifer remote control integration."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Cumulative import times in microseconds, measured after Home Assistant's own
+# bootstrap modules are loaded, as they are when HA imports the integration
+INTEGRATION_BUDGET = 250_000
+LIBRARY_BUDGET = 50_000
+
+BACKEND_MODULES = ["serial", "telnetlib"]
+
+# Measure without pytest-cov's subprocess instrumentation
+ENV = {k: v for k, v in os.environ.items() if not k.startswith("COV_CORE_")}
+
+
+def import_times(module: str, preload: str = "homeassistant.bootstrap") -> dict[str, int]:
+    """Return the cumulative import time of every module newly loaded by module"""
+    code = f"import {preload}; import {module}"
+    # Run twice so that the measured run uses cached bytecode
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT,
+            env=ENV,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    times = {}
+    preloaded = True
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not preloaded and name.strip() not in times:
+            times[name.strip()] = int(cumulative)
+        if name.strip() == preload:
+            preloaded = False
+    return times
+
+
+def test_library_import_time():
+    """The receiver library loads no backend modules and stays within budget."""
+    times = import_times("custom_components.nad_remote.nad_receiver")
+    assert not any(m in times for m in BACKEND_MODULES)
+    assert times["custom_components.nad_remote.nad_receiver"] < LIBRARY_BUDGET
+
+
+def test_integration_import_time():
+    """The integration loads no backend modules and stays within budget."""
+    times = import_times("custom_components.nad_remote")
+    assert not any(m in times for m in BACKEND_MODULES)
+    assert times["custom_components.nad_remote"] < INTEGRATION_BUDGET
+
+
+def test_no_logging_side_effects():
+    """Importing the library does not configure the root logger."""
+    code = (
+        "import logging, homeassistant.bootstrap, custom_components.nad_remote.nad_receiver; "
+        "assert not logging.getLogger().handlers"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=ENV, check=True)
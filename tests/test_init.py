@@ -1,21 +1,22 @@
 """Test NAD Amplifer remote control setup process."""
 import pytest
-from custom_components.nad_remote import (
-    async_reload_entry,
-)
+import voluptuous as vol
 from custom_components.nad_remote import (
     async_setup_entry,
 )
-from custom_components.nad_remote import (
-    async_unload_entry,
-)
 from custom_components.nad_remote import (
     NADDataUpdateCoordinator,
 )
 from custom_components.nad_remote.const import (
+    CONF_MAX_CONCURRENT_POLLS,
+    DATA_POLLER,
     DOMAIN,
+    SERVICE_APPLY_STATE,
+    STORAGE_CAPABILITIES,
 )
+from custom_components.nad_remote.store import NADStore
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from .const import MOCK_CONFIG
@@ -30,28 +31,45 @@ async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
     """Test entry setup and unload."""
     # Create a mock entry so we don't have to go through config flow
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
 
     # Set up the entry and assert that the values set during setup are where we expect
-    # them to be. Because we have patched the NADDataUpdateCoordinator.async_get_data
-    # call, no code from custom_components/nad_remote/api.py actually runs.
-    assert await async_setup_entry(hass, config_entry)
+    # them to be. Because we have patched the telnet transport with a fake receiver,
+    # no network connection is made.
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
     assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
     assert (
         type(hass.data[DOMAIN][config_entry.entry_id]) == NADDataUpdateCoordinator
     )
 
     # Reload the entry and assert that the data from above is still there
-    assert await async_reload_entry(hass, config_entry) is None
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
     assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
     assert (
         type(hass.data[DOMAIN][config_entry.entry_id]) == NADDataUpdateCoordinator
     )
 
     # Unload the entry and verify that the data has been removed
-    assert await async_unload_entry(hass, config_entry)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
     assert config_entry.entry_id not in hass.data[DOMAIN]
 
 
+async def test_poll_limit_option(hass, bypass_get_data):
+    """Test changing the poll limit resizes the shared engine without a reload."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_MAX_CONCURRENT_POLLS: 2}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[DATA_POLLER].max_concurrent == 2
+    assert hass.data[DOMAIN][config_entry.entry_id] is coordinator
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
 async def test_setup_entry_exception(hass, error_on_get_data):
     """Test ConfigEntryNotReady when API raises an exception during entry setup."""
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
@@ -61,3 +79,77 @@ async def test_setup_entry_exception(hass, error_on_get_data):
     # an error.
     with pytest.raises(ConfigEntryNotReady):
         assert await async_setup_entry(hass, config_entry)
+
+
+async def test_setup_reads_receiver_once(hass, fake_receiver):
+    """Test entities are available after connect and a single state poll."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The capability dump and one batch for every zone and property
+    assert len(fake_receiver.batches) == 2
+    assert fake_receiver.batches[0] == ["?"]
+    assert hass.states.get("media_player.nad_test_main").state == "on"
+    assert hass.states.get("media_player.nad_test_zone2").state == "off"
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+    # Later setups revalidate the saved capabilities with a single query
+    store = NADStore(hass, config_entry.entry_id)
+    await store.async_load()
+    assert store.get(STORAGE_CAPABILITIES, None)["main_model"] == "T787"
+    fake_receiver.batches.clear()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert len(fake_receiver.batches) == 2
+    assert fake_receiver.batches[0] == ["Main.Model?"]
+    assert hass.states.get("media_player.nad_test_main").state == "on"
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_property_entities_on_main_device(hass, fake_receiver):
+    """Test property entities belong to the device of the main zone's media player."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    main = registry.async_get("media_player.nad_test_main")
+    entries = er.async_entries_for_config_entry(registry, config_entry.entry_id)
+    properties = [entry for entry in entries if entry.domain != "media_player"]
+    assert properties
+    assert {entry.device_id for entry in properties} == {main.device_id}
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_apply_state_service(hass, fake_receiver):
+    """Test the apply_state service writes the targeted zones in one burst."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    fake_receiver.batches.clear()
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_APPLY_STATE,
+        {
+            "entity_id": ["media_player.nad_test_main", "media_player.nad_test_zone2"],
+            "is_volume_muted": True,
+        },
+        blocking=True,
+    )
+    assert len(fake_receiver.batches) == 1
+    assert sorted(fake_receiver.batches[0]) == ["Main.Mute=On", "Zone2.Mute=On"]
+    assert hass.states.get("media_player.nad_test_main").attributes["is_volume_muted"] is True
+
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_APPLY_STATE,
+            {"entity_id": "media_player.nad_test_main", "volume_level": 2},
+            blocking=True,
+        )
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
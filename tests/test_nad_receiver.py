@@ -0,0 +1,663 @@
+"""Tests for the bundled NAD receiver library."""
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from custom_components.nad_remote.nad_receiver import NADReceiver, NADReceiverTCP
+from custom_components.nad_remote.nad_receiver.nad_fake_transport import (
+    FakeNADTransport,
+    Fake_NAD_C_356BE_Transport,
+    load_profile,
+)
+from custom_components.nad_remote.nad_receiver.nad_pacing import TokenBucket, learned
+from custom_components.nad_remote.nad_receiver.nad_replay_transport import (
+    ReplayMismatch,
+    ReplayTransport,
+)
+from custom_components.nad_remote.nad_receiver.nad_rtt import MIN_RTO, RttEstimator
+from custom_components.nad_remote.nad_receiver.nad_trace import TraceBuffer
+from custom_components.nad_remote.nad_receiver.nad_transport import (
+    NadTransport,
+    SerialPortTransport,
+    TelnetTransportWrapper,
+)
+
+
+class ScriptedTransport(NadTransport):
+    """Transport that replays a fixed reply for each batch it is sent."""
+
+    def __init__(self, replies: List[List[str]]) -> None:
+        self.replies = replies
+        self.sent = []
+
+    def communicate(self, command: str) -> str:
+        replies = self.communicate_multiline([command])
+        return replies[0] if replies else ""
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        self.sent.append(cmds)
+        return self.replies.pop(0)
+
+
+def scripted_receiver(replies: List[List[str]]) -> NADReceiver:
+    receiver = NADReceiver.__new__(NADReceiver)
+    receiver.transport = ScriptedTransport(replies)
+    receiver._init_state()
+    return receiver
+
+
+def test_serial_batch():
+    """Serial batches are pipelined with the same framing as telnet."""
+    # pyserial's loopback echoes every frame, and the receiver echoes
+    # '=' commands in its replies
+    receiver = NADReceiver("loop://")
+    receiver.transport.rtt = RttEstimator(0.05)
+    # Nothing answers a readiness probe on the loopback, so give up after one
+    receiver.ready_timeout = 0
+    assert receiver.transport.communicate_multiline(["Main.Power?", "Main.Mute?"]) == [
+        "Main.Power?",
+        "Main.Mute?",
+    ]
+    assert receiver.exec_commands([["main", "power", "=", "On"], ["main", "mute", "=", "Off"]]) == {
+        "Main.Power": "On",
+        "Main.Mute": "Off",
+    }
+    assert receiver.main_power("=", "On") == "On"
+
+
+def test_batch_correlation():
+    """Replies are matched by key, notifications go to listeners and gaps are retried."""
+    receiver = scripted_receiver(
+        [
+            ["Main.Power=On", "Main.Source=3", "Main.Volume=-40"],
+            ["Main.Mute=Off"],
+        ]
+    )
+    notifications = []
+    remove = receiver.add_listener(lambda key, value: notifications.append((key, value)))
+
+    replies = receiver.exec_commands(
+        [["main", "power", "?"], ["main", "mute", "?"], ["main", "volume", "?"]]
+    )
+    assert replies == {"Main.Power": "On", "Main.Mute": "Off", "Main.Volume": "-40"}
+    assert notifications == [("Main.Source", "3")]
+    # Only the missing key is retried
+    assert receiver.transport.sent[1] == ["Main.Mute?"]
+    remove()
+    assert not receiver._listeners
+
+
+def test_relative_commands_not_resent():
+    """A relative command with a missing reply is read back rather than resent."""
+    receiver = scripted_receiver([[], ["Main.Volume=-39"]])
+    assert receiver.exec_commands([["main", "volume", "+"]]) == {"Main.Volume": "-39"}
+    assert receiver.transport.sent == [["Main.Volume+"], ["Main.Volume?"]]
+
+
+def test_relative_command_lost():
+    """A step read back at its old value did not take effect and is resent."""
+    receiver = scripted_receiver(
+        [["Main.Volume=-40"], [], ["Main.Volume=-40"], ["Main.Volume=-39"]]
+    )
+    assert receiver.main_volume("?") == -40
+    assert receiver.exec_commands([["main", "volume", "+"]]) == {"Main.Volume": "-39"}
+    assert receiver.transport.sent[1:] == [["Main.Volume+"], ["Main.Volume?"], ["Main.Volume+"]]
+
+
+def test_relative_command_applied():
+    """A step read back at a new value took effect and is not resent."""
+    receiver = scripted_receiver([["Main.Volume=-40"], [], ["Main.Volume=-39"]])
+    assert receiver.main_volume("?") == -40
+    assert receiver.main_volume("+") == -39
+    assert receiver.transport.sent[1:] == [["Main.Volume+"], ["Main.Volume?"]]
+
+
+def test_relative_command_burst_lost():
+    """Steps in one batch are counted per occurrence and only the lost ones are resent."""
+    # Two of four steps took effect and only one of them was answered
+    receiver = scripted_receiver(
+        [
+            ["Main.Volume=-40"],
+            ["Main.Volume=-39"],
+            ["Main.Volume=-38"],
+            ["Main.Volume=-37", "Main.Volume=-36"],
+        ]
+    )
+    assert receiver.main_volume("?") == -40
+    assert receiver.exec_commands([["main", "volume", "+"]] * 4) == {"Main.Volume": "-36"}
+    assert receiver.transport.sent[1:] == [
+        ["Main.Volume+"] * 4,
+        ["Main.Volume?"],
+        ["Main.Volume+"] * 2,
+    ]
+
+    # No step was answered or took effect
+    receiver = scripted_receiver(
+        [["Main.Volume=-40"], [], ["Main.Volume=-40"], ["Main.Volume=-43"]]
+    )
+    assert receiver.main_volume("?") == -40
+    assert receiver.exec_commands([["main", "volume", "-"]] * 3) == {"Main.Volume": "-43"}
+    assert receiver.transport.sent[1:] == [
+        ["Main.Volume-"] * 3,
+        ["Main.Volume?"],
+        ["Main.Volume-"] * 3,
+    ]
+
+
+def test_command_retry(monkeypatch):
+    """Single commands are retried after an empty read, within the batch deadline."""
+    receiver = scripted_receiver([[], ["Main.Mute=On"], [], []])
+    assert receiver.main_mute("=", "On") == "On"
+    assert receiver.transport.sent == [["Main.Mute=On"], ["Main.Mute=On"]]
+
+    monkeypatch.setattr("custom_components.nad_remote.nad_receiver.BATCH_DEADLINE", 0)
+    assert receiver.main_mute("?") is None
+    assert receiver.transport.sent[2:] == [["Main.Mute?"]]
+
+
+def test_command_notification():
+    """A notification in place of a single reply is not taken as the reply."""
+    receiver = scripted_receiver([["Main.Source=2"], ["Main.Power=On"]])
+    notifications = []
+    receiver.add_listener(lambda key, value: notifications.append((key, value)))
+    assert receiver.main_power("?") == "On"
+    assert notifications == [("Main.Source", "2")]
+
+
+def test_apply_state():
+    """Writes go in one burst, held back only for a zone that is powering on."""
+    receiver = scripted_receiver(
+        [
+            ["Main.Power=Off"],
+            ["Main.Power=On", "Zone2.Mute=On"],
+            ["Main.Source=1", "Main.Volume=-50", "Main.Mute=On"],
+            ["Main.Source=2", "Main.Volume=-40", "Main.Mute=Off"],
+        ]
+    )
+    receiver.main_power("?")
+    replies = receiver.apply_state(
+        {
+            "main": {"mute": "Off", "volume": "-40", "power": "On", "source": "2"},
+            "zone2": {"mute": "On"},
+        }
+    )
+    assert receiver.transport.sent[1:] == [
+        ["Main.Power=On", "Zone2.Mute=On"],
+        ["Main.Source?", "Main.Volume?", "Main.Mute?"],
+        ["Main.Source=2", "Main.Volume=-40", "Main.Mute=Off"],
+    ]
+    assert replies == {
+        "Main.Power": "On",
+        "Zone2.Mute": "On",
+        "Main.Source": "2",
+        "Main.Volume": "-40",
+        "Main.Mute": "Off",
+    }
+
+
+def test_apply_state_single_burst():
+    """Without a power on every write is sent in a single batch."""
+    receiver = scripted_receiver([["Main.Source=1", "Main.Mute=On"]])
+    assert receiver.apply_state({"main": {"mute": "On", "source": "1"}}) == {
+        "Main.Source": "1",
+        "Main.Mute": "On",
+    }
+    assert receiver.transport.sent == [["Main.Source=1", "Main.Mute=On"]]
+
+
+def test_power_on_readiness_probe():
+    """Commands after a power on are held until a probe for the held function is answered."""
+    receiver = scripted_receiver(
+        [
+            ["Main.Power=Off"],
+            ["Main.Power=On"],
+            [""],
+            ["Main.Power=On"],
+            ["Main.Mute=Off"],
+            ["Main.Mute=On"],
+        ]
+    )
+    receiver.main_power("?")
+    assert receiver.main_power("=", "On") == "On"
+    assert receiver.main_mute("=", "On") == "On"
+    assert receiver.transport.sent[1:] == [
+        ["Main.Power=On"],
+        ["Main.Mute?"],
+        ["Main.Mute?"],
+        ["Main.Mute?"],
+        ["Main.Mute=On"],
+    ]
+
+
+def test_power_on_readiness_notification():
+    """A notification from the booting domain does not release held commands."""
+    receiver = scripted_receiver(
+        [
+            ["Main.Power=Off"],
+            ["Main.Power=On"],
+            ["Main.Source=1"],
+            ["Main.Volume=-45"],
+            ["Main.Volume=-40"],
+        ]
+    )
+    notifications = []
+    receiver.add_listener(lambda key, value: notifications.append((key, value)))
+    receiver.main_power("?")
+    receiver.main_power("=", "On")
+    assert receiver.main_volume("=", "-40") == -40.0
+    assert receiver.transport.sent[1:] == [
+        ["Main.Power=On"],
+        ["Main.Volume?"],
+        ["Main.Volume?"],
+        ["Main.Volume=-40"],
+    ]
+    assert notifications == [("Main.Source", "1")]
+
+
+def test_power_on_when_already_on():
+    """Nothing is held when the zone was already on, or its power state was unknown."""
+    receiver = scripted_receiver([["Main.Power=On"], ["Main.Power=On"], ["Main.Mute=Off"]])
+    receiver.main_power("?")
+    receiver.main_power("=", "On")
+    receiver.main_mute("?")
+    assert receiver.transport.sent == [["Main.Power?"], ["Main.Power=On"], ["Main.Mute?"]]
+
+    receiver = scripted_receiver([["Main.Power=On"], ["Main.Mute=Off"]])
+    receiver.main_power("=", "On")
+    receiver.main_mute("?")
+    assert receiver.transport.sent == [["Main.Power=On"], ["Main.Mute?"]]
+
+
+def test_record_and_replay(tmp_path):
+    """A recorded session replays the same replies for the same commands."""
+    path = str(tmp_path / "session.nad")
+    receiver = NADReceiver("loop://")
+    receiver.transport.rtt = RttEstimator(0.05)
+    # Nothing answers a readiness probe on the loopback, so give up after one
+    receiver.ready_timeout = 0
+    receiver.transport.record_to(path)
+    recorded = receiver.exec_commands([["main", "power", "=", "On"], ["main", "mute", "=", "Off"]])
+    receiver.main_volume("=", "-40")
+    receiver.transport.record_to(None)
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith("#")
+    assert [line.split(" ", 2)[1:] for line in lines[1:4]] == [
+        [">", "Main.Power=On"],
+        [">", "Main.Mute=Off"],
+        ["<", "Main.Power=On"],
+    ]
+
+    replay = scripted_receiver([])
+    replay.transport = ReplayTransport(path)
+    replay.ready_timeout = 0
+    assert replay.exec_commands([["main", "power", "=", "On"], ["main", "mute", "=", "Off"]]) == (
+        recorded
+    )
+    assert replay.main_volume("=", "-40") == -40.0
+    assert replay.transport.done()
+    with pytest.raises(ReplayMismatch):
+        replay.transport.communicate("Main.Power?")
+
+
+def test_fake_c356be():
+    """The C 356BE profile answers only Power and readonly functions while off."""
+    receiver = scripted_receiver([])
+    receiver.transport = Fake_NAD_C_356BE_Transport()
+    assert receiver.main_model("?") == "C356BEE"
+    assert receiver.main_mute("?") is None
+    assert receiver.main_power("=", "On") == "On"
+    assert receiver.exec_commands([["main", "source", "+"], ["main", "speaker_b", "+"]]) == {
+        "Main.Source": "TUNER",
+        "Main.SpeakerB": "On",
+    }
+    assert receiver.transport.communicate("Main.Volume+") == "Main.Volume+"
+
+
+def test_fake_profile():
+    """A profile built from a status_all dump serves every zone and the tuner."""
+    receiver = scripted_receiver([])
+    receiver.transport = FakeNADTransport(load_profile("T787"))
+    status = receiver.status_all()
+    assert status["main_model"] == "T787"
+    assert status["zone2_volume_max"] == "0"
+    assert receiver.zone2_power("=", "On") == "On"
+    assert receiver.exec_commands([["main", "volume", "+"]] * 3) == {"Main.Volume": "-38.5"}
+    assert receiver.zone2_volume("=", "10") == 0.0
+    assert receiver.tuner_fm_frequency("+") == "98.6"
+    assert receiver.tuner_band("-") == "AM"
+    assert receiver.main_source("=", "9") is None
+
+
+def test_token_bucket():
+    """Test the bucket lets a burst through and spaces the rest at its rate."""
+    bucket = TokenBucket(rate=100, burst=4)
+    transport = FakeNADTransport(load_profile("T787"))
+    transport.pacer = bucket
+    writes = []
+    start = time.monotonic()
+    transport._write_frames([b"frame"] * 10, writes.append)
+    assert writes[0] == b"frame" * 4
+    assert b"".join(writes) == b"frame" * 10
+    assert time.monotonic() - start >= 0.05
+
+
+def test_rtt_estimator():
+    """Test read timeouts follow the measured round trip, back off and respect floors."""
+    rtt = RttEstimator(1.0)
+    assert rtt.timeout() == 1.0
+    rtt.sample(0.02)
+    assert rtt.rto == pytest.approx(0.06)
+    for _ in range(50):
+        rtt.sample(0.02)
+    assert rtt.rto == MIN_RTO
+    rtt.on_timeout()
+    assert rtt.rto == 2 * MIN_RTO
+    with rtt.floor(5.0):
+        assert rtt.timeout() == 5.0
+    assert rtt.connect_timeout() == 2.0
+    rtt.sample(0.02)
+    assert rtt.timeout() == MIN_RTO
+
+
+class DroppingTransport(FakeNADTransport):
+    """Fake receiver that buffers a few frames, works through them at a fixed
+    rate and drops frames that arrive while its buffer is full."""
+
+    def __init__(self, rate: float, buffer: int) -> None:
+        super().__init__(load_profile("T787"))
+        self.rate = rate
+        self.buffer = buffer
+        self.level = 0.0
+        self.last = time.monotonic()
+        self.dropped = 0
+
+    def communicate_multiline(self, cmds: List[str]) -> List[str]:
+        accepted = []
+
+        def write(data: bytes) -> None:
+            now = time.monotonic()
+            self.level = max(0.0, self.level - (now - self.last) * self.rate)
+            self.last = now
+            for cmd in data.decode().split("\r")[:-1]:
+                if self.level + 1 > self.buffer:
+                    self.dropped += 1
+                else:
+                    self.level += 1
+                    accepted.append(cmd)
+
+        self._write_frames([f"{cmd}\r".encode() for cmd in cmds], write)
+        return super().communicate_multiline(accepted)
+
+
+def test_pacing_learns_from_drops():
+    """Test a batch that loses frames slows the pacer and clean batches speed it up."""
+    receiver = NADReceiver.__new__(NADReceiver)
+    receiver.transport = DroppingTransport(rate=50, buffer=4)
+    receiver._init_state()
+    pacer = receiver.pace("Pacing-Test")
+    frames = [
+        f"{domain}.{function}?"
+        for domain in ("Main", "Zone2")
+        for function in ("Power", "Source", "Volume", "Mute")
+    ]
+
+    # The default burst overflows the receiver's buffer; the retry gets the rest
+    assert len(receiver.exec_frames(frames)) == 8
+    assert receiver.transport.dropped == 4
+    assert pacer.settings == (12.5, 4)
+    assert learned("Pacing-Test") == (12.5, 4)
+
+    # Paced at the learned settings nothing is lost and the rate creeps up
+    assert len(receiver.exec_frames(frames)) == 8
+    assert receiver.transport.dropped == 4
+    assert pacer.settings == (13.5, 4)
+    # A receiver of the same model starts from what was learned
+    assert TokenBucket.for_model("Pacing-Test").settings == (13.5, 4)
+
+
+class FakeTelnet:
+    """Stands in for a telnet connection and fails on concurrent use."""
+
+    host = "fake"
+    tracer = None
+    pacer = None
+    rtt = None
+
+    def __init__(self) -> None:
+        self.device = FakeNADTransport(load_profile("T787"))
+        self.writes = []
+        self.in_use = threading.Lock()
+
+    def is_open(self) -> bool:
+        return True
+
+    def is_alive(self) -> bool:
+        return True
+
+    def close_connection(self) -> None:
+        pass
+
+    def communicate(self, cmd: str) -> str:
+        return self.communicate_multiline([cmd])[0]
+
+    def communicate_multiline(self, cmds: List[str], expect=None) -> List[str]:
+        assert self.in_use.acquire(blocking=False), "concurrent socket access"
+        try:
+            self.writes.append(cmds)
+            time.sleep(0.01)
+            return self.device.communicate_multiline(cmds) or [""]
+        finally:
+            self.in_use.release()
+
+
+def test_telnet_actor():
+    """Concurrent callers share one connection and get their own replies."""
+    transport = TelnetTransportWrapper("fake", 23, 1)
+    transport.nad_telnet = FakeTelnet()
+    receiver = scripted_receiver([])
+    receiver.transport = transport
+    functions = [receiver.main_power, receiver.main_mute, receiver.main_model] * 8
+    expected = ["On", "Off", "T787"] * 8
+
+    with ThreadPoolExecutor(max_workers=len(functions)) as executor:
+        results = list(executor.map(lambda function: function("?"), functions))
+
+    assert results == expected
+    # Queued requests were merged into fewer writes
+    assert len(transport.nad_telnet.writes) < len(functions)
+    transport.close()
+    assert transport._actor is None
+
+
+def test_tracing():
+    """Subscribers see the whole command path and are detached cleanly."""
+    receiver = scripted_receiver([])
+    receiver.transport = FakeNADTransport(load_profile("T787"))
+    assert receiver.tracer is None
+
+    buffer = TraceBuffer(maxlen=3)
+    remove = receiver.add_trace_subscriber(buffer)
+    receiver.main_power("?")
+    receiver.exec_commands([["main", "mute", "?"], ["main", "volume", "?"]])
+    assert [(e.event, e.data) for e in buffer.events()] == [
+        ("parsed", {"Main.Power": "On"}),
+        ("command", ["Main.Mute?", "Main.Volume?"]),
+        ("parsed", {"Main.Mute": "Off", "Main.Volume": "-40"}),
+    ]
+    remove()
+    assert receiver.tracer is None
+
+
+def test_recording_traces_transport(tmp_path):
+    """The traffic recorder is a transport trace subscriber."""
+    transport = SerialPortTransport("loop://")
+    transport.rtt = RttEstimator(0.05)
+    buffer = TraceBuffer()
+    transport.add_trace_subscriber(buffer)
+    transport.record_to(str(tmp_path / "session.nad"))
+    transport.communicate_multiline(["Main.Power?"])
+    transport.record_to(None)
+    assert [e.event for e in buffer.events()] == ["write", "frame", "end"]
+    assert transport.tracer.subscribers == [buffer]
+
+
+class TelnetServer:
+    """A loopback telnet receiver that answers Main.Power? and Main.Mute? and counts connections."""
+
+    REPLIES = {b"Main.Power?": b"\nMain.Power=On\r", b"Main.Mute?": b"\nMain.Mute=Off\r"}
+
+    def __init__(self) -> None:
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.listener.settimeout(0.05)
+        self.port = self.listener.getsockname()[1]
+        self.connections = []
+        self.answering = True
+        self.running = True
+        self.threads = [threading.Thread(target=self._accept)]
+        self.threads[0].start()
+
+    def _accept(self) -> None:
+        while self.running:
+            try:
+                conn, _ = self.listener.accept()
+            except socket.timeout:
+                continue
+            self.connections.append(conn)
+            thread = threading.Thread(target=self._serve, args=(conn,))
+            self.threads.append(thread)
+            thread.start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        conn.sendall(b"\rMain.Model=T787\r\n")
+        buffer = b""
+        try:
+            while data := conn.recv(1024):
+                *frames, buffer = (buffer + data).split(b"\r")
+                for frame in frames:
+                    reply = self.REPLIES.get(frame.strip())
+                    if self.answering and reply:
+                        conn.sendall(reply)
+        except OSError:
+            pass
+
+    def drop(self) -> None:
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+    def close(self) -> None:
+        self.running = False
+        self.drop()
+        for thread in self.threads:
+            thread.join()
+        self.listener.close()
+
+
+@pytest.mark.enable_socket
+def test_telnet_replaces_closed_connection():
+    """A connection the receiver closed is replaced before the next command is sent."""
+    server = TelnetServer()
+    transport = TelnetTransportWrapper("127.0.0.1", server.port, 1)
+    assert transport.communicate("Main.Power?") == "Main.Power=On"
+    sock = transport.nad_telnet.telnet.get_socket()
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+
+    server.drop()
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert transport.communicate("Main.Power?") == "Main.Power=On"
+    assert time.monotonic() - start < 1
+    assert len(server.connections) == 2
+    transport.close()
+    server.close()
+
+
+@pytest.mark.enable_socket
+def test_telnet_merged_duplicate_keys():
+    """Merged requests for the same key each get a reply and none is left for the next command."""
+    server = TelnetServer()
+    transport = TelnetTransportWrapper("127.0.0.1", server.port, 1)
+    batch = [(["Main.Power?"], True, Future()), (["Main.Power?", "Main.Mute?"], False, Future())]
+    try:
+        transport._serve(batch)
+        assert batch[0][2].result() == "Main.Power=On"
+        assert batch[1][2].result() == ["Main.Power=On", "Main.Mute=Off"]
+        assert transport._communicate("Main.Mute?") == "Main.Mute=Off"
+    finally:
+        transport.close()
+        server.close()
+
+
+@pytest.mark.enable_socket
+def test_telnet_end_of_batch():
+    """Once the round trip is measured a batch ends within milliseconds of its last reply."""
+    server = TelnetServer()
+    transport = TelnetTransportWrapper("127.0.0.1", server.port, 1)
+    assert transport.communicate("Main.Power?") == "Main.Power=On"
+    assert transport.rtt.srtt is not None
+    start = time.monotonic()
+    assert transport.communicate_multiline(["Main.Power?"]) == ["Main.Power=On"]
+    assert time.monotonic() - start < 0.5
+    transport.close()
+    server.close()
+
+
+@pytest.mark.enable_socket
+def test_telnet_heartbeat():
+    """An idle connection that stops answering the heartbeat is replaced."""
+    server = TelnetServer()
+    transport = TelnetTransportWrapper("127.0.0.1", server.port, 1)
+    transport.nad_telnet.rtt = RttEstimator(0.1)
+    assert transport.communicate("Main.Power?") == "Main.Power=On"
+    transport._heartbeat()
+    assert len(server.connections) == 1
+
+    server.answering = False
+    transport._heartbeat()
+    assert len(server.connections) == 2
+    server.answering = True
+    assert transport.communicate("Main.Power?") == "Main.Power=On"
+    transport.close()
+    server.close()
+
+
+def _serve_d7050(listener: socket.socket, pieces: List[bytes]) -> None:
+    conn, _ = listener.accept()
+    with conn:
+        conn.recv(1024)
+        for piece in pieces:
+            conn.sendall(piece)
+            time.sleep(0.05)
+
+
+@pytest.mark.enable_socket
+def test_tcp_status_reply_in_pieces():
+    """Test the D 7050 status is read whole when its reply arrives in pieces."""
+    reply = bytes.fromhex("00010202" "50" "00010202" "01" "00010202" "00" "00010202" "07")
+    for pieces, expected in (
+        (
+            [reply[:7], reply[7:]],
+            {"volume": 80, "power": True, "muted": False, "source": "Bluetooth"},
+        ),
+        ([reply[:7]], None),
+    ):
+        listener = socket.create_server(("127.0.0.1", 0))
+        server = threading.Thread(target=_serve_d7050, args=(listener, pieces))
+        server.start()
+        try:
+            receiver = NADReceiverTCP("127.0.0.1")
+            receiver.PORT = listener.getsockname()[1]
+            receiver.REPLY_TIMEOUT = 0.5
+            assert receiver.status() == expected
+        finally:
+            server.join()
+            listener.close()
@@ -0,0 +1,121 @@
+"""Tests for the shared NAD polling engine."""
+import asyncio
+import threading
+import time
+
+import pytest
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.nad_remote.poller import NADPollingEngine
+
+
+def slow_poll(delay: float, result: str, tracker: dict) -> str:
+    with tracker["lock"]:
+        tracker["running"] += 1
+        tracker["peak"] = max(tracker["peak"], tracker["running"])
+    time.sleep(delay)
+    with tracker["lock"]:
+        tracker["running"] -= 1
+    return result
+
+
+@pytest.fixture
+def tracker():
+    return {"lock": threading.Lock(), "running": 0, "peak": 0}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_polls(hass, tracker):
+    """Receivers are polled in parallel up to the concurrency limit."""
+    engine = NADPollingEngine(hass, max_concurrent=3, deadline=5.0)
+    names = [f"receiver{n}" for n in range(6)]
+    for name in names:
+        engine.register(name)
+
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *[engine.async_poll(name, slow_poll, 0.2, name, tracker) for name in names]
+    )
+    duration = time.monotonic() - start
+
+    assert results == names
+    assert tracker["peak"] == 3
+    assert engine.metrics.max_in_flight == 3
+    # Six receivers in two waves of three rather than six sequential polls
+    assert duration < 0.2 * 6 * 0.75
+    assert engine.metrics.as_dict()["polls"] == 6
+    assert engine.metrics.last_cycle_duration is not None
+    assert engine.metrics.device("receiver0").last_duration >= 0.2
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_poll_deadline(hass, tracker):
+    """An offline receiver times out without delaying the others."""
+    engine = NADPollingEngine(hass, max_concurrent=2, deadline=0.3)
+    engine.register("offline")
+    engine.register("online")
+
+    results = await asyncio.gather(
+        engine.async_poll("offline", slow_poll, 1.0, "offline", tracker),
+        engine.async_poll("online", slow_poll, 0.05, "online", tracker),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], UpdateFailed)
+    assert results[1] == "online"
+    assert engine.metrics.device("offline").timeouts == 1
+
+    # The timed out refresh still holds its thread so the next one is skipped
+    with pytest.raises(UpdateFailed):
+        await engine.async_poll("offline", slow_poll, 0.01, "offline", tracker)
+    assert engine.metrics.device("offline").skipped == 1
+
+    assert not engine.unregister("offline")
+    assert engine.unregister("online")
+    engine.shutdown(wait=True)
+
+
+@pytest.mark.asyncio
+async def test_poll_failure(hass):
+    """Exceptions from the API are reported as update failures."""
+    engine = NADPollingEngine(hass)
+    engine.register("broken")
+
+    def fail():
+        raise ConnectionError("no route to host")
+
+    with pytest.raises(UpdateFailed):
+        await engine.async_poll("broken", fail)
+    assert engine.metrics.device("broken").failures == 1
+    assert engine.metrics.device("broken").mean_duration is None
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_read_during_refresh(hass, tracker):
+    """A read for a receiver being refreshed runs rather than being skipped."""
+    engine = NADPollingEngine(hass, max_concurrent=2, deadline=5.0)
+    engine.register("receiver")
+    refresh = asyncio.ensure_future(
+        engine.async_poll("receiver", slow_poll, 0.2, "refresh", tracker)
+    )
+    await asyncio.sleep(0.05)
+    assert await engine.async_read(slow_poll, 0.01, "read", tracker) == "read"
+    assert await refresh == "refresh"
+    assert engine.metrics.device("receiver").skipped == 0
+    assert engine.metrics.as_dict()["polls"] == 1
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_set_max_concurrent(hass, tracker):
+    """The concurrency limit can be changed while the engine runs."""
+    engine = NADPollingEngine(hass, max_concurrent=1, deadline=5.0)
+    names = ["receiver0", "receiver1"]
+    engine.set_max_concurrent(2)
+    results = await asyncio.gather(
+        *[engine.async_poll(name, slow_poll, 0.1, name, tracker) for name in names]
+    )
+    assert results == names
+    assert tracker["peak"] == 2
+    engine.shutdown()
@@ -0,0 +1,127 @@
+"""Tests for the subnet scan used to find receivers without zeroconf."""
+import asyncio
+import time
+
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.nad_remote.const import SCAN_CONCURRENCY
+
+from custom_components.nad_remote.nad_receiver.nad_fake_transport import (
+    FakeNADTransport,
+    load_profile,
+)
+from custom_components.nad_remote.scanner import (
+    ScanRangeTooLarge,
+    async_probe,
+    async_scan,
+    scan_range,
+)
+
+
+class ReceiverSimulator:
+    """A fake receiver on a loopback port, optionally greeting with its model."""
+
+    def __init__(self, profile: str, greeting: bool = False) -> None:
+        self.device = FakeNADTransport(load_profile(profile))
+        self.greeting = greeting
+        self.server = None
+        self.port = None
+
+    async def start(self) -> "ReceiverSimulator":
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def _serve(self, reader, writer) -> None:
+        if self.greeting:
+            writer.write(f"\r{self.device.communicate('Main.Model?')}\r\n".encode())
+        try:
+            while data := await reader.read(1024):
+                for cmd in data.decode().replace("\n", "\r").split("\r"):
+                    if cmd and (reply := self.device.communicate(cmd)):
+                        writer.write(f"\n{reply}\r".encode())
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def start_other_service() -> asyncio.AbstractServer:
+    """A service that is not a receiver."""
+
+    async def serve(reader, writer) -> None:
+        writer.write(b"SSH-2.0-OpenSSH_9.0\r\n")
+        try:
+            await reader.read(1024)
+        except ConnectionError:
+            pass
+        writer.close()
+
+    return await asyncio.start_server(serve, "127.0.0.1", 0)
+
+
+@pytest.mark.enable_socket
+async def test_scan_finds_receivers():
+    """Receivers on several ports are found and other services are ignored."""
+    receivers = [
+        await ReceiverSimulator("T787", greeting=True).start(),
+        await ReceiverSimulator("C356BEE").start(),
+        await ReceiverSimulator("T778").start(),
+    ]
+    other = await start_other_service()
+    ports = [receiver.port for receiver in receivers] + [other.sockets[0].getsockname()[1]]
+
+    found = [result async for result in async_scan("127.0.0.1/32", ports=ports, timeout=0.2)]
+    assert sorted(found) == sorted(
+        [
+            ("127.0.0.1", receivers[0].port, "T787"),
+            ("127.0.0.1", receivers[1].port, "C356BEE"),
+            ("127.0.0.1", receivers[2].port, "T778"),
+        ]
+    )
+    assert await async_probe("127.0.0.1", ports[-1], timeout=0.2) is None
+
+    other.close()
+    await other.wait_closed()
+    for receiver in receivers:
+        await receiver.stop()
+
+
+async def test_scan_is_bounded():
+    """A /24 is probed with bounded concurrency and results arrive as they are found."""
+    probing = {"now": 0, "peak": 0}
+
+    async def probe(host: str, port: int, timeout: float) -> str | None:
+        probing["now"] += 1
+        probing["peak"] = max(probing["peak"], probing["now"])
+        # Every probe waits out the connect timeout, as for an empty address
+        await asyncio.sleep(timeout)
+        probing["now"] -= 1
+        return "T787" if host in ("10.0.0.7", "10.0.0.200") else None
+
+    start = time.monotonic()
+    arrivals = []
+    with patch("custom_components.nad_remote.scanner.async_probe", probe):
+        async for host, port, model in async_scan("10.0.0.0/24", timeout=0.05):
+            arrivals.append((host, time.monotonic() - start))
+    elapsed = time.monotonic() - start
+
+    assert [host for host, _ in arrivals] == ["10.0.0.7", "10.0.0.200"]
+    # The first receiver is reported long before the scan ends
+    assert arrivals[0][1] < elapsed / 2
+    assert probing["peak"] == SCAN_CONCURRENCY
+    # 254 addresses in rounds of SCAN_CONCURRENCY
+    assert elapsed < 1.0
+
+    with pytest.raises(ValueError):
+        async for _ in async_scan("not a network"):
+            pass
+    with pytest.raises(ScanRangeTooLarge):
+        async for _ in async_scan("10.0.0.0/8"):
+            pass
+    assert scan_range("10.0.0.0/22").num_addresses == 1024
@@ -0,0 +1,24 @@
+"""Soak test of the integration with many simulated receivers."""
+import os
+
+from .soak import SoakConfig, async_run_soak
+
+
+async def test_soak(hass):
+    """Test the event loop stays responsive while many receivers are polled."""
+    config = SoakConfig(
+        receivers=int(os.environ.get("NAD_SOAK_RECEIVERS", 8)),
+        duration=float(os.environ.get("NAD_SOAK_SECONDS", 2.0)),
+    )
+    report = await async_run_soak(hass, config)
+    if "NAD_SOAK_REPORT" in os.environ:
+        report.save(os.environ["NAD_SOAK_REPORT"])
+
+    # Every receiver has its two media players plus its property entities
+    assert report.entities > 2 * config.receivers
+    # Each receiver is polled about once per interval
+    assert report.polls >= config.receivers * config.duration / config.poll_interval / 2
+    assert report.poll_timeouts == 0
+    assert report.state_writes > 0
+    # Blocking receiver I/O stays off the event loop
+    assert report.loop_lag_p99 < 0.1